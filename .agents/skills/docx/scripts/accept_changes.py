@@ -9,7 +9,12 @@ import shutil
 import subprocess
 from pathlib import Path
 
-from office.soffice import get_soffice_env
+from office.soffice import (
+    SofficeTimeout,
+    get_pool,
+    get_soffice_env,
+    uno_available,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -52,6 +57,9 @@ def accept_changes(
     except Exception as e:
         return None, f"Error: Failed to copy input file to output location: {e}"
 
+    if uno_available():
+        return _accept_changes_with_pool(input_file, output_file, output_path)
+
     if not _setup_libreoffice_macro():
         return None, "Error: Failed to setup LibreOffice macro"
 
@@ -88,6 +96,31 @@ def accept_changes(
     )
 
 
+def _accept_changes_with_pool(
+    input_file: str, output_file: str, output_path: Path
+) -> tuple[None, str]:
+    try:
+        get_pool().run(_accept_all_and_store, output_path.absolute(), timeout=30)
+    except SofficeTimeout:
+        return None, "Error: LibreOffice timed out accepting tracked changes"
+    except Exception as e:
+        return None, f"Error: LibreOffice failed: {e}"
+
+    return (
+        None,
+        f"Successfully accepted all tracked changes: {input_file} -> {output_file}",
+    )
+
+
+def _accept_all_and_store(session, path: Path) -> None:
+    document = session.load_document(path)
+    try:
+        session.dispatch(document, ".uno:AcceptAllTrackedChanges")
+        document.store()
+    finally:
+        document.close(True)
+
+
 def _setup_libreoffice_macro() -> bool:
     macro_dir = Path(MACRO_DIR)
     macro_file = macro_dir / "Module1.xba"
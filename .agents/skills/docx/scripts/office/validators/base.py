@@ -2,12 +2,45 @@
 Base validator with common validation logic for document files.
 """
 
+import posixpath
 import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import defusedxml.minidom
 import lxml.etree
 
+from .manifest import MANIFEST_NAME, ValidationManifest, content_digest
+from .original import load_original_package
+from .package_graph import CONTENT_TYPES_PART, PackageGraph, rels_part_name
+from .rules import Rule, walk_part
+
+_COMPILED_SCHEMAS = {}
+
+
+def _load_schema(schema_path):
+    key = str(Path(schema_path).resolve())
+    schema = _COMPILED_SCHEMAS.get(key)
+    if schema is None:
+        with open(key, "rb") as xsd_file:
+            parser = lxml.etree.XMLParser()
+            xsd_doc = lxml.etree.parse(xsd_file, parser=parser, base_url=key)
+        schema = lxml.etree.XMLSchema(xsd_doc)
+        _COMPILED_SCHEMAS[key] = schema
+    return schema
+
+
+_worker_validator = None
+
+
+def _init_xsd_worker(validator_class, unpacked_dir, original_file):
+    global _worker_validator
+    _worker_validator = validator_class(unpacked_dir, original_file)
+
+
+def _validate_file_against_xsd_in_worker(xml_file):
+    return _worker_validator.validate_file_against_xsd(xml_file, verbose=False)
+
 
 class BaseSchemaValidator:
 
@@ -91,24 +124,97 @@ class BaseSchemaValidator:
         "http://www.w3.org/XML/1998/namespace",
     }
 
-    def __init__(self, unpacked_dir, original_file=None, verbose=False):
+    def __init__(
+        self, unpacked_dir, original_file=None, verbose=False, jobs=1, full=False
+    ):
         self.unpacked_dir = Path(unpacked_dir).resolve()
         self.original_file = Path(original_file) if original_file else None
         self.verbose = verbose
+        self.jobs = max(1, jobs)
+        self.full = full
+        self.xsd_reused_count = 0
 
         self.schemas_dir = Path(__file__).parent.parent / "schemas"
 
-        patterns = ["*.xml", "*.rels"]
+        self.package = PackageGraph(self.unpacked_dir, parse=self._parse_xml)
+
+        suffixes = [".xml", ".rels"]
         self.xml_files = [
-            f for pattern in patterns for f in self.unpacked_dir.rglob(pattern)
+            path
+            for suffix in suffixes
+            for part, path in self.package.parts.items()
+            if part.endswith(suffix)
         ]
 
         if not self.xml_files:
             print(f"Warning: No XML files found in {self.unpacked_dir}")
 
+        self._tree_cache = {}
+        self.parse_count = 0
+        self.parses_saved = 0
+        self._rule_results = None
+
     def validate(self):
         raise NotImplementedError("Subclasses must implement the validate method")
 
+    def _parse_xml(self, xml_file):
+        xml_file = Path(xml_file)
+        if not xml_file.is_relative_to(self.unpacked_dir):
+            return lxml.etree.parse(str(xml_file))
+
+        stat = xml_file.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        cached = self._tree_cache.get(xml_file)
+        if cached is not None and cached[0] == signature:
+            self.parses_saved += 1
+            return cached[1]
+
+        tree = lxml.etree.parse(str(xml_file))
+        self.parse_count += 1
+        self._tree_cache[xml_file] = (signature, tree)
+        return tree
+
+    def _invalidate_xml(self, xml_file):
+        self._tree_cache.pop(Path(xml_file), None)
+        self._rule_results = None
+        self.package.add_part(self.package.part_name(xml_file))
+
+    def _part_rules(self):
+        return {
+            "unique_ids": _UniqueIdRule(
+                self.UNIQUE_ID_REQUIREMENTS,
+                self.EXCLUDED_ID_CONTAINERS,
+                f"{{{self.MC_NAMESPACE}}}AlternateContent",
+            ),
+        }
+
+    def _walk_part_rules(self):
+        if self._rule_results is not None:
+            return self._rule_results
+
+        rules = self._part_rules()
+        for xml_file in self.xml_files:
+            try:
+                source = self._parse_xml(xml_file)
+            except Exception:
+                source = xml_file
+            walk_part(
+                source,
+                xml_file,
+                rules.values(),
+                label=str(xml_file.relative_to(self.unpacked_dir)),
+            )
+
+        self._rule_results = rules
+        return rules
+
+    def parse_cache_summary(self):
+        return (
+            f"Parsed {self.parse_count} XML part(s), "
+            f"reused cached trees {self.parses_saved} time(s)"
+        )
+
     def repair(self) -> int:
         return self.repair_whitespace_preservation()
 
@@ -134,6 +240,7 @@ class BaseSchemaValidator:
 
                 if modified:
                     xml_file.write_bytes(dom.toxml(encoding="UTF-8"))
+                    self._invalidate_xml(xml_file)
 
             except Exception:
                 pass
@@ -145,7 +252,7 @@ class BaseSchemaValidator:
 
         for xml_file in self.xml_files:
             try:
-                lxml.etree.parse(str(xml_file))
+                self._parse_xml(xml_file)
             except lxml.etree.XMLSyntaxError as e:
                 errors.append(
                     f"  {xml_file.relative_to(self.unpacked_dir)}: "
@@ -172,7 +279,7 @@ class BaseSchemaValidator:
 
         for xml_file in self.xml_files:
             try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
+                root = self._parse_xml(xml_file).getroot()
                 declared = set(root.nsmap.keys()) - {None}  
 
                 for attr_val in [
@@ -197,84 +304,7 @@ class BaseSchemaValidator:
         return True
 
     def validate_unique_ids(self):
-        errors = []
-        global_ids = {}  
-
-        for xml_file in self.xml_files:
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-                file_ids = {}  
-
-                mc_elements = root.xpath(
-                    ".//mc:AlternateContent", namespaces={"mc": self.MC_NAMESPACE}
-                )
-                for elem in mc_elements:
-                    elem.getparent().remove(elem)
-
-                for elem in root.iter():
-                    tag = (
-                        elem.tag.split("}")[-1].lower()
-                        if "}" in elem.tag
-                        else elem.tag.lower()
-                    )
-
-                    if tag in self.UNIQUE_ID_REQUIREMENTS:
-                        in_excluded_container = any(
-                            ancestor.tag.split("}")[-1].lower() in self.EXCLUDED_ID_CONTAINERS
-                            for ancestor in elem.iterancestors()
-                        )
-                        if in_excluded_container:
-                            continue
-
-                        attr_name, scope = self.UNIQUE_ID_REQUIREMENTS[tag]
-
-                        id_value = None
-                        for attr, value in elem.attrib.items():
-                            attr_local = (
-                                attr.split("}")[-1].lower()
-                                if "}" in attr
-                                else attr.lower()
-                            )
-                            if attr_local == attr_name:
-                                id_value = value
-                                break
-
-                        if id_value is not None:
-                            if scope == "global":
-                                if id_value in global_ids:
-                                    prev_file, prev_line, prev_tag = global_ids[
-                                        id_value
-                                    ]
-                                    errors.append(
-                                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                                        f"Line {elem.sourceline}: Global ID '{id_value}' in <{tag}> "
-                                        f"already used in {prev_file} at line {prev_line} in <{prev_tag}>"
-                                    )
-                                else:
-                                    global_ids[id_value] = (
-                                        xml_file.relative_to(self.unpacked_dir),
-                                        elem.sourceline,
-                                        tag,
-                                    )
-                            elif scope == "file":
-                                key = (tag, attr_name)
-                                if key not in file_ids:
-                                    file_ids[key] = {}
-
-                                if id_value in file_ids[key]:
-                                    prev_line = file_ids[key][id_value]
-                                    errors.append(
-                                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                                        f"Line {elem.sourceline}: Duplicate {attr_name}='{id_value}' in <{tag}> "
-                                        f"(first occurrence at line {prev_line})"
-                                    )
-                                else:
-                                    file_ids[key][id_value] = elem.sourceline
-
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: Error: {e}"
-                )
+        errors = self._walk_part_rules()["unique_ids"].errors
 
         if errors:
             print(f"FAILED - Found {len(errors)} ID uniqueness violations:")
@@ -289,81 +319,52 @@ class BaseSchemaValidator:
     def validate_file_references(self):
         errors = []
 
-        rels_files = list(self.unpacked_dir.rglob("*.rels"))
+        rels_parts = self.package.rels_parts()
 
-        if not rels_files:
+        if not rels_parts:
             if self.verbose:
                 print("PASSED - No .rels files found")
             return True
 
-        all_files = []
-        for file_path in self.unpacked_dir.rglob("*"):
-            if (
-                file_path.is_file()
-                and file_path.name != "[Content_Types].xml"
-                and not file_path.name.endswith(".rels")
-            ):  
-                all_files.append(file_path.resolve())
+        all_parts = [
+            part
+            for part in self.package.parts
+            if posixpath.basename(part) not in (CONTENT_TYPES_PART, MANIFEST_NAME)
+            and not part.endswith(".rels")
+        ]
 
-        all_referenced_files = set()
+        all_referenced_parts = set()
 
         if self.verbose:
             print(
-                f"Found {len(rels_files)} .rels files and {len(all_files)} target files"
+                f"Found {len(rels_parts)} .rels files and {len(all_parts)} target files"
             )
 
-        for rels_file in rels_files:
+        for rels_part in rels_parts:
             try:
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
-
-                rels_dir = rels_file.parent
-
-                referenced_files = set()
                 broken_refs = []
 
-                for rel in rels_root.findall(
-                    ".//ns:Relationship",
-                    namespaces={"ns": self.PACKAGE_RELATIONSHIPS_NAMESPACE},
-                ):
-                    target = rel.get("Target")
-                    if target and not target.startswith(
-                        ("http", "mailto:")
-                    ):  
-                        if target.startswith("/"):
-                            target_path = self.unpacked_dir / target.lstrip("/")
-                        elif rels_file.name == ".rels":
-                            target_path = self.unpacked_dir / target
+                for rel in self.package.relationships(rels_part):
+                    target = rel.target
+                    if target and not target.startswith(("http", "mailto:")):
+                        if rel.part in self.package.parts:
+                            all_referenced_parts.add(rel.part)
                         else:
-                            base_dir = rels_dir.parent
-                            target_path = base_dir / target
-
-                        try:
-                            target_path = target_path.resolve()
-                            if target_path.exists() and target_path.is_file():
-                                referenced_files.add(target_path)
-                                all_referenced_files.add(target_path)
-                            else:
-                                broken_refs.append((target, rel.sourceline))
-                        except (OSError, ValueError):
-                            broken_refs.append((target, rel.sourceline))
-
-                if broken_refs:
-                    rel_path = rels_file.relative_to(self.unpacked_dir)
-                    for broken_ref, line_num in broken_refs:
-                        errors.append(
-                            f"  {rel_path}: Line {line_num}: Broken reference to {broken_ref}"
-                        )
+                            broken_refs.append((target, rel.line))
+
+                for broken_ref, line_num in broken_refs:
+                    errors.append(
+                        f"  {Path(rels_part)}: Line {line_num}: Broken reference to {broken_ref}"
+                    )
 
             except Exception as e:
-                rel_path = rels_file.relative_to(self.unpacked_dir)
-                errors.append(f"  Error parsing {rel_path}: {e}")
+                errors.append(f"  Error parsing {Path(rels_part)}: {e}")
 
-        unreferenced_files = set(all_files) - all_referenced_files
+        unreferenced_parts = set(all_parts) - all_referenced_parts
 
-        if unreferenced_files:
-            for unref_file in sorted(unreferenced_files):
-                unref_rel_path = unref_file.relative_to(self.unpacked_dir)
-                errors.append(f"  Unreferenced file: {unref_rel_path}")
+        if unreferenced_parts:
+            for unref_path in sorted(Path(part) for part in unreferenced_parts):
+                errors.append(f"  Unreferenced file: {unref_path}")
 
         if errors:
             print(f"FAILED - Found {len(errors)} relationship validation errors:")
@@ -391,26 +392,22 @@ class BaseSchemaValidator:
             if xml_file.suffix == ".rels":
                 continue
 
-            rels_dir = xml_file.parent / "_rels"
-            rels_file = rels_dir / f"{xml_file.name}.rels"
+            part = xml_file.relative_to(self.unpacked_dir).as_posix()
+            rels_part = rels_part_name(part)
 
-            if not rels_file.exists():
+            if rels_part not in self.package.parts:
                 continue
 
             try:
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
                 rid_to_type = {}
 
-                for rel in rels_root.findall(
-                    f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
-                ):
-                    rid = rel.get("Id")
-                    rel_type = rel.get("Type", "")
+                for rel in self.package.relationships(rels_part):
+                    rid = rel.id
+                    rel_type = rel.type
                     if rid:
                         if rid in rid_to_type:
-                            rels_rel_path = rels_file.relative_to(self.unpacked_dir)
                             errors.append(
-                                f"  {rels_rel_path}: Line {rel.sourceline}: "
+                                f"  {Path(rels_part)}: Line {rel.line}: "
                                 f"Duplicate relationship ID '{rid}' (IDs must be unique)"
                             )
                         type_name = (
@@ -418,7 +415,7 @@ class BaseSchemaValidator:
                         )
                         rid_to_type[rid] = type_name
 
-                xml_root = lxml.etree.parse(str(xml_file)).getroot()
+                xml_root = self._parse_xml(xml_file).getroot()
 
                 r_ns = self.OFFICE_RELATIONSHIPS_NAMESPACE
                 rid_attrs_to_check = ["id", "embed", "link"]
@@ -492,29 +489,14 @@ class BaseSchemaValidator:
     def validate_content_types(self):
         errors = []
 
-        content_types_file = self.unpacked_dir / "[Content_Types].xml"
-        if not content_types_file.exists():
+        if CONTENT_TYPES_PART not in self.package.parts:
             print("FAILED - [Content_Types].xml file not found")
             return False
 
         try:
-            root = lxml.etree.parse(str(content_types_file)).getroot()
-            declared_parts = set()
-            declared_extensions = set()
-
-            for override in root.findall(
-                f".//{{{self.CONTENT_TYPES_NAMESPACE}}}Override"
-            ):
-                part_name = override.get("PartName")
-                if part_name is not None:
-                    declared_parts.add(part_name.lstrip("/"))
-
-            for default in root.findall(
-                f".//{{{self.CONTENT_TYPES_NAMESPACE}}}Default"
-            ):
-                extension = default.get("Extension")
-                if extension is not None:
-                    declared_extensions.add(extension.lower())
+            content_types = self.package.content_types()
+            declared_parts = content_types.overrides
+            declared_extensions = content_types.defaults
 
             declarable_roots = {
                 "sld",
@@ -538,9 +520,6 @@ class BaseSchemaValidator:
                 "emf": "image/x-emf",
             }
 
-            all_files = list(self.unpacked_dir.rglob("*"))
-            all_files = [f for f in all_files if f.is_file()]
-
             for xml_file in self.xml_files:
                 path_str = str(xml_file.relative_to(self.unpacked_dir)).replace(
                     "\\", "/"
@@ -553,7 +532,7 @@ class BaseSchemaValidator:
                     continue
 
                 try:
-                    root_tag = lxml.etree.parse(str(xml_file)).getroot().tag
+                    root_tag = self._parse_xml(xml_file).getroot().tag
                     root_name = root_tag.split("}")[-1] if "}" in root_tag else root_tag
 
                     if root_name in declarable_roots and path_str not in declared_parts:
@@ -564,7 +543,7 @@ class BaseSchemaValidator:
                 except Exception:
                     continue  
 
-            for file_path in all_files:
+            for file_path in self.package.parts.values():
                 if file_path.suffix.lower() in {".xml", ".rels"}:
                     continue
                 if file_path.name == "[Content_Types].xml":
@@ -622,7 +601,7 @@ class BaseSchemaValidator:
             if verbose:
                 relative_path = xml_file.relative_to(unpacked_dir)
                 print(f"FAILED - {relative_path}: {len(new_errors)} new error(s)")
-                for error in list(new_errors)[:3]:
+                for error in sorted(new_errors)[:3]:
                     truncated = error[:250] + "..." if len(error) > 250 else error
                     print(f"  - {truncated}")
             return False, new_errors
@@ -639,11 +618,10 @@ class BaseSchemaValidator:
         valid_count = 0
         skipped_count = 0
 
-        for xml_file in self.xml_files:
+        results = self._validate_files_against_xsd()
+
+        for xml_file, (is_valid, new_file_errors) in zip(self.xml_files, results):
             relative_path = str(xml_file.relative_to(self.unpacked_dir))
-            is_valid, new_file_errors = self.validate_file_against_xsd(
-                xml_file, verbose=False
-            )
 
             if is_valid is None:
                 skipped_count += 1
@@ -657,13 +635,15 @@ class BaseSchemaValidator:
                 continue
 
             new_errors.append(f"  {relative_path}: {len(new_file_errors)} new error(s)")
-            for error in list(new_file_errors)[:3]:  
+            for error in sorted(new_file_errors)[:3]:  
                 new_errors.append(
                     f"    - {error[:250]}..." if len(error) > 250 else f"    - {error}"
                 )
 
         if self.verbose:
             print(f"Validated {len(self.xml_files)} files:")
+            if self.xsd_reused_count:
+                print(f"  - Unchanged since last run: {self.xsd_reused_count}")
             print(f"  - Valid: {valid_count}")
             print(f"  - Skipped (no schema): {skipped_count}")
             if original_error_count:
@@ -682,6 +662,93 @@ class BaseSchemaValidator:
                 print("\nPASSED - No new XSD validation errors introduced")
             return True
 
+    def _validate_files_against_xsd(self):
+        manifest = ValidationManifest(
+            self.unpacked_dir,
+            type(self).__name__,
+            self.original_file,
+            schemas_dir=self.schemas_dir,
+        )
+        part_names = {
+            xml_file: xml_file.relative_to(self.unpacked_dir).as_posix()
+            for xml_file in self.xml_files
+        }
+        digests = {xml_file: content_digest(xml_file) for xml_file in self.xml_files}
+
+        verdicts = {}
+        if not self.full:
+            for xml_file in self.xml_files:
+                verdict = manifest.lookup(part_names[xml_file], digests[xml_file])
+                if verdict is not None:
+                    verdicts[xml_file] = verdict
+
+            changed = {
+                part_names[xml_file]
+                for xml_file in self.xml_files
+                if xml_file not in verdicts
+            }
+            changed.update(set(manifest.parts) - set(part_names.values()))
+            for xml_file in list(verdicts):
+                if self._points_at_changed_part(xml_file, changed):
+                    del verdicts[xml_file]
+
+        stale_files = [f for f in self.xml_files if f not in verdicts]
+        for xml_file, verdict in zip(
+            stale_files, self._run_xsd_validation(stale_files)
+        ):
+            verdicts[xml_file] = verdict
+            is_valid, errors = verdict
+            manifest.record(part_names[xml_file], digests[xml_file], is_valid, errors)
+
+        self.xsd_reused_count = len(self.xml_files) - len(stale_files)
+        manifest.prune(set(part_names.values()))
+        manifest.save()
+
+        return [verdicts[xml_file] for xml_file in self.xml_files]
+
+    def _points_at_changed_part(self, xml_file, changed):
+        if not changed:
+            return False
+
+        rels_part = rels_part_name(xml_file.relative_to(self.unpacked_dir).as_posix())
+        if rels_part not in self.package.parts:
+            return False
+
+        if rels_part in changed:
+            return True
+
+        try:
+            relationships = self.package.relationships(rels_part)
+        except Exception:
+            return True
+
+        return any(
+            rel.part in changed
+            for rel in relationships
+            if rel.target_mode != "External"
+        )
+
+    def _run_xsd_validation(self, xml_files):
+        if self.jobs <= 1 or len(xml_files) < 2:
+            return [
+                self.validate_file_against_xsd(xml_file, verbose=False)
+                for xml_file in xml_files
+            ]
+
+        chunksize = max(1, len(xml_files) // (self.jobs * 4))
+        with ProcessPoolExecutor(
+            max_workers=self.jobs,
+            initializer=_init_xsd_worker,
+            initargs=(type(self), self.unpacked_dir, self.original_file),
+        ) as executor:
+            return list(
+                executor.map(
+                    _validate_file_against_xsd_in_worker,
+                    xml_files,
+                    chunksize=chunksize,
+                )
+            )
+
     def _get_schema_path(self, xml_file):
         if xml_file.name in self.SCHEMA_MAPPINGS:
             return self.schemas_dir / self.SCHEMA_MAPPINGS[xml_file.name]
@@ -753,63 +820,61 @@ class BaseSchemaValidator:
             return None, None  
 
         try:
-            with open(schema_path, "rb") as xsd_file:
-                parser = lxml.etree.XMLParser()
-                xsd_doc = lxml.etree.parse(
-                    xsd_file, parser=parser, base_url=str(schema_path)
-                )
-                schema = lxml.etree.XMLSchema(xsd_doc)
+            xml_doc = self._parse_xml(xml_file)
+            return self._validate_tree_xsd(
+                xml_doc, schema_path, xml_file.relative_to(base_path)
+            )
+        except Exception as e:
+            return False, {str(e)}
 
-            with open(xml_file, "r") as f:
-                xml_doc = lxml.etree.parse(f)
+    def _validate_tree_xsd(self, xml_doc, schema_path, relative_path):
+        schema = _load_schema(schema_path)
 
-            xml_doc, _ = self._remove_template_tags_from_text_nodes(xml_doc)
-            xml_doc = self._preprocess_for_mc_ignorable(xml_doc)
+        xml_doc, _ = self._remove_template_tags_from_text_nodes(xml_doc)
+        xml_doc = self._preprocess_for_mc_ignorable(xml_doc)
 
-            relative_path = xml_file.relative_to(base_path)
-            if (
-                relative_path.parts
-                and relative_path.parts[0] in self.MAIN_CONTENT_FOLDERS
-            ):
-                xml_doc = self._clean_ignorable_namespaces(xml_doc)
+        if (
+            relative_path.parts
+            and relative_path.parts[0] in self.MAIN_CONTENT_FOLDERS
+        ):
+            xml_doc = self._clean_ignorable_namespaces(xml_doc)
 
-            if schema.validate(xml_doc):
-                return True, set()
-            else:
-                errors = set()
-                for error in schema.error_log:
-                    errors.add(error.message)
-                return False, errors
-
-        except Exception as e:
-            return False, {str(e)}
+        if schema.validate(xml_doc):
+            return True, set()
+        else:
+            errors = set()
+            for error in schema.error_log:
+                errors.add(error.message)
+            return False, errors
 
     def _get_original_file_errors(self, xml_file):
         if self.original_file is None:
             return set()
 
-        import tempfile
-        import zipfile
-
         xml_file = Path(xml_file).resolve()
         unpacked_dir = self.unpacked_dir.resolve()
         relative_path = xml_file.relative_to(unpacked_dir)
+        member_name = relative_path.as_posix()
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
+        original = load_original_package(self.original_file)
+        if member_name in original.xsd_errors:
+            return original.xsd_errors[member_name]
 
-            with zipfile.ZipFile(self.original_file, "r") as zip_ref:
-                zip_ref.extractall(temp_path)
-
-            original_xml_file = temp_path / relative_path
-
-            if not original_xml_file.exists():
-                return set()
+        errors = set()
+        schema_path = self._get_schema_path(relative_path)
+        if schema_path and member_name in original:
+            try:
+                xml_doc = lxml.etree.ElementTree(
+                    lxml.etree.fromstring(original.read(member_name))
+                )
+                _, errors = self._validate_tree_xsd(
+                    xml_doc, schema_path, relative_path
+                )
+            except Exception as e:
+                errors = {str(e)}
 
-            is_valid, errors = self._validate_single_file_xsd(
-                original_xml_file, temp_path
-            )
-            return errors if errors else set()
+        original.xsd_errors[member_name] = errors
+        return errors
 
     def _remove_template_tags_from_text_nodes(self, xml_doc):
         warnings = []
@@ -843,5 +908,91 @@ class BaseSchemaValidator:
         return lxml.etree.ElementTree(xml_copy), warnings
 
 
+class _UniqueIdRule(Rule):
+    # Elements inside mc:AlternateContent are skipped, as are elements inside
+    # an excluded container. Both are tracked with depth counters, so each
+    # element costs one lookup instead of a walk over its ancestors.
+
+    def __init__(self, requirements, excluded_containers, alternate_content_tag):
+        self.requirements = requirements
+        self.excluded_containers = excluded_containers
+        self.alternate_content_tag = alternate_content_tag
+        self.errors = []
+        self.global_ids = {}
+        self._file_ids = {}
+        self._names = {}
+        self._alternate_depth = 0
+        self._excluded_depth = 0
+
+    def _name(self, tag):
+        name = self._names.get(tag)
+        if name is None:
+            name = tag.rpartition("}")[2].lower()
+            self._names[tag] = name
+        return name
+
+    def start(self, elem, walk):
+        tag = elem.tag
+        if tag == self.alternate_content_tag:
+            self._alternate_depth += 1
+            return
+        if self._alternate_depth:
+            return
+
+        name = self._name(tag)
+        if name in self.excluded_containers:
+            self._excluded_depth += 1
+        elif name in self.requirements and not self._excluded_depth:
+            self._check(elem, name, walk)
+
+    def end(self, elem, walk):
+        tag = elem.tag
+        if tag == self.alternate_content_tag:
+            self._alternate_depth -= 1
+        elif not self._alternate_depth and self._name(tag) in self.excluded_containers:
+            self._excluded_depth -= 1
+
+    def _check(self, elem, tag, walk):
+        attr_name, scope = self.requirements[tag]
+
+        id_value = None
+        for attr, value in elem.attrib.items():
+            if self._name(attr) == attr_name:
+                id_value = value
+                break
+        if id_value is None:
+            return
+
+        if scope == "global":
+            if id_value in self.global_ids:
+                prev_file, prev_line, prev_tag = self.global_ids[id_value]
+                self.errors.append(
+                    f"  {walk.label}: "
+                    f"Line {elem.sourceline}: Global ID '{id_value}' in <{tag}> "
+                    f"already used in {prev_file} at line {prev_line} in <{prev_tag}>"
+                )
+            else:
+                self.global_ids[id_value] = (walk.label, elem.sourceline, tag)
+        elif scope == "file":
+            seen = self._file_ids.setdefault((tag, attr_name), {})
+            if id_value in seen:
+                self.errors.append(
+                    f"  {walk.label}: "
+                    f"Line {elem.sourceline}: Duplicate {attr_name}='{id_value}' in <{tag}> "
+                    f"(first occurrence at line {seen[id_value]})"
+                )
+            else:
+                seen[id_value] = elem.sourceline
+
+    def finish(self, walk):
+        self._file_ids = {}
+        self._alternate_depth = 0
+        self._excluded_depth = 0
+
+    def failed(self, walk, error):
+        self.finish(walk)
+        self.errors.append(f"  {walk.label}: Error: {error}")
+
+
 if __name__ == "__main__":
     raise RuntimeError("This module should not be run directly.")
@@ -0,0 +1,95 @@
+"""
+Content-hash manifest of per-part validation verdicts, stored in the unpacked
+directory so later runs only re-check parts that changed.
+
+The manifest is keyed on the validator, the original file and digests of the
+bundled schemas and of the validator sources, so editing either discards the
+stored verdicts.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+MANIFEST_NAME = ".validation-manifest.json"
+MANIFEST_VERSION = 1
+
+
+_TREE_DIGESTS = {}
+
+
+def content_digest(path) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def tree_digest(directory, pattern="*") -> str:
+    # Digest of every matching file's relative path and contents, computed
+    # once per process.
+    directory = Path(directory).resolve()
+    key = (directory, pattern)
+    if key not in _TREE_DIGESTS:
+        digest = hashlib.sha256()
+        for path in sorted(directory.rglob(pattern)):
+            if path.is_file():
+                digest.update(path.relative_to(directory).as_posix().encode())
+                digest.update(b"\0" + content_digest(path).encode())
+        _TREE_DIGESTS[key] = digest.hexdigest()
+    return _TREE_DIGESTS[key]
+
+
+class ValidationManifest:
+
+    def __init__(
+        self, unpacked_dir, validator_name, original_file=None, schemas_dir=None
+    ):
+        self.path = Path(unpacked_dir) / MANIFEST_NAME
+        self.key = {
+            "validator": validator_name,
+            "original": content_digest(original_file) if original_file else None,
+            "schemas": tree_digest(schemas_dir) if schemas_dir else None,
+            "code": tree_digest(Path(__file__).parent, "*.py"),
+        }
+        self.parts = {}
+        self._load()
+
+    def _load(self):
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+
+        if (
+            isinstance(data, dict)
+            and data.get("version") == MANIFEST_VERSION
+            and data.get("key") == self.key
+        ):
+            self.parts = data.get("parts", {})
+
+    def lookup(self, part_name, digest):
+        entry = self.parts.get(part_name)
+        if entry is None or entry.get("hash") != digest:
+            return None
+        return entry["valid"], set(entry["errors"])
+
+    def record(self, part_name, digest, is_valid, errors):
+        self.parts[part_name] = {
+            "hash": digest,
+            "valid": is_valid,
+            "errors": sorted(errors),
+        }
+
+    def prune(self, part_names):
+        self.parts = {
+            name: entry for name, entry in self.parts.items() if name in part_names
+        }
+
+    def save(self):
+        data = {"version": MANIFEST_VERSION, "key": self.key, "parts": self.parts}
+        try:
+            self.path.write_text(json.dumps(data, indent=1), encoding="utf-8")
+        except OSError:
+            pass
+
+
+if __name__ == "__main__":
+    raise RuntimeError("This module should not be run directly.")
@@ -0,0 +1,207 @@
+"""
+Index of an unpacked OOXML package: its parts, their relationships, the
+declared content types and, for every part, the relationships that target it.
+
+The directory is scanned once. A .rels part is parsed the first time its
+relationships are asked for, and the reverse index is built from all of them
+the first time it is needed. Scripts that write or delete files report them
+with add_part and remove_part, which update the index in place instead of
+rescanning the tree.
+"""
+
+import fnmatch
+import posixpath
+from collections import namedtuple
+from pathlib import Path
+
+import lxml.etree
+
+RELATIONSHIPS_NAMESPACE = "http://schemas.openxmlformats.org/package/2006/relationships"
+CONTENT_TYPES_NAMESPACE = "http://schemas.openxmlformats.org/package/2006/content-types"
+CONTENT_TYPES_PART = "[Content_Types].xml"
+
+Relationship = namedtuple("Relationship", "id type target target_mode line part")
+ContentTypes = namedtuple("ContentTypes", "overrides defaults")
+
+_PARSER = lxml.etree.XMLParser(resolve_entities=False, no_network=True, load_dtd=False)
+
+
+def rels_part_name(part: str) -> str:
+    directory, name = posixpath.split(part)
+    return posixpath.join(directory, "_rels", f"{name}.rels")
+
+
+def source_part_name(rels_part: str) -> str:
+    rels_dir, name = posixpath.split(rels_part)
+    return posixpath.join(posixpath.dirname(rels_dir), name.removesuffix(".rels"))
+
+
+class PackageGraph:
+
+    def __init__(self, unpacked_dir, parse=None):
+        self.unpacked_dir = Path(unpacked_dir).resolve()
+        self._parse = parse or _parse
+        self.parts = {}
+        for path in self.unpacked_dir.rglob("*"):
+            if path.is_file():
+                self.parts[path.relative_to(self.unpacked_dir).as_posix()] = path
+
+        self._relationships = {}
+        self._content_types = None
+        self._referrers = None
+
+    def path(self, part: str) -> Path:
+        return self.parts.get(part) or self.unpacked_dir / part
+
+    def part_name(self, path) -> str:
+        return Path(path).resolve().relative_to(self.unpacked_dir).as_posix()
+
+    def glob(self, pattern: str) -> list[str]:
+        directory, name = posixpath.split(pattern)
+        return [
+            part
+            for part in self.parts
+            if posixpath.dirname(part) == directory
+            and fnmatch.fnmatchcase(posixpath.basename(part), name)
+        ]
+
+    def rels_parts(self) -> list[str]:
+        return [part for part in self.parts if part.endswith(".rels")]
+
+    def relationships(self, rels_part: str) -> list[Relationship]:
+        # A part that failed to parse raises the same error on every query.
+        cached = self._relationships.get(rels_part)
+        if cached is None:
+            try:
+                cached = self._read_relationships(rels_part)
+            except Exception as e:
+                cached = e
+            self._relationships[rels_part] = cached
+        if isinstance(cached, Exception):
+            raise cached
+        return cached
+
+    def relationships_of(self, part: str) -> list[Relationship]:
+        rels_part = rels_part_name(part)
+        if rels_part not in self.parts:
+            return []
+        return self.relationships(rels_part)
+
+    def resolve(self, rels_part: str, target: str) -> str | None:
+        if not target:
+            return None
+        if target.startswith("/"):
+            name = target.lstrip("/")
+        elif posixpath.basename(rels_part) == ".rels":
+            name = target
+        else:
+            name = posixpath.join(posixpath.dirname(posixpath.dirname(rels_part)), target)
+        name = posixpath.normpath(name)
+        if name in (".", "..") or name.startswith(("../", "/")):
+            return None
+        return name
+
+    def referrers(self, part: str) -> set[str]:
+        return set(self._reverse_index().get(part, ()))
+
+    def referenced_parts(self) -> set[str]:
+        return {part for part, sources in self._reverse_index().items() if sources}
+
+    def content_types(self) -> ContentTypes:
+        if self._content_types is None:
+            try:
+                self._content_types = self._read_content_types()
+            except Exception as e:
+                self._content_types = e
+        if isinstance(self._content_types, Exception):
+            raise self._content_types
+        return self._content_types
+
+    def add_part(self, part: str) -> None:
+        # Also used after rewriting an existing part, to re-read it.
+        self.parts[part] = self.unpacked_dir / part
+        if part.endswith(".rels"):
+            self._unindex(part)
+            self._relationships.pop(part, None)
+            self._index(part)
+        elif part == CONTENT_TYPES_PART:
+            self._content_types = None
+
+    def remove_part(self, part: str) -> None:
+        if self.parts.pop(part, None) is None:
+            return
+        if part.endswith(".rels"):
+            self._unindex(part)
+            self._relationships.pop(part, None)
+        elif part == CONTENT_TYPES_PART:
+            self._content_types = None
+
+    def _read_relationships(self, rels_part):
+        root = self._parse(self.parts[rels_part]).getroot()
+        relationships = []
+        for rel in root.iterdescendants(f"{{{RELATIONSHIPS_NAMESPACE}}}Relationship"):
+            target = rel.get("Target")
+            relationships.append(
+                Relationship(
+                    rel.get("Id"),
+                    rel.get("Type", ""),
+                    target,
+                    rel.get("TargetMode"),
+                    rel.sourceline,
+                    self.resolve(rels_part, target),
+                )
+            )
+        return relationships
+
+    def _read_content_types(self):
+        root = self._parse(self.parts[CONTENT_TYPES_PART]).getroot()
+        overrides = {}
+        for override in root.iterdescendants(f"{{{CONTENT_TYPES_NAMESPACE}}}Override"):
+            part_name = override.get("PartName")
+            if part_name is not None:
+                overrides[part_name.lstrip("/")] = override.get("ContentType")
+        defaults = {}
+        for default in root.iterdescendants(f"{{{CONTENT_TYPES_NAMESPACE}}}Default"):
+            extension = default.get("Extension")
+            if extension is not None:
+                defaults[extension.lower()] = default.get("ContentType")
+        return ContentTypes(overrides, defaults)
+
+    def _reverse_index(self):
+        if self._referrers is None:
+            self._referrers = {}
+            for rels_part in self.rels_parts():
+                self._index(rels_part)
+        return self._referrers
+
+    def _index(self, rels_part):
+        if self._referrers is None:
+            return
+        try:
+            relationships = self.relationships(rels_part)
+        except Exception:
+            return
+        for rel in relationships:
+            if rel.part is not None:
+                self._referrers.setdefault(rel.part, set()).add(rels_part)
+
+    def _unindex(self, rels_part):
+        if self._referrers is None:
+            return
+        cached = self._relationships.get(rels_part)
+        if not isinstance(cached, list):
+            return
+        for rel in cached:
+            sources = self._referrers.get(rel.part)
+            if sources is not None:
+                sources.discard(rels_part)
+                if not sources:
+                    del self._referrers[rel.part]
+
+
+def _parse(path):
+    return lxml.etree.parse(str(path), _PARSER)
+
+
+if __name__ == "__main__":
+    raise RuntimeError("This module should not be run directly.")
@@ -0,0 +1,155 @@
+"""
+Single-traversal rule engine for per-part XML checks.
+
+Each rule subscribes to the element tags it cares about and is called on
+their start and/or end events while one walk visits the part, so adding a
+rule does not add another pass over the XML. The walk keeps a count of open
+ancestors for the tags rules ask about, which makes "inside w:del" style
+tests a dictionary lookup.
+
+Parts already parsed are walked in place with lxml.etree.iterwalk; raw
+bytes or files are streamed with lxml.etree.iterparse, clearing each element
+once its end event has been handled.
+"""
+
+from io import BytesIO
+
+import lxml.etree
+
+
+class Rule:
+
+    tags = ()
+    ancestors = ()
+
+    def applies_to(self, part) -> bool:
+        return True
+
+    def start(self, elem, walk):
+        pass
+
+    def end(self, elem, walk):
+        pass
+
+    def finish(self, walk):
+        pass
+
+    def failed(self, walk, error):
+        pass
+
+
+class PartWalk:
+
+    def __init__(self, part, label):
+        self.part = part
+        self.label = label
+        self.open = {}
+
+    def inside(self, tag) -> bool:
+        return self.open.get(tag, 0) > 0
+
+
+def walk_part(source, part, rules, label=None):
+    rules = [rule for rule in rules if rule.applies_to(part)]
+    if not rules:
+        return
+
+    walk = PartWalk(part, label if label is not None else str(part))
+    for tag in {tag for rule in rules for tag in rule.ancestors}:
+        walk.open[tag] = 0
+
+    dispatch = _Dispatch(rules)
+    open_counts = walk.open
+
+    # Without a rule that looks at every element, only subscribed tags
+    # produce events at all.
+    options = {"events": ("start", "end")}
+    if all(rule.tags for rule in rules):
+        options["tag"] = list(
+            {tag for rule in rules for tag in (*rule.tags, *rule.ancestors)}
+        )
+
+    streaming = not isinstance(source, lxml.etree._ElementTree)
+    if not streaming:
+        events = lxml.etree.iterwalk(source, **options)
+    else:
+        if isinstance(source, bytes):
+            source = BytesIO(source)
+        events = lxml.etree.iterparse(
+            source, no_network=True, load_dtd=False, **options
+        )
+
+    try:
+        for event, elem in events:
+            tag = elem.tag
+            if event == "start":
+                handlers = dispatch.start.get(tag, dispatch.any_start)
+                for rule in handlers:
+                    try:
+                        rule.start(elem, walk)
+                    except Exception as e:
+                        dispatch.drop(rule, walk, e)
+                if tag in open_counts:
+                    open_counts[tag] += 1
+            else:
+                if tag in open_counts:
+                    open_counts[tag] -= 1
+                handlers = dispatch.end.get(tag, dispatch.any_end)
+                for rule in handlers:
+                    try:
+                        rule.end(elem, walk)
+                    except Exception as e:
+                        dispatch.drop(rule, walk, e)
+                if streaming:
+                    elem.clear(keep_tail=True)
+    except lxml.etree.XMLSyntaxError as e:
+        for rule in dispatch.rules:
+            rule.failed(walk, e)
+        return
+
+    for rule in dispatch.rules:
+        rule.finish(walk)
+
+
+class _Dispatch:
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self._build()
+
+    def drop(self, rule, walk, error):
+        if rule in self.rules:
+            self.rules.remove(rule)
+            rule.failed(walk, error)
+            self._build()
+
+    def _build(self):
+        self.any_start = [
+            rule for rule in self.rules if not rule.tags and _overrides(rule, "start")
+        ]
+        self.any_end = [
+            rule for rule in self.rules if not rule.tags and _overrides(rule, "end")
+        ]
+
+        self.start = {}
+        self.end = {}
+        tags = {tag for rule in self.rules for tag in rule.tags}
+        for tag in tags:
+            self.start[tag] = self.any_start + [
+                rule
+                for rule in self.rules
+                if tag in rule.tags and _overrides(rule, "start")
+            ]
+            self.end[tag] = self.any_end + [
+                rule
+                for rule in self.rules
+                if tag in rule.tags and _overrides(rule, "end")
+            ]
+
+
+def _overrides(rule, method) -> bool:
+    return getattr(type(rule), method) is not getattr(Rule, method)
+
+
+if __name__ == "__main__":
+    raise RuntimeError("This module should not be run directly.")
@@ -0,0 +1,382 @@
+"""
+Character-level word diff in the format of
+`git diff --word-diff=plain --word-diff-regex=. -U0`, without running git.
+
+Lines are aligned first with patience diff (Myers where no line is unique),
+and only the lines inside each changed hunk are diffed character by
+character with Myers. Hunks whose lines are each a close edit of the line
+they replace are diffed line by line. Newlines are treated as whitespace:
+they are never marked, only carried through from the modified text.
+
+Where several minimal diffs exist, this greedy Myers and git's xdiff
+(bisecting Myers followed by hunk compaction) can pick different ones, so
+the marked characters may differ from git's even though the number of
+changes is the same.
+
+The work is bounded per diff, not just per Myers run, and the shortcuts
+below are where the output departs from git's:
+- Myers gives up once a diff needs more than MAX_EDIT_COST edits, straight
+  away when the lengths alone differ by more than that. Line alignment and
+  hunk diffing each draw on one WORK_BUDGET of Myers steps; once it is
+  spent, every remaining hunk is marked as deleted and re-inserted.
+- A hunk of at least MIN_FILTERED_LENGTH characters whose words are less
+  than MIN_PAIR_SIMILARITY alike is not diffed as a whole. A single line is
+  marked as replaced outright; several lines are diffed line by line, each
+  against the line at the same position, under the same rule.
+- A stretch longer than MAX_EDIT_COST characters is diffed on word tokens
+  first, and refined to characters only if the word diff shows that the
+  character diff fits under the cap. A stretch whose character diff hits
+  the cap is diffed on word tokens too. If the word diff hits the cap, the
+  stretch is marked as deleted and re-inserted.
+"""
+
+import re
+from bisect import bisect_left
+from collections import Counter
+
+MAX_EDIT_COST = 1000
+WORK_BUDGET = 2_000_000
+MIN_PAIR_SIMILARITY = 0.6
+MIN_FILTERED_LENGTH = 100
+WORD_TOKEN = re.compile(r"\w+|\s+|[^\w\s]")
+WORD = re.compile(r"\w+")
+
+
+def word_diff(original_text: str, modified_text: str) -> str:
+    original_lines = original_text.split("\n")
+    modified_lines = modified_text.split("\n")
+
+    return render_hunks(
+        (original_lines[i0:i1], modified_lines[j0:j1])
+        for i0, i1, j0, j1 in changed_hunks(original_lines, modified_lines)
+    )
+
+
+def changed_hunks(original_keys: list, modified_keys: list) -> list:
+    # Keys stand in for lines (the lines themselves, or hashes of them). Like
+    # git, the unterminated last line never matches a terminated one.
+    ids = {}
+    a = _line_ids(original_keys, ids)
+    b = _line_ids(modified_keys, ids)
+
+    matches = []
+    _patience(a, b, 0, len(a), 0, len(b), matches, [WORK_BUDGET])
+    return list(_gaps(matches, len(a), len(b)))
+
+
+def _line_ids(keys, ids) -> list[int]:
+    last = len(keys) - 1
+    return [ids.setdefault((key, i == last), len(ids)) for i, key in enumerate(keys)]
+
+
+def render_hunks(hunks) -> str:
+    content_lines = []
+    budget = [WORK_BUDGET]
+    for minus_lines, plus_lines in hunks:
+        hunk = _diff_hunk(minus_lines, plus_lines, budget)
+        content_lines.extend(line for line in hunk.split("\n") if line.strip())
+    return "\n".join(content_lines)
+
+
+def _patience(a, b, alo, ahi, blo, bhi, matches, budget):
+    while alo < ahi and blo < bhi and a[alo] == b[blo]:
+        matches.append((alo, blo))
+        alo += 1
+        blo += 1
+
+    suffix = []
+    while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+        ahi -= 1
+        bhi -= 1
+        suffix.append((ahi, bhi))
+
+    anchors = _unique_anchors(a, b, alo, ahi, blo, bhi)
+    if anchors:
+        for ai, bi in anchors:
+            _patience(a, b, alo, ai, blo, bi, matches, budget)
+            matches.append((ai, bi))
+            alo, blo = ai + 1, bi + 1
+        _patience(a, b, alo, ahi, blo, bhi, matches, budget)
+    elif alo < ahi and blo < bhi:
+        matches.extend(_myers(a, b, alo, ahi, blo, bhi, budget) or [])
+
+    matches.extend(reversed(suffix))
+
+
+def _unique_anchors(a, b, alo, ahi, blo, bhi) -> list[tuple[int, int]]:
+    counts = {}
+    for i in range(alo, ahi):
+        entry = counts.setdefault(a[i], [0, 0, i, 0])
+        entry[0] += 1
+    for j in range(blo, bhi):
+        entry = counts.get(b[j])
+        if entry is not None:
+            entry[1] += 1
+            entry[3] = j
+
+    pairs = sorted(
+        (entry[3], entry[2])
+        for entry in counts.values()
+        if entry[0] == 1 and entry[1] == 1
+    )
+    return _longest_increasing(pairs)
+
+
+def _longest_increasing(pairs: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    tails = []
+    tail_index = []
+    previous = [None] * len(pairs)
+    for index, (_, ai) in enumerate(pairs):
+        pos = bisect_left(tails, ai)
+        if pos == len(tails):
+            tails.append(ai)
+            tail_index.append(index)
+        else:
+            tails[pos] = ai
+            tail_index[pos] = index
+        previous[index] = tail_index[pos - 1] if pos else None
+
+    chain = []
+    index = tail_index[-1] if tail_index else None
+    while index is not None:
+        bj, ai = pairs[index]
+        chain.append((ai, bj))
+        index = previous[index]
+    return chain[::-1]
+
+
+def _myers(a, b, alo, ahi, blo, bhi, budget) -> list[tuple[int, int]] | None:
+    # None when the diff needs more than MAX_EDIT_COST edits or more steps
+    # than are left in budget, a one-item list shared by all runs.
+    n, m = ahi - alo, bhi - blo
+    if abs(n - m) > MAX_EDIT_COST:
+        return None
+    offset = n + m + 1
+    v = [0] * (2 * offset + 1)
+    trace = []
+
+    for d in range(min(n + m, MAX_EDIT_COST) + 1):
+        budget[0] -= d + 1
+        if budget[0] < 0:
+            return None
+        trace.append(v[offset - d : offset + d + 1])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            if x < n and y < m and a[alo + x] == b[blo + y]:
+                x += _snake(a, b, alo + x, blo + y, min(n - x, m - y))
+                y = x - k
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return _backtrack(trace, a, b, alo, blo, n, m)
+
+    return None
+
+
+def _snake(a, b, i, j, limit) -> int:
+    # Gallop over long runs of equal items with slice comparisons.
+    low, step = 1, 1
+    while low < limit:
+        high = min(low + step, limit)
+        if a[i + low : i + high] != b[j + low : j + high]:
+            break
+        low = high
+        step *= 4
+    else:
+        return limit
+
+    while high - low > 1:
+        middle = (low + high) // 2
+        if a[i + low : i + middle] == b[j + low : j + middle]:
+            low = middle
+        else:
+            high = middle
+    return low
+
+
+def _backtrack(trace, a, b, alo, blo, x, y) -> list[tuple[int, int]]:
+    matches = []
+    for d in range(len(trace) - 1, -1, -1):
+        v = trace[d]
+        k = x - y
+        if d == 0:
+            prev_k = 0
+        elif k == -d or (k != d and v[k - 1 + d] < v[k + 1 + d]):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = v[prev_k + d] if d else 0
+        prev_y = prev_x - prev_k
+        if d:
+            start_x = prev_x if prev_k == k + 1 else prev_x + 1
+        else:
+            start_x = 0
+        while x > start_x:
+            x -= 1
+            y -= 1
+            matches.append((alo + x, blo + y))
+        x, y = prev_x, prev_y
+    return matches[::-1]
+
+
+def _gaps(matches, n, m):
+    i = j = 0
+    for mi, mj in matches + [(n, m)]:
+        if mi > i or mj > j:
+            yield i, mi, j, mj
+        i, j = mi + 1, mj + 1
+
+
+def _diff_hunk(minus_lines: list[str], plus_lines: list[str], budget) -> str:
+    minus, plus = "\n".join(minus_lines), "\n".join(plus_lines)
+    minus_pos = [i for i, ch in enumerate(minus) if ch != "\n"]
+    plus_pos = [i for i, ch in enumerate(plus) if ch != "\n"]
+    minus_words = [minus[i] for i in minus_pos]
+    plus_words = [plus[i] for i in plus_pos]
+
+    matches = _paired_matches(minus_lines, plus_lines, budget)
+    if matches is None:
+        size = len(minus_words) + len(plus_words)
+        if size < MIN_FILTERED_LENGTH or _similar_words(minus, plus):
+            matches = []
+            _common_affix_myers(
+                "".join(minus_words), "".join(plus_words), matches, budget
+            )
+        elif len(minus_lines) > 1 or len(plus_lines) > 1:
+            matches = _linewise_matches(minus_lines, plus_lines, budget)
+        else:
+            matches = []
+
+    out = []
+    current_plus = 0
+    for i0, i1, j0, j1 in _gaps(matches, len(minus_words), len(plus_words)):
+        if j1 > j0:
+            plus_begin, plus_end = plus_pos[j0], plus_pos[j1 - 1] + 1
+        else:
+            plus_begin = plus_end = plus_pos[j0 - 1] + 1 if j0 else 0
+        out.append(plus[current_plus:plus_begin])
+        if i1 > i0:
+            _write_marked(out, minus[minus_pos[i0] : minus_pos[i1 - 1] + 1], "[-", "-]")
+        if j1 > j0:
+            _write_marked(out, plus[plus_begin:plus_end], "{+", "+}")
+        current_plus = plus_end
+    out.append(plus[current_plus:])
+
+    return "".join(out)
+
+
+def _paired_matches(minus_lines, plus_lines, budget):
+    # Paragraphs edited in place replace each other one for one; diffing them
+    # in pairs keeps the cost proportional to each paragraph's own edit.
+    if len(minus_lines) != len(plus_lines) or len(minus_lines) < 2:
+        return None
+
+    for minus_line, plus_line in zip(minus_lines, plus_lines):
+        # At most the shorter line can match, so a pair whose lengths differ
+        # too much can never be similar enough.
+        total = len(minus_line) + len(plus_line)
+        if 2 * min(len(minus_line), len(plus_line)) < total * MIN_PAIR_SIMILARITY:
+            return None
+
+    matches = []
+    i = j = 0
+    for minus_line, plus_line in zip(minus_lines, plus_lines):
+        pair = []
+        _common_affix_myers(minus_line, plus_line, pair, budget)
+        total = len(minus_line) + len(plus_line)
+        if total - 2 * len(pair) > total * (1 - MIN_PAIR_SIMILARITY):
+            return None
+        matches.extend((i + mi, j + mj) for mi, mj in pair)
+        i += len(minus_line)
+        j += len(plus_line)
+    return matches
+
+
+def _linewise_matches(minus_lines, plus_lines, budget):
+    # Lines past the end of the shorter side are left unmatched.
+    matches = []
+    i = j = 0
+    for minus_line, plus_line in zip(minus_lines, plus_lines):
+        pair = _line_matches(minus_line, plus_line, budget)
+        matches.extend((i + mi, j + mj) for mi, mj in pair)
+        i += len(minus_line)
+        j += len(plus_line)
+    return matches
+
+
+def _line_matches(a, b, budget) -> list[tuple[int, int]]:
+    if len(a) + len(b) >= MIN_FILTERED_LENGTH and not _similar_words(a, b):
+        return []
+    matches = []
+    _common_affix_myers(a, b, matches, budget)
+    return matches
+
+
+def _similar_words(a, b) -> bool:
+    # The words two texts share bound how much a word diff could match, and
+    # counting them costs far less than diffing.
+    a_words, b_words = WORD.findall(a), WORD.findall(b)
+    total = len(a_words) + len(b_words)
+    if not total:
+        return True
+    shared = sum((Counter(a_words) & Counter(b_words)).values())
+    return 2 * shared >= total * MIN_PAIR_SIMILARITY
+
+
+def _common_affix_myers(a, b, matches, budget):
+    n, m = len(a), len(b)
+    start = 0
+    while start < n and start < m and a[start] == b[start]:
+        matches.append((start, start))
+        start += 1
+
+    end_a, end_b = n, m
+    while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+
+    if start < end_a and start < end_b:
+        size = (end_a - start) + (end_b - start)
+        if size <= MAX_EDIT_COST:
+            middle = _myers(a, b, start, end_a, start, end_b, budget)
+            if middle is None:
+                middle = _word_matches(a, b, start, end_a, start, end_b, budget)
+        else:
+            # Too long to risk a character diff that runs into the cap. The
+            # word diff's edits bound the character diff's, so it is only
+            # refined to characters when that is sure to fit under the cap.
+            middle = _word_matches(a, b, start, end_a, start, end_b, budget)
+            if size - 2 * len(middle) <= MAX_EDIT_COST:
+                middle = _myers(a, b, start, end_a, start, end_b, budget) or middle
+        matches.extend(middle)
+    matches.extend((end_a + k, end_b + k) for k in range(n - end_a))
+
+
+def _word_matches(a, b, alo, ahi, blo, bhi, budget) -> list[tuple[int, int]]:
+    # Diff word tokens instead of characters, then expand each matched token
+    # back into its matching characters.
+    ids = {}
+    a_tokens = [(t.start(), t.group()) for t in WORD_TOKEN.finditer(a, alo, ahi)]
+    b_tokens = [(t.start(), t.group()) for t in WORD_TOKEN.finditer(b, blo, bhi)]
+    a_ids = [ids.setdefault(text, len(ids)) for _, text in a_tokens]
+    b_ids = [ids.setdefault(text, len(ids)) for _, text in b_tokens]
+
+    matches = []
+    for ti, tj in _myers(a_ids, b_ids, 0, len(a_ids), 0, len(b_ids), budget) or []:
+        (i, text), (j, _) = a_tokens[ti], b_tokens[tj]
+        matches.extend((i + k, j + k) for k in range(len(text)))
+    return matches
+
+
+def _write_marked(out, text, prefix, suffix):
+    segments = text.split("\n")
+    out.append(
+        "\n".join(f"{prefix}{seg}{suffix}" if seg else "" for seg in segments)
+    )
+
+
+if __name__ == "__main__":
+    raise RuntimeError("This module should not be run directly.")
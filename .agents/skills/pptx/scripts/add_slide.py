@@ -23,27 +23,33 @@ import shutil
 import sys
 from pathlib import Path
 
+from office.validators.package_graph import (
+    CONTENT_TYPES_PART,
+    PackageGraph,
+    rels_part_name,
+)
+
+PRESENTATION_RELS_PART = "ppt/_rels/presentation.xml.rels"
 
-def get_next_slide_number(slides_dir: Path) -> int:
-    existing = [int(m.group(1)) for f in slides_dir.glob("slide*.xml")
-                if (m := re.match(r"slide(\d+)\.xml", f.name))]
-    return max(existing) + 1 if existing else 1
 
+def get_next_slide_number(package: PackageGraph) -> int:
+    existing = [int(m.group(1)) for part in package.glob("ppt/slides/slide*.xml")
+                if (m := re.match(r"slide(\d+)\.xml", Path(part).name))]
+    return max(existing) + 1 if existing else 1
 
-def create_slide_from_layout(unpacked_dir: Path, layout_file: str) -> None:
-    slides_dir = unpacked_dir / "ppt" / "slides"
-    rels_dir = slides_dir / "_rels"
-    layouts_dir = unpacked_dir / "ppt" / "slideLayouts"
 
-    layout_path = layouts_dir / layout_file
-    if not layout_path.exists():
-        print(f"Error: {layout_path} not found", file=sys.stderr)
+def create_slide_from_layout(package: PackageGraph, layout_file: str) -> None:
+    layout_part = f"ppt/slideLayouts/{layout_file}"
+    if layout_part not in package.parts:
+        print(f"Error: {package.path(layout_part)} not found", file=sys.stderr)
         sys.exit(1)
 
-    next_num = get_next_slide_number(slides_dir)
+    next_num = get_next_slide_number(package)
     dest = f"slide{next_num}.xml"
-    dest_slide = slides_dir / dest
-    dest_rels = rels_dir / f"{dest}.rels"
+    dest_part = f"ppt/slides/{dest}"
+    dest_rels_part = rels_part_name(dest_part)
+    dest_slide = package.path(dest_part)
+    dest_rels = package.path(dest_rels_part)
 
     slide_xml = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
 <p:sld xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main">
@@ -69,45 +75,46 @@ def create_slide_from_layout(unpacked_dir: Path, layout_file: str) -> None:
   </p:clrMapOvr>
 </p:sld>'''
     dest_slide.write_text(slide_xml, encoding="utf-8")
+    package.add_part(dest_part)
 
-    rels_dir.mkdir(exist_ok=True)
+    dest_rels.parent.mkdir(exist_ok=True)
     rels_xml = f'''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
 <Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
   <Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/slideLayout" Target="../slideLayouts/{layout_file}"/>
 </Relationships>'''
     dest_rels.write_text(rels_xml, encoding="utf-8")
+    package.add_part(dest_rels_part)
 
-    _add_to_content_types(unpacked_dir, dest)
+    _add_to_content_types(package, dest)
 
-    rid = _add_to_presentation_rels(unpacked_dir, dest)
+    rid = _add_to_presentation_rels(package, dest)
 
-    next_slide_id = _get_next_slide_id(unpacked_dir)
+    next_slide_id = _get_next_slide_id(package)
 
     print(f"Created {dest} from {layout_file}")
     print(f'Add to presentation.xml <p:sldIdLst>: <p:sldId id="{next_slide_id}" r:id="{rid}"/>')
 
 
-def duplicate_slide(unpacked_dir: Path, source: str) -> None:
-    slides_dir = unpacked_dir / "ppt" / "slides"
-    rels_dir = slides_dir / "_rels"
-
-    source_slide = slides_dir / source
-
-    if not source_slide.exists():
-        print(f"Error: {source_slide} not found", file=sys.stderr)
+def duplicate_slide(package: PackageGraph, source: str) -> None:
+    source_part = f"ppt/slides/{source}"
+    if source_part not in package.parts:
+        print(f"Error: {package.path(source_part)} not found", file=sys.stderr)
         sys.exit(1)
 
-    next_num = get_next_slide_number(slides_dir)
+    next_num = get_next_slide_number(package)
     dest = f"slide{next_num}.xml"
-    dest_slide = slides_dir / dest
+    dest_part = f"ppt/slides/{dest}"
+    dest_slide = package.path(dest_part)
 
-    source_rels = rels_dir / f"{source}.rels"
-    dest_rels = rels_dir / f"{dest}.rels"
+    source_rels_part = rels_part_name(source_part)
+    dest_rels_part = rels_part_name(dest_part)
+    dest_rels = package.path(dest_rels_part)
 
-    shutil.copy2(source_slide, dest_slide)
+    shutil.copy2(package.path(source_part), dest_slide)
+    package.add_part(dest_part)
 
-    if source_rels.exists():
-        shutil.copy2(source_rels, dest_rels)
+    if source_rels_part in package.parts:
+        shutil.copy2(package.path(source_rels_part), dest_rels)
 
         rels_content = dest_rels.read_text(encoding="utf-8")
         rels_content = re.sub(
@@ -116,48 +123,56 @@ def duplicate_slide(unpacked_dir: Path, source: str) -> None:
             rels_content,
         )
         dest_rels.write_text(rels_content, encoding="utf-8")
+        package.add_part(dest_rels_part)
 
-    _add_to_content_types(unpacked_dir, dest)
+    _add_to_content_types(package, dest)
 
-    rid = _add_to_presentation_rels(unpacked_dir, dest)
+    rid = _add_to_presentation_rels(package, dest)
 
-    next_slide_id = _get_next_slide_id(unpacked_dir)
+    next_slide_id = _get_next_slide_id(package)
 
     print(f"Created {dest} from {source}")
     print(f'Add to presentation.xml <p:sldIdLst>: <p:sldId id="{next_slide_id}" r:id="{rid}"/>')
 
 
-def _add_to_content_types(unpacked_dir: Path, dest: str) -> None:
-    content_types_path = unpacked_dir / "[Content_Types].xml"
+def _add_to_content_types(package: PackageGraph, dest: str) -> None:
+    if f"ppt/slides/{dest}" in package.content_types().overrides:
+        return
+
+    content_types_path = package.path(CONTENT_TYPES_PART)
     content_types = content_types_path.read_text(encoding="utf-8")
 
     new_override = f'<Override PartName="/ppt/slides/{dest}" ContentType="application/vnd.openxmlformats-officedocument.presentationml.slide+xml"/>'
 
-    if f"/ppt/slides/{dest}" not in content_types:
-        content_types = content_types.replace("</Types>", f"  {new_override}\n</Types>")
-        content_types_path.write_text(content_types, encoding="utf-8")
+    content_types = content_types.replace("</Types>", f"  {new_override}\n</Types>")
+    content_types_path.write_text(content_types, encoding="utf-8")
+    package.add_part(CONTENT_TYPES_PART)
 
 
-def _add_to_presentation_rels(unpacked_dir: Path, dest: str) -> str:
-    pres_rels_path = unpacked_dir / "ppt" / "_rels" / "presentation.xml.rels"
-    pres_rels = pres_rels_path.read_text(encoding="utf-8")
+def _add_to_presentation_rels(package: PackageGraph, dest: str) -> str:
+    relationships = package.relationships(PRESENTATION_RELS_PART)
+    for rel in relationships:
+        if rel.part == f"ppt/slides/{dest}":
+            return rel.id
 
-    rids = [int(m) for m in re.findall(r'Id="rId(\d+)"', pres_rels)]
+    rids = [int(m.group(1)) for rel in relationships
+            if (m := re.fullmatch(r"rId(\d+)", rel.id or ""))]
     next_rid = max(rids) + 1 if rids else 1
     rid = f"rId{next_rid}"
 
     new_rel = f'<Relationship Id="{rid}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/slide" Target="slides/{dest}"/>'
 
-    if f"slides/{dest}" not in pres_rels:
-        pres_rels = pres_rels.replace("</Relationships>", f"  {new_rel}\n</Relationships>")
-        pres_rels_path.write_text(pres_rels, encoding="utf-8")
+    pres_rels_path = package.path(PRESENTATION_RELS_PART)
+    pres_rels = pres_rels_path.read_text(encoding="utf-8")
+    pres_rels = pres_rels.replace("</Relationships>", f"  {new_rel}\n</Relationships>")
+    pres_rels_path.write_text(pres_rels, encoding="utf-8")
+    package.add_part(PRESENTATION_RELS_PART)
 
     return rid
 
 
-def _get_next_slide_id(unpacked_dir: Path) -> int:
-    pres_path = unpacked_dir / "ppt" / "presentation.xml"
-    pres_content = pres_path.read_text(encoding="utf-8")
+def _get_next_slide_id(package: PackageGraph) -> int:
+    pres_content = package.path("ppt/presentation.xml").read_text(encoding="utf-8")
     slide_ids = [int(m) for m in re.findall(r'<p:sldId[^>]*id="(\d+)"', pres_content)]
     return max(slide_ids) + 1 if slide_ids else 256
 
@@ -187,9 +202,10 @@ if __name__ == "__main__":
         print(f"Error: {unpacked_dir} not found", file=sys.stderr)
         sys.exit(1)
 
+    package = PackageGraph(unpacked_dir)
     source_type, layout_file = parse_source(source)
 
     if source_type == "layout" and layout_file is not None:
-        create_slide_from_layout(unpacked_dir, layout_file)
+        create_slide_from_layout(package, layout_file)
     else:
-        duplicate_slide(unpacked_dir, source)
+        duplicate_slide(package, source)
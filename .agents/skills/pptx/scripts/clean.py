@@ -15,60 +15,59 @@ This script removes:
 - Content-Type overrides for deleted files
 """
 
+import re
 import sys
 from pathlib import Path
 
 import defusedxml.minidom
 
+from office.validators.package_graph import (
+    CONTENT_TYPES_PART,
+    PackageGraph,
+    rels_part_name,
+    source_part_name,
+)
 
-import re
+PRESENTATION_PART = "ppt/presentation.xml"
 
 
-def get_slides_in_sldidlst(unpacked_dir: Path) -> set[str]:
-    pres_path = unpacked_dir / "ppt" / "presentation.xml"
-    pres_rels_path = unpacked_dir / "ppt" / "_rels" / "presentation.xml.rels"
+def get_slides_in_sldidlst(package: PackageGraph) -> set[str]:
+    pres_rels_part = rels_part_name(PRESENTATION_PART)
 
-    if not pres_path.exists() or not pres_rels_path.exists():
+    if PRESENTATION_PART not in package.parts or pres_rels_part not in package.parts:
         return set()
 
-    rels_dom = defusedxml.minidom.parse(str(pres_rels_path))
     rid_to_slide = {}
-    for rel in rels_dom.getElementsByTagName("Relationship"):
-        rid = rel.getAttribute("Id")
-        target = rel.getAttribute("Target")
-        rel_type = rel.getAttribute("Type")
-        if "slide" in rel_type and target.startswith("slides/"):
-            rid_to_slide[rid] = target.replace("slides/", "")
-
-    pres_content = pres_path.read_text(encoding="utf-8")
+    for rel in package.relationships(pres_rels_part):
+        if "slide" in rel.type and (rel.target or "").startswith("slides/"):
+            rid_to_slide[rel.id] = rel.target.replace("slides/", "")
+
+    pres_content = package.path(PRESENTATION_PART).read_text(encoding="utf-8")
     referenced_rids = set(re.findall(r'<p:sldId[^>]*r:id="([^"]+)"', pres_content))
 
     return {rid_to_slide[rid] for rid in referenced_rids if rid in rid_to_slide}
 
 
-def remove_orphaned_slides(unpacked_dir: Path) -> list[str]:
-    slides_dir = unpacked_dir / "ppt" / "slides"
-    slides_rels_dir = slides_dir / "_rels"
-    pres_rels_path = unpacked_dir / "ppt" / "_rels" / "presentation.xml.rels"
+def remove_orphaned_slides(package: PackageGraph) -> list[str]:
+    pres_rels_part = rels_part_name(PRESENTATION_PART)
 
-    if not slides_dir.exists():
+    slides = package.glob("ppt/slides/slide*.xml")
+    if not slides:
         return []
 
-    referenced_slides = get_slides_in_sldidlst(unpacked_dir)
+    referenced_slides = get_slides_in_sldidlst(package)
     removed = []
 
-    for slide_file in slides_dir.glob("slide*.xml"):
-        if slide_file.name not in referenced_slides:
-            rel_path = slide_file.relative_to(unpacked_dir)
-            slide_file.unlink()
-            removed.append(str(rel_path))
+    for slide in slides:
+        if Path(slide).name not in referenced_slides:
+            _remove_part(package, slide, removed)
 
-            rels_file = slides_rels_dir / f"{slide_file.name}.rels"
-            if rels_file.exists():
-                rels_file.unlink()
-                removed.append(str(rels_file.relative_to(unpacked_dir)))
+            rels_part = rels_part_name(slide)
+            if rels_part in package.parts:
+                _remove_part(package, rels_part, removed)
 
-    if removed and pres_rels_path.exists():
+    if removed and pres_rels_part in package.parts:
+        pres_rels_path = package.path(pres_rels_part)
         rels_dom = defusedxml.minidom.parse(str(pres_rels_path))
         changed = False
 
@@ -84,173 +83,122 @@ def remove_orphaned_slides(unpacked_dir: Path) -> list[str]:
         if changed:
             with open(pres_rels_path, "wb") as f:
                 f.write(rels_dom.toxml(encoding="utf-8"))
+            package.add_part(pres_rels_part)
 
     return removed
 
 
-def remove_trash_directory(unpacked_dir: Path) -> list[str]:
-    trash_dir = unpacked_dir / "[trash]"
+def remove_trash_directory(package: PackageGraph) -> list[str]:
+    trash_dir = package.unpacked_dir / "[trash]"
     removed = []
 
     if trash_dir.exists() and trash_dir.is_dir():
         for file_path in trash_dir.iterdir():
             if file_path.is_file():
-                rel_path = file_path.relative_to(unpacked_dir)
-                removed.append(str(rel_path))
-                file_path.unlink()
+                _remove_part(package, package.part_name(file_path), removed)
         trash_dir.rmdir()
 
     return removed
 
 
-def get_slide_referenced_files(unpacked_dir: Path) -> set:
+def get_slide_referenced_files(package: PackageGraph) -> set[str]:
     referenced = set()
-    slides_rels_dir = unpacked_dir / "ppt" / "slides" / "_rels"
 
-    if not slides_rels_dir.exists():
-        return referenced
-
-    for rels_file in slides_rels_dir.glob("*.rels"):
-        dom = defusedxml.minidom.parse(str(rels_file))
-        for rel in dom.getElementsByTagName("Relationship"):
-            target = rel.getAttribute("Target")
-            if not target:
-                continue
-            target_path = (rels_file.parent.parent / target).resolve()
-            try:
-                referenced.add(target_path.relative_to(unpacked_dir.resolve()))
-            except ValueError:
-                pass
+    for rels_part in package.glob("ppt/slides/_rels/*.rels"):
+        for rel in package.relationships(rels_part):
+            if rel.part is not None:
+                referenced.add(rel.part)
 
     return referenced
 
 
-def remove_orphaned_rels_files(unpacked_dir: Path) -> list[str]:
+def remove_orphaned_rels_files(package: PackageGraph) -> list[str]:
     resource_dirs = ["charts", "diagrams", "drawings"]
     removed = []
-    slide_referenced = get_slide_referenced_files(unpacked_dir)
+    slide_referenced = get_slide_referenced_files(package)
 
     for dir_name in resource_dirs:
-        rels_dir = unpacked_dir / "ppt" / dir_name / "_rels"
-        if not rels_dir.exists():
-            continue
-
-        for rels_file in rels_dir.glob("*.rels"):
-            resource_file = rels_dir.parent / rels_file.name.replace(".rels", "")
-            try:
-                resource_rel_path = resource_file.resolve().relative_to(unpacked_dir.resolve())
-            except ValueError:
-                continue
-
-            if not resource_file.exists() or resource_rel_path not in slide_referenced:
-                rels_file.unlink()
-                rel_path = rels_file.relative_to(unpacked_dir)
-                removed.append(str(rel_path))
+        for rels_part in package.glob(f"ppt/{dir_name}/_rels/*.rels"):
+            resource = source_part_name(rels_part)
+            if resource not in package.parts or resource not in slide_referenced:
+                _remove_part(package, rels_part, removed)
 
     return removed
 
 
-def get_referenced_files(unpacked_dir: Path) -> set:
-    referenced = set()
-
-    for rels_file in unpacked_dir.rglob("*.rels"):
-        dom = defusedxml.minidom.parse(str(rels_file))
-        for rel in dom.getElementsByTagName("Relationship"):
-            target = rel.getAttribute("Target")
-            if not target:
-                continue
-            target_path = (rels_file.parent.parent / target).resolve()
-            try:
-                referenced.add(target_path.relative_to(unpacked_dir.resolve()))
-            except ValueError:
-                pass
+def get_referenced_files(package: PackageGraph) -> set[str]:
+    return package.referenced_parts()
 
-    return referenced
 
-
-def remove_orphaned_files(unpacked_dir: Path, referenced: set) -> list[str]:
+def remove_orphaned_files(package: PackageGraph, referenced: set) -> list[str]:
     resource_dirs = ["media", "embeddings", "charts", "diagrams", "tags", "drawings", "ink"]
     removed = []
 
     for dir_name in resource_dirs:
-        dir_path = unpacked_dir / "ppt" / dir_name
-        if not dir_path.exists():
-            continue
-
-        for file_path in dir_path.glob("*"):
-            if not file_path.is_file():
-                continue
-            rel_path = file_path.relative_to(unpacked_dir)
-            if rel_path not in referenced:
-                file_path.unlink()
-                removed.append(str(rel_path))
-
-    theme_dir = unpacked_dir / "ppt" / "theme"
-    if theme_dir.exists():
-        for file_path in theme_dir.glob("theme*.xml"):
-            rel_path = file_path.relative_to(unpacked_dir)
-            if rel_path not in referenced:
-                file_path.unlink()
-                removed.append(str(rel_path))
-                theme_rels = theme_dir / "_rels" / f"{file_path.name}.rels"
-                if theme_rels.exists():
-                    theme_rels.unlink()
-                    removed.append(str(theme_rels.relative_to(unpacked_dir)))
-
-    notes_dir = unpacked_dir / "ppt" / "notesSlides"
-    if notes_dir.exists():
-        for file_path in notes_dir.glob("*.xml"):
-            if not file_path.is_file():
-                continue
-            rel_path = file_path.relative_to(unpacked_dir)
-            if rel_path not in referenced:
-                file_path.unlink()
-                removed.append(str(rel_path))
-
-        notes_rels_dir = notes_dir / "_rels"
-        if notes_rels_dir.exists():
-            for file_path in notes_rels_dir.glob("*.rels"):
-                notes_file = notes_dir / file_path.name.replace(".rels", "")
-                if not notes_file.exists():
-                    file_path.unlink()
-                    removed.append(str(file_path.relative_to(unpacked_dir)))
+        for part in package.glob(f"ppt/{dir_name}/*"):
+            if part not in referenced:
+                _remove_part(package, part, removed)
+
+    for part in package.glob("ppt/theme/theme*.xml"):
+        if part not in referenced:
+            _remove_part(package, part, removed)
+            theme_rels = rels_part_name(part)
+            if theme_rels in package.parts:
+                _remove_part(package, theme_rels, removed)
+
+    for part in package.glob("ppt/notesSlides/*.xml"):
+        if part not in referenced:
+            _remove_part(package, part, removed)
+
+    for rels_part in package.glob("ppt/notesSlides/_rels/*.rels"):
+        if source_part_name(rels_part) not in package.parts:
+            _remove_part(package, rels_part, removed)
 
     return removed
 
 
-def update_content_types(unpacked_dir: Path, removed_files: list[str]) -> None:
-    ct_path = unpacked_dir / "[Content_Types].xml"
-    if not ct_path.exists():
+def _remove_part(package: PackageGraph, part: str, removed: list[str]) -> None:
+    package.path(part).unlink()
+    package.remove_part(part)
+    removed.append(part)
+
+
+def update_content_types(package: PackageGraph, removed_files: list[str]) -> None:
+    if CONTENT_TYPES_PART not in package.parts:
+        return
+
+    overrides = package.content_types().overrides
+    if not any(part in overrides for part in removed_files):
         return
 
+    ct_path = package.path(CONTENT_TYPES_PART)
     dom = defusedxml.minidom.parse(str(ct_path))
-    changed = False
 
     for override in list(dom.getElementsByTagName("Override")):
         part_name = override.getAttribute("PartName").lstrip("/")
         if part_name in removed_files:
             if override.parentNode:
                 override.parentNode.removeChild(override)
-                changed = True
 
-    if changed:
-        with open(ct_path, "wb") as f:
-            f.write(dom.toxml(encoding="utf-8"))
+    with open(ct_path, "wb") as f:
+        f.write(dom.toxml(encoding="utf-8"))
+    package.add_part(CONTENT_TYPES_PART)
 
 
 def clean_unused_files(unpacked_dir: Path) -> list[str]:
+    package = PackageGraph(unpacked_dir)
     all_removed = []
 
-    slides_removed = remove_orphaned_slides(unpacked_dir)
+    slides_removed = remove_orphaned_slides(package)
     all_removed.extend(slides_removed)
 
-    trash_removed = remove_trash_directory(unpacked_dir)
+    trash_removed = remove_trash_directory(package)
     all_removed.extend(trash_removed)
 
     while True:
-        removed_rels = remove_orphaned_rels_files(unpacked_dir)
-        referenced = get_referenced_files(unpacked_dir)
-        removed_files = remove_orphaned_files(unpacked_dir, referenced)
+        removed_rels = remove_orphaned_rels_files(package)
+        referenced = get_referenced_files(package)
+        removed_files = remove_orphaned_files(package, referenced)
 
         total_removed = removed_rels + removed_files
         if not total_removed:
@@ -259,7 +207,7 @@ def clean_unused_files(unpacked_dir: Path) -> list[str]:
         all_removed.extend(total_removed)
 
     if all_removed:
-        update_content_types(unpacked_dir, all_removed)
+        update_content_types(package, all_removed)
 
     return all_removed
 
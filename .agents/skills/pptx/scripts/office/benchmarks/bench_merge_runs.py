@@ -0,0 +1,50 @@
+"""
+Benchmark merge_runs throughput in runs per second.
+
+Builds a synthetic document.xml with 100k runs (pairs of plain and bold
+runs, so half of them merge) and times merge_runs on it.
+
+Usage:
+    python bench_merge_runs.py [--runs 100000] [--repeat 3]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from helpers.merge_runs import merge_runs
+from synthetic import write_docx
+
+RUNS_PER_PARAGRAPH = 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark merge_runs throughput")
+    parser.add_argument("--runs", type=int, default=100_000, help="Runs (default: 100000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs (default: 3)")
+    args = parser.parse_args()
+
+    paragraphs = max(1, args.runs // RUNS_PER_PARAGRAPH)
+    runs = paragraphs * RUNS_PER_PARAGRAPH
+    best = None
+    for _ in range(args.repeat):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            unpacked_dir = write_docx(temp_dir, paragraphs, RUNS_PER_PARAGRAPH)
+            start = time.perf_counter()
+            merged, message = merge_runs(str(unpacked_dir))
+            elapsed = time.perf_counter() - start
+        if message.startswith("Error"):
+            print(message)
+            sys.exit(1)
+        best = elapsed if best is None else min(best, elapsed)
+
+    print(f"Runs: {runs} ({merged} merged)")
+    print(f"  merge_runs: {best:.2f}s, {runs / best:,.0f} runs/sec")
+
+
+if __name__ == "__main__":
+    main()
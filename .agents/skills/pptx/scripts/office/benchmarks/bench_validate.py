@@ -0,0 +1,59 @@
+"""
+Benchmark the per-part XSD pass serially and with --jobs N.
+
+Builds a synthetic DOCX package with one document part and 500 header parts,
+each holding 300 paragraphs, runs validate_against_xsd with jobs=1 and with
+jobs=N on full re-validation, and checks that both print the same output.
+
+Usage:
+    python bench_validate.py [--parts 500] [--paragraphs 300] [--jobs 4]
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from synthetic import write_docx
+from validators import DOCXSchemaValidator
+
+
+def run(unpacked_dir: Path, jobs: int) -> tuple[float, str]:
+    validator = DOCXSchemaValidator(unpacked_dir, verbose=True, jobs=jobs, full=True)
+    output = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        validator.validate_against_xsd()
+    return time.perf_counter() - start, output.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parallel XSD validation")
+    parser.add_argument("--parts", type=int, default=500, help="Header parts (default: 500)")
+    parser.add_argument(
+        "--paragraphs", type=int, default=300, help="Paragraphs per part (default: 300)"
+    )
+    parser.add_argument("--jobs", type=int, default=4, help="Parallel jobs (default: 4)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        unpacked_dir = write_docx(temp_dir, args.paragraphs, headers=args.parts)
+        serial_time, serial_output = run(unpacked_dir, 1)
+        parallel_time, parallel_output = run(unpacked_dir, args.jobs)
+
+    print(f"Parts: {args.parts + 1} x {args.paragraphs} paragraphs")
+    print(f"  --jobs 1: {serial_time:.2f}s")
+    print(f"  --jobs {args.jobs}: {parallel_time:.2f}s ({serial_time / parallel_time:.2f}x)")
+    if serial_output != parallel_output:
+        print("FAILED - Parallel output differs from serial output")
+        sys.exit(1)
+    print("PASSED - Identical output")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Synthetic unpacked packages for the benchmark scripts in this directory.
+
+Each function writes a minimal but schema-valid package into an empty
+directory and returns its path.
+"""
+
+from pathlib import Path
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+P_NS = "http://schemas.openxmlformats.org/presentationml/2006/main"
+A_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_RELS_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+CT_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+REL_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+WML = "application/vnd.openxmlformats-officedocument.wordprocessingml"
+PML = "application/vnd.openxmlformats-officedocument.presentationml"
+
+
+def paragraph(index: int, runs: int = 1) -> str:
+    # Runs alternate between plain and bold, two of each in a row, so
+    # merge_runs has both runs to merge and runs to keep apart.
+    parts = []
+    for run in range(runs):
+        rpr = "<w:rPr><w:b/></w:rPr>" if (run // 2) % 2 else ""
+        parts.append(f"<w:r>{rpr}<w:t xml:space=\"preserve\">p{index}r{run} </w:t></w:r>")
+    return f"<w:p>{''.join(parts)}</w:p>"
+
+
+def write_docx(
+    directory, paragraphs: int = 300, runs_per_paragraph: int = 1, headers: int = 0
+) -> Path:
+    """
+    Write a DOCX package with one document part and optional header parts,
+    each holding the same number of paragraphs.
+    """
+    directory = Path(directory)
+    body = "".join(paragraph(i, runs_per_paragraph) for i in range(paragraphs))
+
+    overrides = [
+        f'<Override PartName="/word/document.xml" ContentType="{WML}.document.main+xml"/>'
+    ]
+    relationships = []
+    for i in range(1, headers + 1):
+        _write(
+            directory / "word" / f"header{i}.xml",
+            f'<w:hdr xmlns:w="{W_NS}">{body}</w:hdr>',
+        )
+        overrides.append(
+            f'<Override PartName="/word/header{i}.xml" ContentType="{WML}.header+xml"/>'
+        )
+        relationships.append(
+            f'<Relationship Id="rId{i}" Type="{REL_TYPE}/header" Target="header{i}.xml"/>'
+        )
+
+    _write(
+        directory / "word" / "document.xml",
+        f'<w:document xmlns:w="{W_NS}" xmlns:r="{R_NS}"><w:body>{body}</w:body></w:document>',
+    )
+    _write(
+        directory / "word" / "_rels" / "document.xml.rels",
+        f'<Relationships xmlns="{PKG_RELS_NS}">{"".join(relationships)}</Relationships>',
+    )
+    _write_package_parts(directory, "word/document.xml", overrides)
+    return directory
+
+
+def write_pptx_slide(directory, shapes: int = 10000) -> Path:
+    """Write a PPTX package with one slide holding the given number of shapes."""
+    directory = Path(directory)
+    shape_xml = "".join(
+        f'<p:sp><p:nvSpPr><p:cNvPr id="{i + 2}" name="Shape {i}"/><p:cNvSpPr/><p:nvPr/>'
+        f'</p:nvSpPr><p:spPr><a:xfrm><a:off x="{i * 10}" y="0"/><a:ext cx="100" cy="100"/>'
+        f'</a:xfrm></p:spPr></p:sp>'
+        for i in range(shapes)
+    )
+    _write(
+        directory / "ppt" / "slides" / "slide1.xml",
+        f'<p:sld xmlns:p="{P_NS}" xmlns:a="{A_NS}" xmlns:r="{R_NS}"><p:cSld><p:spTree>'
+        '<p:nvGrpSpPr><p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/></p:nvGrpSpPr>'
+        f"<p:grpSpPr/>{shape_xml}</p:spTree></p:cSld></p:sld>",
+    )
+    _write(
+        directory / "ppt" / "presentation.xml",
+        f'<p:presentation xmlns:p="{P_NS}" xmlns:r="{R_NS}"><p:sldIdLst>'
+        '<p:sldId id="256" r:id="rId1"/></p:sldIdLst>'
+        '<p:sldSz cx="9144000" cy="6858000"/><p:notesSz cx="6858000" cy="9144000"/>'
+        "</p:presentation>",
+    )
+    _write(
+        directory / "ppt" / "_rels" / "presentation.xml.rels",
+        f'<Relationships xmlns="{PKG_RELS_NS}">'
+        f'<Relationship Id="rId1" Type="{REL_TYPE}/slide" Target="slides/slide1.xml"/>'
+        "</Relationships>",
+    )
+    _write_package_parts(
+        directory,
+        "ppt/presentation.xml",
+        [
+            f'<Override PartName="/ppt/presentation.xml" '
+            f'ContentType="{PML}.presentation.main+xml"/>',
+            f'<Override PartName="/ppt/slides/slide1.xml" ContentType="{PML}.slide+xml"/>',
+        ],
+    )
+    return directory
+
+
+def _write_package_parts(directory, main_part, overrides):
+    _write(
+        directory / "[Content_Types].xml",
+        f'<Types xmlns="{CT_NS}">'
+        '<Default Extension="rels" '
+        'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        f'{"".join(overrides)}</Types>',
+    )
+    _write(
+        directory / "_rels" / ".rels",
+        f'<Relationships xmlns="{PKG_RELS_NS}">'
+        f'<Relationship Id="rId1" Type="{REL_TYPE}/officeDocument" Target="{main_part}"/>'
+        "</Relationships>",
+    )
+
+
+def _write(path, xml):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n' + xml, encoding="utf-8"
+    )
+
+
+if __name__ == "__main__":
+    raise RuntimeError("This module should not be run directly.")
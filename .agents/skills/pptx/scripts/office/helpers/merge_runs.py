@@ -1,16 +1,30 @@
 """Merge adjacent runs with identical formatting in DOCX.
 
 Merges adjacent <w:r> elements that have identical <w:rPr> properties.
-Works on runs in paragraphs and inside tracked changes (<w:ins>, <w:del>).
+Works on runs in paragraphs and inside tracked changes (<w:ins>, <w:del>),
+in the main document, headers, footers, footnotes and endnotes.
+
+Each part is processed in one pass: every run's <w:rPr> is reduced to a
+canonical key once (attribute order, whitespace and comments ignored), and
+each run is compared only with the run before it.
 
 Also:
 - Removes rsid attributes from runs (revision metadata that doesn't affect rendering)
 - Removes proofErr elements (spell/grammar markers that block merging)
 """
 
-from pathlib import Path
+from fnmatch import fnmatch
+from pathlib import Path, PurePosixPath
+
+from .xml_io import (
+    XML_NAMESPACE,
+    is_element,
+    local_name,
+    parse_xml,
+    remove_element,
+)
 
-import defusedxml.minidom
+STORY_PART_PATTERNS = ["header*.xml", "footer*.xml", "footnotes.xml", "endnotes.xml"]
 
 
 def merge_runs(input_dir: str) -> tuple[int, str]:
@@ -20,180 +34,158 @@ def merge_runs(input_dir: str) -> tuple[int, str]:
         return 0, f"Error: {doc_xml} not found"
 
     try:
-        dom = defusedxml.minidom.parseString(doc_xml.read_text(encoding="utf-8"))
-        root = dom.documentElement
-
-        _remove_elements(root, "proofErr")
-        _strip_run_rsid_attrs(root)
-
-        containers = {run.parentNode for run in _find_elements(root, "r")}
+        parts = [doc_xml] + sorted(
+            part
+            for pattern in STORY_PART_PATTERNS
+            for part in doc_xml.parent.glob(pattern)
+        )
 
         merge_count = 0
-        for container in containers:
-            merge_count += _merge_runs_in(container)
+        for part in parts:
+            doc = parse_xml(part)
+            merge_count += merge_runs_in_part(doc)
+            part.write_bytes(doc.to_xml(encoding="UTF-8"))
 
-        doc_xml.write_bytes(dom.toxml(encoding="UTF-8"))
         return merge_count, f"Merged {merge_count} runs"
 
     except Exception as e:
         return 0, f"Error: {e}"
 
 
+def is_story_part(part_name: str) -> bool:
+    path = PurePosixPath(part_name)
+    if path.parent != PurePosixPath("word"):
+        return False
+    return path.name == "document.xml" or any(
+        fnmatch(path.name, pattern) for pattern in STORY_PART_PATTERNS
+    )
+
+
+def merge_runs_in_part(doc) -> int:
+    proof_errors = []
+    containers = {}
+    for elem in doc.root.iter():
+        if not is_element(elem):
+            continue
+        name = local_name(elem)
+        if name == "proofErr":
+            proof_errors.append(elem)
+        elif name == "r":
+            _strip_rsid_attrs(elem)
+            containers[elem.getparent()] = None
+
+    for elem in proof_errors:
+        remove_element(elem)
 
+    merge_count = 0
+    for container in containers:
+        merge_count += _merge_runs_in(container)
 
-def _find_elements(root, tag: str) -> list:
-    results = []
+    return merge_count
 
-    def traverse(node):
-        if node.nodeType == node.ELEMENT_NODE:
-            name = node.localName or node.tagName
-            if name == tag or name.endswith(f":{tag}"):
-                results.append(node)
-            for child in node.childNodes:
-                traverse(child)
 
-    traverse(root)
-    return results
+def _strip_rsid_attrs(run):
+    for attr in list(run.attrib):
+        if "rsid" in attr.lower():
+            del run.attrib[attr]
 
 
 def _get_child(parent, tag: str):
-    for child in parent.childNodes:
-        if child.nodeType == child.ELEMENT_NODE:
-            name = child.localName or child.tagName
-            if name == tag or name.endswith(f":{tag}"):
-                return child
+    for child in parent:
+        if is_element(child) and local_name(child) == tag:
+            return child
     return None
 
 
 def _get_children(parent, tag: str) -> list:
-    results = []
-    for child in parent.childNodes:
-        if child.nodeType == child.ELEMENT_NODE:
-            name = child.localName or child.tagName
-            if name == tag or name.endswith(f":{tag}"):
-                results.append(child)
-    return results
+    return [
+        child for child in parent if is_element(child) and local_name(child) == tag
+    ]
 
 
 def _is_adjacent(elem1, elem2) -> bool:
-    node = elem1.nextSibling
-    while node:
-        if node == elem2:
+    if elem1.tail and elem1.tail.strip():
+        return False
+    node = elem1.getnext()
+    while node is not None:
+        if node is elem2:
             return True
-        if node.nodeType == node.ELEMENT_NODE:
+        if is_element(node):
             return False
-        if node.nodeType == node.TEXT_NODE and node.data.strip():
+        if node.tail and node.tail.strip():
             return False
-        node = node.nextSibling
+        node = node.getnext()
     return False
 
 
-
-
-def _remove_elements(root, tag: str):
-    for elem in _find_elements(root, tag):
-        if elem.parentNode:
-            elem.parentNode.removeChild(elem)
-
-
-def _strip_run_rsid_attrs(root):
-    for run in _find_elements(root, "r"):
-        for attr in list(run.attributes.values()):
-            if "rsid" in attr.name.lower():
-                run.removeAttribute(attr.name)
-
-
-
-
 def _merge_runs_in(container) -> int:
     merge_count = 0
-    run = _first_child_run(container)
-
-    while run:
-        while True:
-            next_elem = _next_element_sibling(run)
-            if next_elem and _is_run(next_elem) and _can_merge(run, next_elem):
-                _merge_run_content(run, next_elem)
-                container.removeChild(next_elem)
-                merge_count += 1
-            else:
-                break
-
-        _consolidate_text(run)
-        run = _next_sibling_run(run)
-
-    return merge_count
+    anchor = None
+    anchor_key = None
 
+    for child in list(container):
+        if not is_element(child):
+            continue
 
-def _first_child_run(container):
-    for child in container.childNodes:
-        if child.nodeType == child.ELEMENT_NODE and _is_run(child):
-            return child
-    return None
+        if local_name(child) != "r":
+            if anchor is not None:
+                _consolidate_text(anchor)
+            anchor = None
+            continue
 
+        key = _format_key(child)
+        if anchor is not None and key == anchor_key:
+            _merge_run_content(anchor, child)
+            remove_element(child)
+            merge_count += 1
+            continue
 
-def _next_element_sibling(node):
-    sibling = node.nextSibling
-    while sibling:
-        if sibling.nodeType == sibling.ELEMENT_NODE:
-            return sibling
-        sibling = sibling.nextSibling
-    return None
+        if anchor is not None:
+            _consolidate_text(anchor)
+        anchor, anchor_key = child, key
 
+    if anchor is not None:
+        _consolidate_text(anchor)
 
-def _next_sibling_run(node):
-    sibling = node.nextSibling
-    while sibling:
-        if sibling.nodeType == sibling.ELEMENT_NODE:
-            if _is_run(sibling):
-                return sibling
-        sibling = sibling.nextSibling
-    return None
-
-
-def _is_run(node) -> bool:
-    name = node.localName or node.tagName
-    return name == "r" or name.endswith(":r")
-
+    return merge_count
 
-def _can_merge(run1, run2) -> bool:
-    rpr1 = _get_child(run1, "rPr")
-    rpr2 = _get_child(run2, "rPr")
 
-    if (rpr1 is None) != (rpr2 is None):
-        return False
-    if rpr1 is None:
-        return True
-    return rpr1.toxml() == rpr2.toxml()  
+def _format_key(run):
+    rpr = _get_child(run, "rPr")
+    if rpr is None:
+        return None
+    return tuple(
+        (
+            node.tag,
+            tuple(sorted(node.attrib.items())),
+            node.text.strip() if node.text else "",
+        )
+        for node in rpr.iter()
+        if is_element(node)
+    )
 
 
 def _merge_run_content(target, source):
-    for child in list(source.childNodes):
-        if child.nodeType == child.ELEMENT_NODE:
-            name = child.localName or child.tagName
-            if name != "rPr" and not name.endswith(":rPr"):
-                target.appendChild(child)
+    for child in list(source):
+        if is_element(child) and local_name(child) != "rPr":
+            target.append(child)
+            child.tail = None
 
 
 def _consolidate_text(run):
     t_elements = _get_children(run, "t")
+    xml_space = f"{{{XML_NAMESPACE}}}space"
 
     for i in range(len(t_elements) - 1, 0, -1):
         curr, prev = t_elements[i], t_elements[i - 1]
 
         if _is_adjacent(prev, curr):
-            prev_text = prev.firstChild.data if prev.firstChild else ""
-            curr_text = curr.firstChild.data if curr.firstChild else ""
-            merged = prev_text + curr_text
-
-            if prev.firstChild:
-                prev.firstChild.data = merged
-            else:
-                prev.appendChild(run.ownerDocument.createTextNode(merged))
+            merged = (prev.text or "") + (curr.text or "")
+            prev.text = merged
 
             if merged.startswith(" ") or merged.endswith(" "):
-                prev.setAttribute("xml:space", "preserve")
-            elif prev.hasAttribute("xml:space"):
-                prev.removeAttribute("xml:space")
+                prev.set(xml_space, "preserve")
+            elif xml_space in prev.attrib:
+                del prev.attrib[xml_space]
 
-            run.removeChild(curr)
+            remove_element(curr)
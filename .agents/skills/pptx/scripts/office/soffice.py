@@ -3,6 +3,11 @@ Helper for running LibreOffice (soffice) in environments where AF_UNIX
 sockets may be blocked (e.g., sandboxed VMs).  Detects the restriction
 at runtime and applies an LD_PRELOAD shim if needed.
 
+Also manages a pool of long-lived headless soffice instances driven over a
+UNO socket, so batches of conversions reuse warm instances instead of paying
+a cold start per document.  The pool needs the `uno` Python module (e.g. the
+python3-uno package); callers fall back to run_soffice when it is missing.
+
 Usage:
     from office.soffice import run_soffice, get_soffice_env
 
@@ -12,14 +17,30 @@ Usage:
     # Option 2 – get env dict for your own subprocess calls
     env = get_soffice_env()
     subprocess.run(["soffice", ...], env=env)
+
+    # Option 3 – run a job on a warm instance: job(session, *args)
+    from office.soffice import get_pool, uno_available
+    if uno_available():
+        get_pool().run(job, "input.docx", timeout=60)
+
+The pool size defaults to SOFFICE_POOL_SIZE (1 if unset; 0 disables the pool).
 """
 
+import atexit
 import os
+import queue
+import shutil
 import socket
 import subprocess
 import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+DEFAULT_STARTUP_TIMEOUT = 60
+DEFAULT_JOB_TIMEOUT = 120
+
 
 def get_soffice_env() -> dict:
     env = os.environ.copy()
@@ -37,6 +58,283 @@ def run_soffice(args: list[str], **kwargs) -> subprocess.CompletedProcess:
     return subprocess.run(["soffice"] + args, env=env, **kwargs)
 
 
+class SofficeError(RuntimeError):
+    pass
+
+
+class SofficeTimeout(SofficeError):
+    pass
+
+
+def uno_available() -> bool:
+    global _UNO_AVAILABLE
+    if _UNO_AVAILABLE is None:
+        try:
+            import uno
+
+            _UNO_AVAILABLE = _pool_size_from_env() > 0
+        except ImportError:
+            _UNO_AVAILABLE = False
+    return _UNO_AVAILABLE
+
+
+def get_pool(size: int | None = None) -> "SofficePool":
+    global _SHARED_POOL
+    with _SHARED_POOL_LOCK:
+        if _SHARED_POOL is None or _SHARED_POOL.closed:
+            _SHARED_POOL = SofficePool(size)
+            atexit.register(_SHARED_POOL.close)
+        return _SHARED_POOL
+
+
+def file_url(path) -> str:
+    import uno
+
+    return uno.systemPathToFileUrl(str(Path(path).absolute()))
+
+
+def property_values(**properties) -> tuple:
+    from com.sun.star.beans import PropertyValue
+
+    values = []
+    for name, value in properties.items():
+        prop = PropertyValue()
+        prop.Name = name
+        prop.Value = value
+        values.append(prop)
+    return tuple(values)
+
+
+class OfficeSession:
+
+    def __init__(self, context):
+        self.context = context
+        self.desktop = self.create_service("com.sun.star.frame.Desktop")
+
+    def create_service(self, name):
+        return self.context.ServiceManager.createInstanceWithContext(
+            name, self.context
+        )
+
+    def load_document(self, path):
+        document = self.desktop.loadComponentFromURL(
+            file_url(path), "_blank", 0, property_values(Hidden=True)
+        )
+        if document is None:
+            raise SofficeError(f"LibreOffice could not open {path}")
+        return document
+
+    def dispatch(self, document, command):
+        frame = document.getCurrentController().getFrame()
+        helper = self.create_service("com.sun.star.frame.DispatchHelper")
+        helper.executeDispatch(frame, command, "", 0, ())
+
+
+class SofficePool:
+
+    def __init__(self, size=None, startup_timeout=DEFAULT_STARTUP_TIMEOUT):
+        self.size = max(1, size if size is not None else _pool_size_from_env())
+        self.startup_timeout = startup_timeout
+        self.closed = False
+        self._workers = [_SofficeWorker(i) for i in range(self.size)]
+        self._idle = queue.Queue()
+        for worker in self._workers:
+            self._idle.put(worker)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def run(self, job, *args, timeout=DEFAULT_JOB_TIMEOUT):
+        if self.closed:
+            raise SofficeError("LibreOffice pool is closed")
+
+        worker = self._idle.get()
+        try:
+            return worker.run(job, args, timeout, self.startup_timeout)
+        finally:
+            self._idle.put(worker)
+
+    def map(self, job, items, timeout=DEFAULT_JOB_TIMEOUT):
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            futures = {
+                executor.submit(self.run, job, *_as_args(item), timeout=timeout): item
+                for item in items
+            }
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, e
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "jobs": sum(w.jobs_run for w in self._workers),
+            "starts": sum(w.starts for w in self._workers),
+            "restarts": sum(w.restarts for w in self._workers),
+        }
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for worker in self._workers:
+            worker.stop()
+
+
+class _SofficeWorker:
+
+    def __init__(self, index):
+        self.index = index
+        self.process = None
+        self.session = None
+        self.profile_dir = None
+        self.jobs_run = 0
+        self.starts = 0
+        self.restarts = 0
+
+    def run(self, job, args, timeout, startup_timeout):
+        if not self._is_healthy():
+            if self.starts:
+                self.restarts += 1
+            self.stop()
+            self.start(startup_timeout)
+
+        self.jobs_run += 1
+        try:
+            return self._call(job, (self.session,) + tuple(args), timeout)
+        except SofficeTimeout:
+            self.stop()
+            raise SofficeTimeout(f"LibreOffice job timed out after {timeout}s")
+        except Exception as e:
+            if self.process is None or self.process.poll() is not None:
+                self.stop()
+                raise SofficeError(f"LibreOffice crashed while running job: {e}")
+            raise
+
+    def start(self, startup_timeout):
+        import uno
+
+        self.profile_dir = Path(tempfile.mkdtemp(prefix=f"lo_pool_{self.index}_"))
+        port = _free_port()
+        connection = f"socket,host=127.0.0.1,port={port};urp;StarOffice.ComponentContext"
+        try:
+            self.process = subprocess.Popen(
+                [
+                    "soffice",
+                    "--headless",
+                    "--invisible",
+                    "--nologo",
+                    "--nodefault",
+                    "--norestore",
+                    "--nolockcheck",
+                    f"-env:UserInstallation={self.profile_dir.as_uri()}",
+                    f"--accept={connection}",
+                ],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                env=get_soffice_env(),
+            )
+        except OSError as e:
+            self.stop()
+            raise SofficeError(f"Could not start LibreOffice: {e}")
+        self.starts += 1
+
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_context
+        )
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            if self.process.poll() is not None:
+                self.stop()
+                raise SofficeError("LibreOffice exited during startup")
+            try:
+                context = resolver.resolve(f"uno:{connection}")
+                break
+            except Exception:
+                if time.monotonic() > deadline:
+                    self.stop()
+                    raise SofficeError(
+                        f"LibreOffice did not start within {startup_timeout}s"
+                    )
+                time.sleep(0.25)
+
+        self.session = OfficeSession(context)
+
+    def stop(self):
+        if self.process is not None:
+            if self.process.poll() is None and self.session is not None:
+                try:
+                    self._call(self.session.desktop.terminate, (), 5)
+                except Exception:
+                    pass
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        if self.profile_dir is not None:
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+        self.process = None
+        self.session = None
+        self.profile_dir = None
+
+    def _is_healthy(self) -> bool:
+        if self.process is None or self.process.poll() is not None:
+            return False
+        try:
+            self._call(self.session.desktop.getComponents, (), 5)
+            return True
+        except Exception:
+            return False
+
+    def _call(self, func, args, timeout):
+        outcome = {}
+
+        def target():
+            try:
+                outcome["result"] = func(*args)
+            except BaseException as e:
+                outcome["error"] = e
+
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        thread.join(timeout)
+        if thread.is_alive():
+            if self.process is not None:
+                self.process.kill()
+            raise SofficeTimeout(f"LibreOffice call timed out after {timeout}s")
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome.get("result")
+
+
+_UNO_AVAILABLE = None
+_SHARED_POOL = None
+_SHARED_POOL_LOCK = threading.Lock()
+
+
+def _pool_size_from_env() -> int:
+    try:
+        return int(os.environ.get("SOFFICE_POOL_SIZE", "1"))
+    except ValueError:
+        return 1
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _as_args(item) -> tuple:
+    return item if isinstance(item, tuple) else (item,)
+
+
 
 _SHIM_SO = Path(tempfile.gettempdir()) / "lo_socket_shim.so"
 
@@ -0,0 +1,51 @@
+"""
+In-memory snapshot of the original Office file used for comparison.
+"""
+
+import zipfile
+from pathlib import Path
+
+_SNAPSHOTS = {}
+
+
+class OriginalPackage:
+
+    XML_SUFFIXES = (".xml", ".rels")
+
+    def __init__(self, original_file):
+        self.path = Path(original_file)
+        self.xsd_errors = {}
+
+        with zipfile.ZipFile(self.path, "r") as zf:
+            self._members = {
+                info.filename: zf.read(info)
+                for info in zf.infolist()
+                if not info.is_dir() and info.filename.endswith(self.XML_SUFFIXES)
+            }
+
+    def __contains__(self, name):
+        return name in self._members
+
+    def read(self, name) -> bytes:
+        try:
+            return self._members[name]
+        except KeyError:
+            raise KeyError(
+                f"There is no item named '{name}' in {self.path.name}"
+            ) from None
+
+
+def load_original_package(original_file) -> OriginalPackage:
+    path = Path(original_file).resolve()
+    stat = path.stat()
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _SNAPSHOTS.get(path)
+    if cached is None or cached[0] != signature:
+        cached = (signature, OriginalPackage(path))
+        _SNAPSHOTS[path] = cached
+    return cached[1]
+
+
+if __name__ == "__main__":
+    raise RuntimeError("This module should not be run directly.")
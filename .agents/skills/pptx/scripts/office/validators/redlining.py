@@ -2,11 +2,15 @@
 Validator for tracked changes in Word documents.
 """
 
-import subprocess
-import tempfile
-import zipfile
+import hashlib
+from io import BytesIO
 from pathlib import Path
 
+import lxml.etree
+
+from .original import load_original_package
+from .word_diff import changed_hunks, render_hunks
+
 
 class RedliningValidator:
 
@@ -29,79 +33,58 @@ class RedliningValidator:
             return False
 
         try:
-            import xml.etree.ElementTree as ET
-
-            tree = ET.parse(modified_file)
-            root = tree.getroot()
-
-            del_elements = root.findall(".//w:del", self.namespaces)
-            ins_elements = root.findall(".//w:ins", self.namespaces)
-
-            author_del_elements = [
-                elem
-                for elem in del_elements
-                if elem.get(f"{{{self.namespaces['w']}}}author") == self.author
-            ]
-            author_ins_elements = [
-                elem
-                for elem in ins_elements
-                if elem.get(f"{{{self.namespaces['w']}}}author") == self.author
-            ]
-
-            if not author_del_elements and not author_ins_elements:
-                if self.verbose:
-                    print(f"PASSED - No tracked changes by {self.author} found.")
-                return True
-
-        except Exception:
-            pass
-
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-
-            try:
-                with zipfile.ZipFile(self.original_docx, "r") as zip_ref:
-                    zip_ref.extractall(temp_path)
-            except Exception as e:
-                print(f"FAILED - Error unpacking original docx: {e}")
-                return False
-
-            original_file = temp_path / "word" / "document.xml"
-            if not original_file.exists():
-                print(
-                    f"FAILED - Original document.xml not found in {self.original_docx}"
-                )
-                return False
+            modified_hashes, author_changes = self._paragraph_hashes(modified_file)
+        except lxml.etree.XMLSyntaxError as e:
+            print(f"FAILED - Error parsing XML files: {e}")
+            return False
 
-            try:
-                import xml.etree.ElementTree as ET
+        if not author_changes:
+            if self.verbose:
+                print(f"PASSED - No tracked changes by {self.author} found.")
+            return True
 
-                modified_tree = ET.parse(modified_file)
-                modified_root = modified_tree.getroot()
-                original_tree = ET.parse(original_file)
-                original_root = original_tree.getroot()
-            except ET.ParseError as e:
-                print(f"FAILED - Error parsing XML files: {e}")
-                return False
+        try:
+            original_package = load_original_package(self.original_docx)
+        except Exception as e:
+            print(f"FAILED - Error unpacking original docx: {e}")
+            return False
 
-            self._remove_author_tracked_changes(original_root)
-            self._remove_author_tracked_changes(modified_root)
+        if "word/document.xml" not in original_package:
+            print(f"FAILED - Original document.xml not found in {self.original_docx}")
+            return False
 
-            modified_text = self._extract_text_content(modified_root)
-            original_text = self._extract_text_content(original_root)
+        original_source = original_package.read("word/document.xml")
+        try:
+            original_hashes, _ = self._paragraph_hashes(original_source)
+        except lxml.etree.XMLSyntaxError as e:
+            print(f"FAILED - Error parsing XML files: {e}")
+            return False
 
-            if modified_text != original_text:
-                error_message = self._generate_detailed_diff(
-                    original_text, modified_text
+        if modified_hashes != original_hashes:
+            hunks = changed_hunks(original_hashes, modified_hashes)
+            original_texts = self._paragraph_texts_at(
+                original_source, {i for i0, i1, _, _ in hunks for i in range(i0, i1)}
+            )
+            modified_texts = self._paragraph_texts_at(
+                modified_file, {j for _, _, j0, j1 in hunks for j in range(j0, j1)}
+            )
+            error_message = self._generate_detailed_diff(
+                render_hunks(
+                    (
+                        [original_texts[i] for i in range(i0, i1)],
+                        [modified_texts[j] for j in range(j0, j1)],
+                    )
+                    for i0, i1, j0, j1 in hunks
                 )
-                print(error_message)
-                return False
+            )
+            print(error_message)
+            return False
 
-            if self.verbose:
-                print(f"PASSED - All changes by {self.author} are properly tracked")
-            return True
+        if self.verbose:
+            print(f"PASSED - All changes by {self.author} are properly tracked")
+        return True
 
-    def _generate_detailed_diff(self, original_text, modified_text):
+    def _generate_detailed_diff(self, diff):
         error_parts = [
             f"FAILED - Document text doesn't match after removing {self.author}'s tracked changes",
             "",
@@ -116,131 +99,92 @@ class RedliningValidator:
             "",
         ]
 
-        git_diff = self._get_git_word_diff(original_text, modified_text)
-        if git_diff:
-            error_parts.extend(["Differences:", "============", git_diff])
+        if diff:
+            error_parts.extend(["Differences:", "============", diff])
         else:
-            error_parts.append("Unable to generate word diff (git not available)")
+            error_parts.append("Unable to generate word diff (only whitespace differs)")
 
         return "\n".join(error_parts)
 
-    def _get_git_word_diff(self, original_text, modified_text):
-        try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_path = Path(temp_dir)
-
-                original_file = temp_path / "original.txt"
-                modified_file = temp_path / "modified.txt"
-
-                original_file.write_text(original_text, encoding="utf-8")
-                modified_file.write_text(modified_text, encoding="utf-8")
-
-                result = subprocess.run(
-                    [
-                        "git",
-                        "diff",
-                        "--word-diff=plain",
-                        "--word-diff-regex=.",  
-                        "-U0",  
-                        "--no-index",
-                        str(original_file),
-                        str(modified_file),
-                    ],
-                    capture_output=True,
-                    text=True,
-                )
-
-                if result.stdout.strip():
-                    lines = result.stdout.split("\n")
-                    content_lines = []
-                    in_content = False
-                    for line in lines:
-                        if line.startswith("@@"):
-                            in_content = True
-                            continue
-                        if in_content and line.strip():
-                            content_lines.append(line)
-
-                    if content_lines:
-                        return "\n".join(content_lines)
-
-                result = subprocess.run(
-                    [
-                        "git",
-                        "diff",
-                        "--word-diff=plain",
-                        "-U0",  
-                        "--no-index",
-                        str(original_file),
-                        str(modified_file),
-                    ],
-                    capture_output=True,
-                    text=True,
-                )
-
-                if result.stdout.strip():
-                    lines = result.stdout.split("\n")
-                    content_lines = []
-                    in_content = False
-                    for line in lines:
-                        if line.startswith("@@"):
-                            in_content = True
-                            continue
-                        if in_content and line.strip():
-                            content_lines.append(line)
-                    return "\n".join(content_lines)
-
-        except (subprocess.CalledProcessError, FileNotFoundError, Exception):
-            pass
-
-        return None
-
-    def _remove_author_tracked_changes(self, root):
-        ins_tag = f"{{{self.namespaces['w']}}}ins"
-        del_tag = f"{{{self.namespaces['w']}}}del"
-        author_attr = f"{{{self.namespaces['w']}}}author"
-
-        for parent in root.iter():
-            to_remove = []
-            for child in parent:
-                if child.tag == ins_tag and child.get(author_attr) == self.author:
-                    to_remove.append(child)
-            for elem in to_remove:
-                parent.remove(elem)
-
-        deltext_tag = f"{{{self.namespaces['w']}}}delText"
-        t_tag = f"{{{self.namespaces['w']}}}t"
-
-        for parent in root.iter():
-            to_process = []
-            for child in parent:
-                if child.tag == del_tag and child.get(author_attr) == self.author:
-                    to_process.append((child, list(parent).index(child)))
-
-            for del_elem, del_index in reversed(to_process):
-                for elem in del_elem.iter():
-                    if elem.tag == deltext_tag:
-                        elem.tag = t_tag
-
-                for child in reversed(list(del_elem)):
-                    parent.insert(del_index, child)
-                parent.remove(del_elem)
-
-    def _extract_text_content(self, root):
-        p_tag = f"{{{self.namespaces['w']}}}p"
-        t_tag = f"{{{self.namespaces['w']}}}t"
-
-        paragraphs = []
-        for p_elem in root.findall(f".//{p_tag}"):
-            text_parts = []
-            for t_elem in p_elem.findall(f".//{t_tag}"):
-                if t_elem.text:
-                    text_parts.append(t_elem.text)
-            paragraph_text = "".join(text_parts)
-            if paragraph_text:
-                paragraphs.append(paragraph_text)
-
-        return "\n".join(paragraphs)
+    def _paragraph_hashes(self, source):
+        author_changes = [0]
+        hashes = [
+            hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+            for text in self._paragraph_texts(source, author_changes)
+        ]
+        return hashes, author_changes[0] > 0
+
+    def _paragraph_texts_at(self, source, indexes):
+        texts = {}
+        last = max(indexes, default=-1)
+        for index, text in enumerate(self._paragraph_texts(source)):
+            if index > last:
+                break
+            if index in indexes:
+                texts[index] = text
+        return texts
+
+    def _paragraph_texts(self, source, author_changes=None):
+        # Yields the text of each non-empty paragraph as it would read with
+        # the author's insertions removed and their deletions restored.
+        w = self.namespaces["w"]
+        p_tag, t_tag = f"{{{w}}}p", f"{{{w}}}t"
+        ins_tag, del_tag = f"{{{w}}}ins", f"{{{w}}}del"
+        deltext_tag = f"{{{w}}}delText"
+        author_attr = f"{{{w}}}author"
+
+        if isinstance(source, bytes):
+            source = BytesIO(source)
+        context = lxml.etree.iterparse(
+            source,
+            events=("start", "end"),
+            tag=(p_tag, t_tag, ins_tag, del_tag, deltext_tag),
+            no_network=True,
+            load_dtd=False,
+        )
+
+        inside_ins = inside_del = 0
+        open_paragraphs = []
+        finished = []
+        for event, elem in context:
+            tag = elem.tag
+            if event == "start":
+                if tag == p_tag:
+                    open_paragraphs.append((len(finished), []))
+                    finished.append(None)
+                elif (tag == ins_tag or tag == del_tag) and elem.get(
+                    author_attr
+                ) == self.author:
+                    if tag == ins_tag:
+                        inside_ins += 1
+                    else:
+                        inside_del += 1
+                    if author_changes is not None:
+                        author_changes[0] += 1
+                continue
+
+            if tag == t_tag or (tag == deltext_tag and inside_del):
+                if elem.text and not inside_ins and open_paragraphs:
+                    for _, parts in open_paragraphs:
+                        parts.append(elem.text)
+            elif (tag == ins_tag or tag == del_tag) and elem.get(
+                author_attr
+            ) == self.author:
+                if tag == ins_tag:
+                    inside_ins -= 1
+                else:
+                    inside_del -= 1
+            elif tag == p_tag:
+                index, parts = open_paragraphs.pop()
+                finished[index] = "".join(parts)
+                if not open_paragraphs:
+                    for text in finished:
+                        if text:
+                            yield text
+                    finished = []
+                    elem.clear(keep_tail=True)
+                    while elem.getprevious() is not None:
+                        del elem.getparent()[0]
 
 
 if __name__ == "__main__":
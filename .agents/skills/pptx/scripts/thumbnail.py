@@ -5,7 +5,7 @@ Labels each thumbnail with its XML filename (e.g., slide1.xml).
 Hidden slides are shown with a placeholder pattern.
 
 Usage:
-    python thumbnail.py input.pptx [output_prefix] [--cols N]
+    python thumbnail.py input.pptx [output_prefix] [--cols N] [--jobs N] [--no-cache]
 
 Examples:
     python thumbnail.py presentation.pptx
@@ -13,9 +13,14 @@ Examples:
 
     python thumbnail.py template.pptx grid --cols 4
     # Creates: grid.jpg (or grid-1.jpg, grid-2.jpg for large decks)
+
+Rendered slides are cached by content (see thumbnail_cache.py). On a re-run
+only slides whose XML, layout, master or media changed are exported again.
 """
 
 import argparse
+import os
+import re
 import subprocess
 import sys
 import tempfile
@@ -23,11 +28,23 @@ import zipfile
 from pathlib import Path
 
 import defusedxml.minidom
-from office.soffice import get_soffice_env
+from office.soffice import (
+    SofficeTimeout,
+    file_url,
+    get_pool,
+    get_soffice_env,
+    property_values,
+    uno_available,
+)
 from PIL import Image, ImageDraw, ImageFont
+from thumbnail_cache import (
+    DEFAULT_CACHE_DIR,
+    DEFAULT_CACHE_SIZE_MB,
+    ThumbnailCache,
+    slide_keys,
+)
 
 THUMBNAIL_WIDTH = 300
-CONVERSION_DPI = 100
 MAX_COLS = 6
 DEFAULT_COLS = 3
 JPEG_QUALITY = 95
@@ -35,6 +52,8 @@ GRID_PADDING = 20
 BORDER_WIDTH = 2
 FONT_SIZE_RATIO = 0.10
 LABEL_PADDING_RATIO = 0.4
+PDF_EXPORT_TIMEOUT = 120
+PDFTOPPM_ERROR_BYTES = 2000
 
 
 def main():
@@ -54,6 +73,30 @@ def main():
         default=DEFAULT_COLS,
         help=f"Number of columns (default: {DEFAULT_COLS}, max: {MAX_COLS})",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Parallel rasterizer processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=DEFAULT_CACHE_DIR,
+        help=f"Thumbnail cache directory (default: {DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_SIZE_MB,
+        metavar="MB",
+        help=f"Maximum cache size in MB (default: {DEFAULT_CACHE_SIZE_MB})",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Render every slide without reading or writing the cache",
+    )
 
     args = parser.parse_args()
 
@@ -73,7 +116,14 @@ def main():
 
         with tempfile.TemporaryDirectory() as temp_dir:
             temp_path = Path(temp_dir)
-            visible_images = convert_to_images(input_path, temp_path)
+            if args.no_cache:
+                visible_images = convert_to_images(input_path, temp_path, args.jobs)
+            else:
+                cache = ThumbnailCache(args.cache_dir, args.cache_size)
+                visible_images = convert_with_cache(
+                    input_path, slide_info, temp_path, args.jobs, cache
+                )
+                print(cache.summary())
 
             if not visible_images and not any(s["hidden"] for s in slide_info):
                 print("Error: No slides found", file=sys.stderr)
@@ -94,16 +144,7 @@ def main():
 
 def get_slide_info(pptx_path: Path) -> list[dict]:
     with zipfile.ZipFile(pptx_path, "r") as zf:
-        rels_content = zf.read("ppt/_rels/presentation.xml.rels").decode("utf-8")
-        rels_dom = defusedxml.minidom.parseString(rels_content)
-
-        rid_to_slide = {}
-        for rel in rels_dom.getElementsByTagName("Relationship"):
-            rid = rel.getAttribute("Id")
-            target = rel.getAttribute("Target")
-            rel_type = rel.getAttribute("Type")
-            if "slide" in rel_type and target.startswith("slides/"):
-                rid_to_slide[rid] = target.replace("slides/", "")
+        rid_to_slide = _slide_relationships(zf)
 
         pres_content = zf.read("ppt/presentation.xml").decode("utf-8")
         pres_dom = defusedxml.minidom.parseString(pres_content)
@@ -112,12 +153,81 @@ def get_slide_info(pptx_path: Path) -> list[dict]:
         for sld_id in pres_dom.getElementsByTagName("p:sldId"):
             rid = sld_id.getAttribute("r:id")
             if rid in rid_to_slide:
-                hidden = sld_id.getAttribute("show") == "0"
-                slides.append({"name": rid_to_slide[rid], "hidden": hidden})
+                name = rid_to_slide[rid]
+                slide_xml = zf.read(f"ppt/slides/{name}")
+                slide_dom = defusedxml.minidom.parseString(slide_xml)
+                hidden = slide_dom.documentElement.getAttribute("show") == "0"
+                slides.append({"name": name, "hidden": hidden})
 
         return slides
 
 
+def _slide_relationships(zf: zipfile.ZipFile) -> dict[str, str]:
+    rels_content = zf.read("ppt/_rels/presentation.xml.rels").decode("utf-8")
+    rels_dom = defusedxml.minidom.parseString(rels_content)
+
+    rid_to_slide = {}
+    for rel in rels_dom.getElementsByTagName("Relationship"):
+        rid = rel.getAttribute("Id")
+        target = rel.getAttribute("Target")
+        rel_type = rel.getAttribute("Type")
+        if "slide" in rel_type and target.startswith("slides/"):
+            rid_to_slide[rid] = target.replace("slides/", "")
+    return rid_to_slide
+
+
+def convert_with_cache(
+    pptx_path: Path,
+    slide_info: list[dict],
+    temp_dir: Path,
+    jobs: int,
+    cache: ThumbnailCache,
+) -> list[Path]:
+    visible = [info["name"] for info in slide_info if not info["hidden"]]
+    keys = slide_keys(pptx_path, visible, THUMBNAIL_WIDTH)
+    images = {name: cache.get(keys[name]) for name in visible}
+    missing = [name for name in visible if images[name] is None]
+
+    if missing:
+        if len(missing) == len(visible):
+            deck = pptx_path
+        else:
+            deck = temp_dir / f"{pptx_path.stem}-changed.pptx"
+            write_partial_deck(pptx_path, set(missing), deck)
+
+        rendered = convert_to_images(deck, temp_dir, jobs)
+        if len(rendered) != len(missing):
+            raise RuntimeError(
+                f"Expected {len(missing)} rendered slide(s), got {len(rendered)}"
+            )
+        for name, image in zip(missing, rendered):
+            images[name] = cache.put(keys[name], image)
+
+    cache.evict(keep=set(keys.values()))
+    return [images[name] for name in visible]
+
+
+def write_partial_deck(pptx_path: Path, slide_names: set[str], output_path: Path):
+    with zipfile.ZipFile(pptx_path, "r") as zin:
+        # Hide the other slides rather than dropping them, so slide number
+        # fields still render each slide's real position. Hidden state lives
+        # on the <p:sld> root of each slide part, not on <p:sldId>.
+        hide = {
+            f"ppt/slides/{name}"
+            for name in _slide_relationships(zin).values()
+            if name not in slide_names
+        }
+
+        with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as zout:
+            for info in zin.infolist():
+                if info.filename in hide:
+                    slide_dom = defusedxml.minidom.parseString(zin.read(info))
+                    slide_dom.documentElement.setAttribute("show", "0")
+                    zout.writestr(info, slide_dom.toxml(encoding="UTF-8"))
+                else:
+                    zout.writestr(info, zin.read(info))
+
+
 def build_slide_list(
     slide_info: list[dict],
     visible_images: list[Path],
@@ -155,42 +265,101 @@ def create_hidden_placeholder(size: tuple[int, int]) -> Image.Image:
     return img
 
 
-def convert_to_images(pptx_path: Path, temp_dir: Path) -> list[Path]:
+def convert_to_images(pptx_path: Path, temp_dir: Path, jobs: int = 1) -> list[Path]:
     pdf_path = temp_dir / f"{pptx_path.stem}.pdf"
 
-    result = subprocess.run(
-        [
-            "soffice",
-            "--headless",
-            "--convert-to",
-            "pdf",
-            "--outdir",
-            str(temp_dir),
-            str(pptx_path),
-        ],
-        capture_output=True,
-        text=True,
-        env=get_soffice_env(),
-    )
-    if result.returncode != 0 or not pdf_path.exists():
+    if uno_available():
+        try:
+            get_pool().run(
+                _export_pdf, pptx_path, pdf_path, timeout=PDF_EXPORT_TIMEOUT
+            )
+        except SofficeTimeout:
+            raise RuntimeError("PDF conversion timed out")
+        except Exception as e:
+            raise RuntimeError(f"PDF conversion failed: {e}")
+    else:
+        result = subprocess.run(
+            [
+                "soffice",
+                "--headless",
+                "--convert-to",
+                "pdf",
+                "--outdir",
+                str(temp_dir),
+                str(pptx_path),
+            ],
+            capture_output=True,
+            text=True,
+            env=get_soffice_env(),
+        )
+        if result.returncode != 0:
+            raise RuntimeError("PDF conversion failed")
+    if not pdf_path.exists():
         raise RuntimeError("PDF conversion failed")
 
-    result = subprocess.run(
-        [
-            "pdftoppm",
-            "-jpeg",
-            "-r",
-            str(CONVERSION_DPI),
-            str(pdf_path),
-            str(temp_dir / "slide"),
-        ],
-        capture_output=True,
-        text=True,
-    )
-    if result.returncode != 0:
-        raise RuntimeError("Image conversion failed")
+    return rasterize_pdf(pdf_path, temp_dir / "slide", THUMBNAIL_WIDTH, jobs)
+
+
+def rasterize_pdf(pdf_path: Path, prefix: Path, width: int, jobs: int) -> list[Path]:
+    page_count = _pdf_page_count(pdf_path)
+    shards = max(1, min(jobs, page_count or 1))
+    per_shard = -(-page_count // shards) if page_count else 0
 
-    return sorted(temp_dir.glob("slide-*.jpg"))
+    commands = []
+    for first in range(1, page_count + 1, per_shard) if page_count else [None]:
+        cmd = ["pdftoppm", "-jpeg", "-scale-to-x", str(width), "-scale-to-y", "-1"]
+        if first is not None:
+            last = min(first + per_shard - 1, page_count)
+            cmd += ["-f", str(first), "-l", str(last)]
+        commands.append(cmd + [str(pdf_path), str(prefix)])
+
+    # stderr goes to files rather than pipes: a shard printing more warnings
+    # than a pipe holds would block until someone read them.
+    logs = [tempfile.TemporaryFile() for _ in commands]
+    try:
+        processes = [
+            subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=log)
+            for cmd, log in zip(commands, logs)
+        ]
+        errors = []
+        for process, log in zip(processes, logs):
+            if process.wait() != 0:
+                log.seek(max(0, log.seek(0, os.SEEK_END) - PDFTOPPM_ERROR_BYTES))
+                errors.append(log.read().decode(errors="replace").strip())
+    finally:
+        for log in logs:
+            log.close()
+    if errors:
+        raise RuntimeError("Image conversion failed: " + "\n".join(errors))
+
+    pattern = re.compile(rf"{re.escape(prefix.name)}-(\d+)\.jpg")
+    pages = []
+    for image in prefix.parent.glob(f"{prefix.name}-*.jpg"):
+        match = pattern.fullmatch(image.name)
+        if match:
+            pages.append((int(match.group(1)), image))
+    return [image for _, image in sorted(pages)]
+
+
+def _pdf_page_count(pdf_path: Path) -> int:
+    try:
+        result = subprocess.run(
+            ["pdfinfo", str(pdf_path)], capture_output=True, text=True
+        )
+    except OSError:
+        return 0
+    match = re.search(r"^Pages:\s+(\d+)", result.stdout, re.MULTILINE)
+    return int(match.group(1)) if match else 0
+
+
+def _export_pdf(session, pptx_path: Path, pdf_path: Path) -> None:
+    document = session.load_document(pptx_path)
+    try:
+        document.storeToURL(
+            file_url(pdf_path), property_values(FilterName="impress_pdf_Export")
+        )
+    finally:
+        document.close(True)
 
 
 def create_grids(
@@ -266,6 +435,7 @@ def create_grid(
         y_thumbnail = y_base + label_padding + font_size + label_padding
 
         with Image.open(img_path) as img:
+            img.draft("RGB", (width, height))
             img.thumbnail((width, height), Image.Resampling.LANCZOS)
             w, h = img.size
             tx = x + (width - w) // 2
@@ -0,0 +1,190 @@
+"""Content-addressed cache of rendered slide thumbnails.
+
+A slide's key is a hash of its XML together with every part it renders from:
+its layout, master, theme and media, found by following relationships. Notes,
+comments and links to other slides are not followed, and a master's list of
+layouts is not followed either, so editing one slide or one layout only
+invalidates the slides that actually use it.
+
+Thumbnails are stored as <key>.jpg in the cache directory. A hit refreshes the
+file's modification time, and the least recently used files are evicted once
+the directory grows past its size limit.
+"""
+
+import hashlib
+import os
+import posixpath
+import re
+import zipfile
+from pathlib import Path
+
+import defusedxml.minidom
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "pptx-thumbnails"
+DEFAULT_CACHE_SIZE_MB = 256
+
+SKIPPED_RELATIONSHIPS = {
+    "notesSlide",
+    "notesMaster",
+    "handoutMaster",
+    "slide",
+    "comments",
+    "commentAuthors",
+    "tags",
+}
+
+
+def slide_keys(pptx_path: Path, slide_names: list[str], width: int) -> dict[str, str]:
+    with zipfile.ZipFile(pptx_path, "r") as zf:
+        graph = _PartGraph(zf)
+        slide_size = _slide_size(zf)
+
+        keys = {}
+        for position, name in enumerate(slide_names, start=1):
+            part = f"ppt/slides/{name}"
+            digest = hashlib.sha256()
+            digest.update(f"{CACHE_VERSION}:{width}:{slide_size}\n".encode())
+            if graph.uses_slide_number(part):
+                digest.update(f"position:{position}\n".encode())
+            for dependency in sorted(graph.closure(part)):
+                digest.update(f"{dependency}:{graph.digest(dependency)}\n".encode())
+            keys[name] = digest.hexdigest()
+        return keys
+
+
+class ThumbnailCache:
+
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR, max_mb: int = DEFAULT_CACHE_SIZE_MB):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_mb * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def get(self, key: str) -> Path | None:
+        path = self.cache_dir / f"{key}.jpg"
+        try:
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def put(self, key: str, image_path: Path) -> Path:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.cache_dir / f"{key}.jpg"
+        staging = path.with_suffix(f".{os.getpid()}.tmp")
+        staging.write_bytes(Path(image_path).read_bytes())
+        os.replace(staging, path)
+        return path
+
+    def evict(self, keep: set[str] = frozenset()) -> None:
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob("*.jpg"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path.stem in keep:
+                continue
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.evicted += 1
+
+    def summary(self) -> str:
+        return (
+            f"Thumbnail cache: {self.hits} hit(s), {self.misses} miss(es), "
+            f"{self.evicted} evicted"
+        )
+
+
+class _PartGraph:
+
+    def __init__(self, zf: zipfile.ZipFile):
+        self.zf = zf
+        self.names = set(zf.namelist())
+        self._digests = {}
+        self._targets = {}
+
+    def digest(self, part: str) -> str:
+        if part not in self._digests:
+            if part.startswith("external:"):
+                self._digests[part] = ""
+            else:
+                self._digests[part] = hashlib.sha256(self.zf.read(part)).hexdigest()
+        return self._digests[part]
+
+    def closure(self, part: str) -> set[str]:
+        seen = {part}
+        stack = [part]
+        while stack:
+            current = stack.pop()
+            rels = _rels_path(current)
+            if rels in self.names:
+                seen.add(rels)
+            for target in self.targets(current):
+                if target not in seen:
+                    seen.add(target)
+                    if not target.startswith("external:"):
+                        stack.append(target)
+        return seen
+
+    def targets(self, part: str) -> list[str]:
+        if part in self._targets:
+            return self._targets[part]
+
+        targets = []
+        rels = _rels_path(part)
+        if rels in self.names:
+            dom = defusedxml.minidom.parseString(self.zf.read(rels))
+            base = posixpath.dirname(part)
+            from_master = "/slideMasters/" in f"/{part}"
+            for rel in dom.getElementsByTagName("Relationship"):
+                rel_type = rel.getAttribute("Type").rsplit("/", 1)[-1]
+                if rel_type in SKIPPED_RELATIONSHIPS:
+                    continue
+                if from_master and rel_type == "slideLayout":
+                    continue
+                target = rel.getAttribute("Target")
+                if rel.getAttribute("TargetMode") == "External":
+                    targets.append(f"external:{target}")
+                    continue
+                if target.startswith("/"):
+                    resolved = target.lstrip("/")
+                else:
+                    resolved = posixpath.normpath(posixpath.join(base, target))
+                if resolved in self.names:
+                    targets.append(resolved)
+
+        self._targets[part] = targets
+        return targets
+
+    def uses_slide_number(self, part: str) -> bool:
+        return b'type="slidenum"' in self.zf.read(part)
+
+
+def _rels_path(part: str) -> str:
+    directory, name = posixpath.split(part)
+    return posixpath.join(directory, "_rels", f"{name}.rels")
+
+
+def _slide_size(zf: zipfile.ZipFile) -> str:
+    content = zf.read("ppt/presentation.xml").decode("utf-8")
+    match = re.search(r"<p:sldSz\b[^>]*>", content)
+    return match.group(0) if match else ""
+
+
+if __name__ == "__main__":
+    raise RuntimeError("This module should not be run directly.")
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Encoder - Delta-encoded GIF writer for indexed frames.
+
+The first frame is written in full. Every later frame is cropped to the
+rectangle that changed since the frame before it and drawn on top of it
+("do not dispose"), with the pixels inside that rectangle that did not
+change set to a transparent palette entry, so long runs of them compress to
+almost nothing. Dirty rectangles and transparency masks are computed with
+NumPy over the whole frame stack; PIL only LZW-compresses the sub-images.
+"""
+
+import struct
+from contextlib import nullcontext
+from pathlib import Path
+from typing import BinaryIO
+
+import numpy as np
+from PIL import GifImagePlugin, Image
+
+# Frames compared per vectorized pass when finding dirty rectangles.
+DIRTY_RECT_BATCH_FRAMES = 16
+
+# GIF disposal method that leaves a frame on screen under the next one.
+DISPOSE_NONE = 1
+
+
+def dirty_rects(indexed_frames: np.ndarray) -> np.ndarray:
+    """
+    Find the rectangle that changed between each frame and the one before it.
+
+    Args:
+        indexed_frames: Frames as an (N, H, W) uint8 array
+
+    Returns:
+        (N, 4) array of (left, top, right, bottom) boxes; the first frame gets
+        the full canvas and a frame identical to the previous one gets an
+        empty box (right == left)
+    """
+    count, height, width = indexed_frames.shape
+    rects = np.zeros((count, 4), dtype=np.intp)
+    if count:
+        rects[0] = (0, 0, width, height)
+
+    for start in range(1, count, DIRTY_RECT_BATCH_FRAMES):
+        stop = min(count, start + DIRTY_RECT_BATCH_FRAMES)
+        changed = indexed_frames[start:stop] != indexed_frames[start - 1 : stop - 1]
+        rows = changed.any(axis=2)
+        cols = changed.any(axis=1)
+
+        any_change = rows.any(axis=1)
+        top = rows.argmax(axis=1)
+        bottom = height - rows[:, ::-1].argmax(axis=1)
+        left = cols.argmax(axis=1)
+        right = width - cols[:, ::-1].argmax(axis=1)
+
+        batch = np.stack([left, top, right, bottom], axis=1)
+        rects[start:stop] = np.where(any_change[:, np.newaxis], batch, 0)
+
+    return rects
+
+
+def write_gif(
+    output_path: str | Path | BinaryIO,
+    palette: np.ndarray,
+    indexed_frames: np.ndarray,
+    durations: np.ndarray,
+    transparency: bool = True,
+) -> dict:
+    """
+    Write indexed frames as a looping GIF, storing only what changed per frame.
+
+    Args:
+        output_path: Where to save the GIF, or a binary file object to write to
+        palette: Palette as a (K, 3) uint8 array
+        indexed_frames: Frames as an (N, H, W) uint8 array of palette indices
+        durations: Display time of each frame in milliseconds
+        transparency: Mark unchanged pixels inside each dirty rectangle as
+            transparent (needs a free palette entry, i.e. K < 256)
+
+    Returns:
+        Dictionary with the number of frames written, the total number of
+        pixels they cover, how many of those are transparent and the bytes
+        each input frame took (0 for frames that were not written)
+    """
+    count, height, width = indexed_frames.shape
+    rects = dirty_rects(indexed_frames)
+
+    # Frames identical to the one before them are not written; their time
+    # goes to the frame that stays on screen.
+    written = np.flatnonzero(rects[:, 2] > rects[:, 0])
+    frame_durations = np.add.reduceat(np.asarray(durations, dtype=np.float64), written)
+
+    transparent_index = len(palette) if transparency and len(palette) < 256 else None
+    table_size = len(palette) + (transparent_index is not None)
+    table_bits = max(1, (table_size - 1).bit_length())
+    color_table = np.zeros((1 << table_bits, 3), dtype=np.uint8)
+    color_table[: len(palette)] = palette
+
+    covered = 0
+    transparent = 0
+    frame_bytes = np.zeros(count, dtype=np.int64)
+    if hasattr(output_path, "write"):
+        output = nullcontext(output_path)
+    else:
+        output = open(output_path, "wb")
+    with output as fp:
+        # Logical screen descriptor with a global color table
+        fp.write(b"GIF89a")
+        fp.write(struct.pack("<HHBBB", width, height, 0x80 | (table_bits - 1), 0, 0))
+        fp.write(color_table.tobytes())
+        # NETSCAPE2.0 application extension: loop forever
+        fp.write(b"!\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00")
+
+        previous = None
+        for index, duration in zip(written, frame_durations):
+            left, top, right, bottom = rects[index]
+            sub = indexed_frames[index, top:bottom, left:right]
+            offset = (int(left), int(top))
+            params = {"duration": duration, "disposal": DISPOSE_NONE}
+            data = _encode(sub, offset, params)
+
+            if previous is not None and transparent_index is not None:
+                static = sub == previous[top:bottom, left:right]
+                if static.any():
+                    # Transparent holes do not always compress better than
+                    # the pixels they replace (e.g. over a flat background),
+                    # so keep whichever encoding is smaller.
+                    holes = np.where(static, np.uint8(transparent_index), sub)
+                    params["transparency"] = transparent_index
+                    holes_data = _encode(holes, offset, params)
+                    if len(holes_data) < len(data):
+                        data = holes_data
+                        transparent += int(np.count_nonzero(static))
+
+            fp.write(data)
+            frame_bytes[index] = len(data)
+            covered += sub.size
+            previous = indexed_frames[index]
+
+        fp.write(b";")
+
+    return {
+        "frames_written": len(written),
+        "pixels_written": covered,
+        "pixels_transparent": transparent,
+        "frame_bytes": frame_bytes,
+    }
+
+
+def _encode(sub: np.ndarray, offset: tuple[int, int], params: dict) -> bytes:
+    sub = np.ascontiguousarray(sub)
+    height, width = sub.shape
+    image = Image.frombuffer("P", (width, height), sub, "raw", "P", 0, 1)
+    return b"".join(GifImagePlugin.getdata(image, offset, **params))
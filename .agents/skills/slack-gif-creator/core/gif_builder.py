@@ -6,18 +6,54 @@ This module provides the main interface for creating GIFs from programmatically
 generated frames, with automatic optimization for Slack's requirements.
 """
 
+import io
 from pathlib import Path
 from typing import Optional
 
-import imageio.v3 as imageio
 import numpy as np
 from PIL import Image
 
+from .encoder import write_gif
+from .quantize import build_palette, quantize_frames
+
+# Frames are stored in one (capacity, H, W, 3) buffer that grows by at least
+# this many frames at a time.
+FRAME_CHUNK = 32
+
+# Pixels per PIL call when resizing a batch of frames.
+RESIZE_BATCH_PIXELS = 1 << 23
+
+# Pixel values compared per vectorized pass when deduplicating; small
+# enough for the temporaries to stay in cache.
+DEDUPE_BATCH_VALUES = 1 << 20
+
+# Frames whose perceptual hashes differ in more bits than this are treated
+# as different without comparing their pixels.
+PHASH_MAX_DISTANCE = 8
+
+# save(target_bytes=...) gives up quality in this order: fewer colors, then
+# keeping only every 2nd or 3rd frame, then smaller dimensions.
+TARGET_COLORS = (256, 192, 128, 96, 64, 48, 32)
+TARGET_FRAME_STEPS = (1, 2, 3)
+TARGET_SCALES = (1.0, 0.875, 0.75, 0.625, 0.5)
+
+# Full encodes save(target_bytes=...) may spend correcting its predictions,
+# and how far under the target a result may be before it tries a less lossy
+# setting.
+TARGET_FULL_ENCODES = 3
+TARGET_TOLERANCE = 0.1
+
+# Sizes are predicted by trial-encoding this many runs of consecutive frames.
+SIZE_SAMPLE_RUNS = 4
+SIZE_SAMPLE_RUN_LENGTH = 4
+
 
 class GIFBuilder:
     """Builder for creating optimized GIFs from frames."""
 
-    def __init__(self, width: int = 480, height: int = 480, fps: int = 15):
+    def __init__(
+        self, width: int = 480, height: int = 480, fps: int = 15, capacity: int = 0
+    ):
         """
         Initialize GIF builder.
 
@@ -25,11 +61,42 @@ class GIFBuilder:
             width: Frame width in pixels
             height: Frame height in pixels
             fps: Frames per second
+            capacity: Number of frames to allocate room for up front
         """
         self.width = width
         self.height = height
         self.fps = fps
-        self.frames: list[np.ndarray] = []
+        self._buffer = np.empty((capacity, height, width, 3), dtype=np.uint8)
+        # How many 1/fps ticks each frame is shown for
+        self._ticks = np.ones(capacity, dtype=np.int64)
+        self._count = 0
+
+    @property
+    def frames(self) -> np.ndarray:
+        """Frames added so far, as a zero-copy (N, H, W, 3) uint8 view."""
+        return self._buffer[: self._count]
+
+    @frames.setter
+    def frames(self, frames: list[np.ndarray | Image.Image] | np.ndarray):
+        self._count = 0
+        self.add_frames(frames)
+
+    @property
+    def frame_durations(self) -> np.ndarray:
+        """Display time of each frame in milliseconds."""
+        return self._ticks[: self._count] * (1000 / self.fps)
+
+    def reserve(self, frame_count: int):
+        """Make room for at least frame_count frames in one allocation."""
+        if frame_count <= len(self._buffer):
+            return
+        buffer = np.empty((frame_count, self.height, self.width, 3), dtype=np.uint8)
+        buffer[: self._count] = self.frames
+        self._buffer = buffer
+
+        ticks = np.ones(frame_count, dtype=np.int64)
+        ticks[: self._count] = self._ticks[: self._count]
+        self._ticks = ticks
 
     def add_frame(self, frame: np.ndarray | Image.Image):
         """
@@ -38,24 +105,80 @@ class GIFBuilder:
         Args:
             frame: Frame as numpy array or PIL Image (will be converted to RGB)
         """
+        slot = self._next_slot()
+
         if isinstance(frame, Image.Image):
-            frame = np.array(frame.convert("RGB"))
+            frame = frame.convert("RGB")
+            if frame.size != (self.width, self.height):
+                frame = frame.resize(
+                    (self.width, self.height), Image.Resampling.LANCZOS
+                )
+            slot[0] = np.asarray(frame)
+        else:
+            frame = _as_rgb(frame)
+            # Ensure frame is correct size
+            if frame.shape[:2] != (self.height, self.width):
+                _resize_frames(frame[np.newaxis], self.width, self.height, out=slot)
+            else:
+                slot[0] = frame
 
-        # Ensure frame is correct size
-        if frame.shape[:2] != (self.height, self.width):
-            pil_frame = Image.fromarray(frame)
-            pil_frame = pil_frame.resize(
-                (self.width, self.height), Image.Resampling.LANCZOS
-            )
-            frame = np.array(pil_frame)
+        self._ticks[self._count] = 1
+        self._count += 1
 
-        self.frames.append(frame)
+    def add_frames(self, frames: list[np.ndarray | Image.Image] | np.ndarray):
+        """Add multiple frames at once (a list, or an (N, H, W, 3) array)."""
+        if hasattr(frames, "__len__"):
+            self.reserve(self._count + len(frames))
+
+        if isinstance(frames, np.ndarray) and frames.ndim == 4 and frames.shape[3] == 3:
+            out = self._buffer[self._count : self._count + len(frames)]
+            if frames.shape[1:3] != (self.height, self.width):
+                _resize_frames(frames, self.width, self.height, out=out)
+            else:
+                out[:] = frames
+            self._ticks[self._count : self._count + len(frames)] = 1
+            self._count += len(frames)
+            return
 
-    def add_frames(self, frames: list[np.ndarray | Image.Image]):
-        """Add multiple frames at once."""
         for frame in frames:
             self.add_frame(frame)
 
+    def _next_slot(self) -> np.ndarray:
+        if self._count == len(self._buffer):
+            capacity = len(self._buffer)
+            self.reserve(capacity + max(FRAME_CHUNK, capacity // 2))
+        return self._buffer[self._count : self._count + 1]
+
+    def _keep_frames(self, indices: list[int] | np.ndarray, keep_timing: bool = False):
+        # With keep_timing, each kept frame also takes over the display time of
+        # the dropped frames that follow it; indices must then start at 0.
+        indices = np.asarray(indices, dtype=np.intp)
+        if keep_timing:
+            ticks = np.add.reduceat(self._ticks[: self._count], indices)
+        else:
+            ticks = self._ticks[indices]
+
+        # Indices only move forward, so frames can be compacted in place.
+        for position, index in enumerate(indices):
+            if position != index:
+                self._buffer[position] = self._buffer[index]
+        self._ticks[: len(indices)] = ticks
+        self._count = len(indices)
+
+    def quantize(self, num_colors: int = 128) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Reduce all frames to one global palette.
+
+        Args:
+            num_colors: Target number of colors (8-256)
+
+        Returns:
+            Tuple of (palette as a (K, 3) uint8 array, indexed frames as an
+            (N, H, W) uint8 array of palette indices)
+        """
+        palette = build_palette(self.frames, num_colors)
+        return palette, quantize_frames(self.frames, palette)
+
     def optimize_colors(
         self, num_colors: int = 128, use_global_palette: bool = True
     ) -> list[np.ndarray]:
@@ -69,100 +192,101 @@ class GIFBuilder:
         Returns:
             List of color-optimized frames
         """
-        optimized = []
-
         if use_global_palette and len(self.frames) > 1:
-            # Create a global palette from all frames
-            # Sample frames to build palette
-            sample_size = min(5, len(self.frames))
-            sample_indices = [
-                int(i * len(self.frames) / sample_size) for i in range(sample_size)
-            ]
-            sample_frames = [self.frames[i] for i in sample_indices]
-
-            # Combine sample frames into a single image for palette generation
-            # Flatten each frame to get all pixels, then stack them
-            all_pixels = np.vstack(
-                [f.reshape(-1, 3) for f in sample_frames]
-            )  # (total_pixels, 3)
-
-            # Create a properly-shaped RGB image from the pixel data
-            # We'll make a roughly square image from all the pixels
-            total_pixels = len(all_pixels)
-            width = min(512, int(np.sqrt(total_pixels)))  # Reasonable width, max 512
-            height = (total_pixels + width - 1) // width  # Ceiling division
-
-            # Pad if necessary to fill the rectangle
-            pixels_needed = width * height
-            if pixels_needed > total_pixels:
-                padding = np.zeros((pixels_needed - total_pixels, 3), dtype=np.uint8)
-                all_pixels = np.vstack([all_pixels, padding])
-
-            # Reshape to proper RGB image format (H, W, 3)
-            img_array = (
-                all_pixels[:pixels_needed].reshape(height, width, 3).astype(np.uint8)
-            )
-            combined_img = Image.fromarray(img_array, mode="RGB")
+            palette, indices = self.quantize(num_colors)
+            return list(palette[indices])
 
-            # Generate global palette
-            global_palette = combined_img.quantize(colors=num_colors, method=2)
-
-            # Apply global palette to all frames
-            for frame in self.frames:
-                pil_frame = Image.fromarray(frame)
-                quantized = pil_frame.quantize(palette=global_palette, dither=1)
-                optimized.append(np.array(quantized.convert("RGB")))
-        else:
-            # Use per-frame quantization
-            for frame in self.frames:
-                pil_frame = Image.fromarray(frame)
-                quantized = pil_frame.quantize(colors=num_colors, method=2, dither=1)
-                optimized.append(np.array(quantized.convert("RGB")))
+        # Use per-frame quantization
+        optimized = []
+        for frame in self.frames:
+            pil_frame = Image.fromarray(frame)
+            quantized = pil_frame.quantize(colors=num_colors, method=2, dither=1)
+            optimized.append(np.array(quantized.convert("RGB")))
 
         return optimized
 
-    def deduplicate_frames(self, threshold: float = 0.9995) -> int:
+    def deduplicate_frames(
+        self, threshold: float = 0.9995, use_phash: bool = False
+    ) -> int:
         """
         Remove duplicate or near-duplicate consecutive frames.
 
+        Each frame is compared with the last frame kept. A removed frame's
+        display time is added to the frame shown in its place, so the
+        animation keeps its timing.
+
         Args:
             threshold: Similarity threshold (0.0-1.0). Higher = more strict (0.9995 = nearly identical).
                       Use 0.9995+ to preserve subtle animations, 0.98 for aggressive removal.
+            use_phash: Skip the pixel comparison for frames whose perceptual
+                      hashes clearly differ (faster; can only keep more frames)
 
         Returns:
             Number of frames removed
         """
-        if len(self.frames) < 2:
+        count = len(self.frames)
+        if count < 2:
             return 0
 
-        deduplicated = [self.frames[0]]
-        removed_count = 0
-
-        for i in range(1, len(self.frames)):
-            # Compare with previous frame
-            prev_frame = np.array(deduplicated[-1], dtype=np.float32)
-            curr_frame = np.array(self.frames[i], dtype=np.float32)
-
-            # Calculate similarity (normalized)
-            diff = np.abs(prev_frame - curr_frame)
-            similarity = 1.0 - (np.mean(diff) / 255.0)
+        # Similarity of every frame to the one before it, in batched passes
+        pairs = np.arange(1, count)
+        if use_phash:
+            hashes = _perceptual_hashes(self.frames)
+            pairs = pairs[_hamming(hashes[1:], hashes[:-1]) <= PHASH_MAX_DISTANCE]
+        consecutive = np.zeros(count)
+        consecutive[pairs] = self._similarities(pairs, pairs - 1)
+
+        kept = [0]
+        similarity = 0.0
+        for i in range(1, count):
+            if kept[-1] == i - 1:
+                similarity = consecutive[i]
+            elif consecutive[i] < 1.0:
+                # Only a frame that differs from the removed frame before it
+                # needs comparing with the last kept frame again.
+                similarity = self._similarities(
+                    np.array([i]), np.array([kept[-1]])
+                )[0]
 
             # Keep frame if sufficiently different
             # High threshold (0.9995+) means only remove nearly identical frames
             if similarity < threshold:
-                deduplicated.append(self.frames[i])
-            else:
-                removed_count += 1
+                kept.append(i)
 
-        self.frames = deduplicated
+        removed_count = count - len(kept)
+        if removed_count:
+            self._keep_frames(kept, keep_timing=True)
         return removed_count
 
+    def _similarities(self, indices: np.ndarray, others: np.ndarray) -> np.ndarray:
+        # 1 - mean absolute difference / 255 for each pair of frames
+        frames = self.frames
+        values = frames[0].size
+        batch = max(1, DEDUPE_BATCH_VALUES // values)
+
+        similarities = np.empty(len(indices))
+        for start in range(0, len(indices), batch):
+            a = _gather(frames, indices[start : start + batch])
+            b = _gather(frames, others[start : start + batch])
+            if np.array_equal(a, b):
+                # Held frames are exact repeats, which is cheap to check
+                similarities[start : start + len(a)] = 1.0
+                continue
+            # |a - b| for uint8 without widening
+            diff = np.maximum(a, b)
+            diff -= np.minimum(a, b)
+            totals = diff.reshape(len(a), -1).sum(axis=1, dtype=np.uint64)
+            similarities[start : start + len(a)] = 1.0 - (totals / values) / 255.0
+
+        return similarities
+
     def save(
         self,
         output_path: str | Path,
         num_colors: int = 128,
         optimize_for_emoji: bool = False,
         remove_duplicates: bool = False,
+        target_bytes: Optional[int] = None,
     ) -> dict:
         """
         Save frames as optimized GIF for Slack.
@@ -172,11 +296,13 @@ class GIFBuilder:
             num_colors: Number of colors to use (fewer = smaller file)
             optimize_for_emoji: If True, optimize for emoji size (128x128, fewer colors)
             remove_duplicates: If True, remove duplicate consecutive frames (opt-in)
+            target_bytes: Largest file size to aim for. Colors (num_colors at
+                most), frame rate and dimensions are lowered as far as needed.
 
         Returns:
             Dictionary with file info (path, size, dimensions, frame_count)
         """
-        if not self.frames:
+        if len(self.frames) == 0:
             raise ValueError("No frames to save. Add frames with add_frame() first.")
 
         output_path = Path(output_path)
@@ -195,15 +321,10 @@ class GIFBuilder:
                 print(
                     f"  Resizing from {self.width}x{self.height} to 128x128 for emoji"
                 )
+                # Resize all frames in batches
+                self._buffer = _resize_frames(self.frames, 128, 128)
                 self.width = 128
                 self.height = 128
-                # Resize all frames
-                resized_frames = []
-                for frame in self.frames:
-                    pil_frame = Image.fromarray(frame)
-                    pil_frame = pil_frame.resize((128, 128), Image.Resampling.LANCZOS)
-                    resized_frames.append(np.array(pil_frame))
-                self.frames = resized_frames
             num_colors = min(num_colors, 48)  # More aggressive color limit for emoji
 
             # More aggressive FPS reduction for emoji
@@ -213,23 +334,37 @@ class GIFBuilder:
                 )
                 # Keep every nth frame to get close to 12 frames
                 keep_every = max(1, len(self.frames) // 12)
-                self.frames = [
-                    self.frames[i] for i in range(0, len(self.frames), keep_every)
-                ]
-
-        # Optimize colors with global palette
-        optimized_frames = self.optimize_colors(num_colors, use_global_palette=True)
-
-        # Calculate frame duration in milliseconds
-        frame_duration = 1000 / self.fps
-
-        # Save GIF
-        imageio.imwrite(
-            output_path,
-            optimized_frames,
-            duration=frame_duration,
-            loop=0,  # Infinite loop
-        )
+                self._keep_frames(np.arange(0, len(self.frames), keep_every))
+
+        # Frame durations in milliseconds
+        frame_durations = self.frame_durations
+        width, height, fps = self.width, self.height, self.fps
+
+        if target_bytes is None:
+            # Optimize colors with global palette
+            palette, indexed_frames = self.quantize(num_colors)
+
+            # Save GIF straight from the indexed frames, storing only the part
+            # of each frame that changed
+            encoded = write_gif(output_path, palette, indexed_frames, frame_durations)
+        else:
+            search = _SizeSearch(self.frames, frame_durations, num_colors)
+            (scale, step, num_colors), data, encoded = search.run(target_bytes)
+            output_path.write_bytes(data)
+            width, height = search.size(scale)
+            fps = self.fps / step
+            settings = (
+                f"{num_colors} colors, every {step} frame(s) at {width}x{height}"
+                f" ({search.full_encodes} full encodes)"
+            )
+            if len(data) <= target_bytes:
+                print(f"  Fit to {target_bytes / 1024:.1f} KB with {settings}")
+            else:
+                print(
+                    f"  Note: Target of {target_bytes / 1024:.1f} KB not reached;"
+                    f" kept the smallest result, {len(data) / 1024:.1f} KB with"
+                    f" {settings}"
+                )
 
         # Get file info
         file_size_kb = output_path.stat().st_size / 1024
@@ -239,21 +374,29 @@ class GIFBuilder:
             "path": str(output_path),
             "size_kb": file_size_kb,
             "size_mb": file_size_mb,
-            "dimensions": f"{self.width}x{self.height}",
-            "frame_count": len(optimized_frames),
-            "fps": self.fps,
-            "duration_seconds": len(optimized_frames) / self.fps,
+            "dimensions": f"{width}x{height}",
+            "frame_count": encoded["frames_written"],
+            "fps": fps,
+            "duration_seconds": frame_durations.sum() / 1000,
             "colors": num_colors,
+            "pixels_written": encoded["pixels_written"],
+            "pixels_transparent": encoded["pixels_transparent"],
         }
 
         # Print info
         print(f"\n✓ GIF created successfully!")
         print(f"  Path: {output_path}")
         print(f"  Size: {file_size_kb:.1f} KB ({file_size_mb:.2f} MB)")
-        print(f"  Dimensions: {self.width}x{self.height}")
-        print(f"  Frames: {len(optimized_frames)} @ {self.fps} fps")
+        print(f"  Dimensions: {width}x{height}")
+        print(f"  Frames: {info['frame_count']} @ {fps:g} fps")
         print(f"  Duration: {info['duration_seconds']:.1f}s")
         print(f"  Colors: {num_colors}")
+        written = encoded["pixels_written"]
+        canvas = info["frame_count"] * width * height
+        print(
+            f"  Delta frames: {written / canvas:.0%} of pixels written,"
+            f" {encoded['pixels_transparent'] / written:.0%} of them transparent"
+        )
 
         # Size info
         if optimize_for_emoji:
@@ -266,4 +409,228 @@ class GIFBuilder:
 
     def clear(self):
         """Clear all frames (useful for creating multiple GIFs)."""
-        self.frames = []
+        self._count = 0
+
+
+class _SizeSearch:
+    """
+    Pick the least lossy save settings whose GIF fits in a byte budget.
+
+    Settings are (scale, frame step, colors) tuples ordered from least to
+    most lossy, so predicted sizes shrink along the list and it can be
+    binary searched. A prediction trial-encodes a few short runs of
+    consecutive frames; only the settings picked from predictions are
+    encoded in full, and each full encode corrects the predictions that
+    follow. Resized and quantized frames are cached, so trying another
+    frame step reuses the quantization of the same size and color count.
+    """
+
+    def __init__(self, frames: np.ndarray, durations: np.ndarray, max_colors: int):
+        self.frames = frames
+        self.durations = durations
+        self.full_encodes = 0
+
+        colors = [max_colors] + [c for c in TARGET_COLORS if c < max_colors]
+        step = TARGET_FRAME_STEPS[-1]
+        self.settings = (
+            [(1.0, 1, c) for c in colors]
+            + [(1.0, s, colors[-1]) for s in TARGET_FRAME_STEPS[1:]]
+            + [(scale, step, colors[-1]) for scale in TARGET_SCALES[1:]]
+        )
+
+        self._scaled = {}  # (width, height) -> resized frames
+        self._quantized = {}  # (width, height, colors) -> (palette, indices)
+        self._predicted = {}  # setting -> predicted bytes
+
+    def size(self, scale: float) -> tuple[int, int]:
+        height, width = self.frames.shape[1:3]
+        return max(1, round(width * scale)), max(1, round(height * scale))
+
+    def run(self, target_bytes: int) -> tuple[tuple, bytes, dict]:
+        """Return the chosen setting, its GIF bytes and write_gif's stats."""
+        low, high = 0, len(self.settings)
+        correction = 1.0
+        fitting = smallest = None
+
+        while low < high and self.full_encodes < TARGET_FULL_ENCODES:
+            index = self._first_fitting(low, high, target_bytes / correction)
+            if index == high:
+                # Nothing left in range is predicted to fit: keep the result
+                # that fits, or fall back to the most lossy setting.
+                if fitting is not None:
+                    break
+                index = high - 1
+            setting = self.settings[index]
+            data, encoded = self._encode(setting)
+            result = (setting, data, encoded)
+
+            if smallest is None or len(data) < len(smallest[1]):
+                smallest = result
+            if len(data) <= target_bytes:
+                fitting = result
+                high = index
+                if len(data) >= target_bytes * (1 - TARGET_TOLERANCE):
+                    break
+            else:
+                low = index + 1
+            correction = len(data) / self._predict(setting)
+
+        return fitting or smallest
+
+    def _first_fitting(self, low: int, high: int, budget: float) -> int:
+        # Least lossy setting in [low, high) predicted to fit, else high.
+        while low < high:
+            middle = (low + high) // 2
+            if self._predict(self.settings[middle]) <= budget:
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def _predict(self, setting: tuple) -> float:
+        if setting in self._predicted:
+            return self._predicted[setting]
+
+        scale, step, colors = setting
+        kept = np.arange(0, len(self.frames), step)
+        runs, run_length = SIZE_SAMPLE_RUNS, SIZE_SAMPLE_RUN_LENGTH
+        if len(kept) <= runs * run_length:
+            positions = np.arange(len(kept))
+        else:
+            starts = np.linspace(0, len(kept) - run_length, runs).astype(np.intp)
+            positions = (starts[:, np.newaxis] + np.arange(run_length)).ravel()
+
+        sample = self.frames[kept[positions]]
+        width, height = self.size(scale)
+        if (width, height) != (sample.shape[2], sample.shape[1]):
+            sample = _resize_frames(sample, width, height)
+        palette = build_palette(sample, colors)
+
+        buffer = io.BytesIO()
+        encoded = write_gif(
+            buffer,
+            palette,
+            quantize_frames(sample, palette),
+            np.full(len(sample), 100.0),
+        )
+        frame_bytes = encoded["frame_bytes"]
+
+        if len(kept) <= runs * run_length:
+            predicted = buffer.tell()
+        else:
+            # The first frame of each run is a jump from the run before it,
+            # so only the deltas inside runs stand for the frames in between.
+            header = buffer.tell() - frame_bytes.sum()
+            deltas = frame_bytes.reshape(runs, run_length)[:, 1:]
+            predicted = header + frame_bytes[0] + deltas.mean() * (len(kept) - 1)
+
+        self._predicted[setting] = predicted
+        return predicted
+
+    def _encode(self, setting: tuple) -> tuple[bytes, dict]:
+        scale, step, colors = setting
+        width, height = self.size(scale)
+
+        key = (width, height, colors)
+        if key not in self._quantized:
+            if (width, height) not in self._scaled:
+                if scale == 1.0:
+                    self._scaled[width, height] = self.frames
+                else:
+                    self._scaled[width, height] = _resize_frames(
+                        self.frames, width, height
+                    )
+            frames = self._scaled[width, height]
+            palette = build_palette(frames, colors)
+            self._quantized[key] = (palette, quantize_frames(frames, palette))
+        palette, indices = self._quantized[key]
+
+        kept = np.arange(0, len(indices), step)
+        durations = np.add.reduceat(self.durations, kept)
+
+        buffer = io.BytesIO()
+        encoded = write_gif(buffer, palette, indices[kept], durations)
+        self.full_encodes += 1
+        return buffer.getvalue(), encoded
+
+
+def _gather(frames: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    # A run of consecutive indices is a view; anything else is a copy.
+    if len(indices) and np.all(np.diff(indices) == 1):
+        return frames[indices[0] : indices[-1] + 1]
+    return frames[indices]
+
+
+def _perceptual_hashes(frames: np.ndarray) -> np.ndarray:
+    """
+    64-bit DCT perceptual hash of each frame.
+
+    Each frame is sampled on a 64x64 grid, converted to grayscale and
+    averaged down to 32x32; the hash bits mark which of the lowest 8x8 DCT
+    coefficients are above their median.
+    """
+    size = 32
+    count, height, width = frames.shape[:3]
+    rows = ((np.arange(2 * size) + 0.5) * height / (2 * size)).astype(np.intp)
+    cols = ((np.arange(2 * size) + 0.5) * width / (2 * size)).astype(np.intp)
+
+    grid = frames[:, rows[:, np.newaxis], cols].astype(np.float32)
+    gray = grid @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    small = gray.reshape(count, size, 2, size, 2).mean(axis=(2, 4))
+
+    k = np.arange(size)
+    dct = np.cos(np.pi * (2 * k[np.newaxis, :] + 1) * k[:, np.newaxis] / (2 * size))
+    low = (dct @ small @ dct.T)[:, :8, :8].reshape(count, 64)
+
+    bits = low > np.median(low, axis=1, keepdims=True)
+    return np.packbits(bits, axis=1).view(">u8")[:, 0].astype(np.uint64)
+
+
+def _hamming(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    xor = np.ascontiguousarray(a ^ b).view(np.uint8).reshape(len(a), 8)
+    return np.unpackbits(xor, axis=1).sum(axis=1)
+
+
+def _as_rgb(frame: np.ndarray) -> np.ndarray:
+    frame = np.asarray(frame)
+    if frame.ndim != 3 or frame.shape[2] != 3:
+        frame = np.asarray(Image.fromarray(frame).convert("RGB"))
+    return frame
+
+
+def _resize_frames(
+    frames: np.ndarray, width: int, height: int, out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Resize an (N, H, W, 3) frame stack with LANCZOS, many frames per PIL call.
+
+    A batch is tiled into one tall image for the horizontal pass and one wide
+    image for the vertical pass. PIL resamples horizontally then vertically,
+    so this gives the same pixels as resizing each frame on its own.
+    """
+    count, src_height, src_width = frames.shape[:3]
+    if out is None:
+        out = np.empty((count, height, width, 3), dtype=np.uint8)
+
+    batch = max(1, RESIZE_BATCH_PIXELS // (src_height * src_width))
+    for start in range(0, count, batch):
+        chunk = np.ascontiguousarray(frames[start : start + batch], dtype=np.uint8)
+        n = len(chunk)
+
+        if width != src_width:
+            tall = Image.fromarray(chunk.reshape(n * src_height, src_width, 3))
+            tall = tall.resize((width, n * src_height), Image.Resampling.LANCZOS)
+            chunk = np.asarray(tall).reshape(n, src_height, width, 3)
+
+        if height != src_height:
+            wide = Image.fromarray(
+                np.ascontiguousarray(chunk.transpose(1, 0, 2, 3)).reshape(
+                    src_height, n * width, 3
+                )
+            )
+            wide = wide.resize((n * width, height), Image.Resampling.LANCZOS)
+            chunk = np.asarray(wide).reshape(height, n, width, 3).transpose(1, 0, 2, 3)
+
+        out[start : start + n] = chunk
+
+    return out
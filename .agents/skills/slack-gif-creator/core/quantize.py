@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Quantize - Global-palette color reduction for GIF frames.
+
+The palette is built once from a strided sample of pixels taken across every
+frame. Pixels are then mapped to palette indices through a lookup table over
+a 6-bit-per-channel RGB cube, so quantizing a frame is a few vectorized NumPy
+operations instead of a PIL quantize and convert round trip.
+"""
+
+import math
+
+import numpy as np
+from PIL import Image
+
+# Pixels sampled from all frames to build the palette.
+PALETTE_SAMPLE_PIXELS = 1 << 18
+
+# Bits per channel of the RGB cube the lookup table is indexed by.
+LUT_BITS = 6
+
+# Frames mapped per batch, which bounds the size of temporary arrays.
+QUANTIZE_BATCH_FRAMES = 16
+
+
+def build_palette(frames: np.ndarray, num_colors: int = 128) -> np.ndarray:
+    """
+    Build a global palette from a strided sample of all frames.
+
+    Args:
+        frames: Frames as an (N, H, W, 3) uint8 array
+        num_colors: Maximum number of palette colors (2-256)
+
+    Returns:
+        Palette as a (K, 3) uint8 array, K <= num_colors
+    """
+    pixels = frames.reshape(-1, 3)
+    width = frames.shape[2]
+
+    # A stride that shares a factor with the width keeps landing in the same
+    # few columns, so step to one that is coprime with it.
+    step = max(1, len(pixels) // PALETTE_SAMPLE_PIXELS)
+    while step > 1 and math.gcd(step, width) != 1:
+        step += 1
+    sample = np.ascontiguousarray(pixels[::step])
+
+    sample_img = Image.fromarray(sample.reshape(1, -1, 3), mode="RGB")
+    quantized = sample_img.quantize(
+        colors=max(2, min(256, num_colors)), method=Image.Quantize.FASTOCTREE
+    )
+
+    used = np.unique(np.asarray(quantized))
+    palette = np.array(quantized.getpalette(), dtype=np.uint8).reshape(-1, 3)
+    return palette[used]
+
+
+def color_lut(palette: np.ndarray, bits: int = LUT_BITS) -> np.ndarray:
+    """
+    Map every cell of a 2**bits per channel RGB cube to its nearest palette index.
+
+    Args:
+        palette: Palette as a (K, 3) uint8 array
+        bits: Bits per channel of the cube (5 or 6)
+
+    Returns:
+        Lookup table of 2**(3 * bits) uint8 palette indices
+    """
+    size = 1 << bits
+    shift = 8 - bits
+    axis = np.arange(size, dtype=np.float32) * (1 << shift) + ((1 << shift) - 1) / 2
+    red, green, blue = np.meshgrid(axis, axis, axis, indexing="ij")
+    centers = np.stack([red.ravel(), green.ravel(), blue.ravel()], axis=1)
+
+    colors = palette.astype(np.float32)
+    color_norms = (colors * colors).sum(axis=1)
+
+    lut = np.empty(len(centers), dtype=np.uint8)
+    rows = 1 << 14
+    for start in range(0, len(centers), rows):
+        # |c - p|^2 without the |c|^2 term, which is the same for every p
+        distances = color_norms - 2 * (centers[start : start + rows] @ colors.T)
+        lut[start : start + rows] = distances.argmin(axis=1)
+
+    # Pixels that already have a palette color keep it, even when another
+    # entry is closer to the center of their cell.
+    codes = _cube_codes(palette, bits)
+    lut[codes[::-1]] = np.arange(len(palette) - 1, -1, -1)
+
+    return lut
+
+
+def quantize_frames(
+    frames: np.ndarray, palette: np.ndarray, bits: int = LUT_BITS
+) -> np.ndarray:
+    """
+    Map frames to palette indices through an RGB cube lookup table.
+
+    Args:
+        frames: Frames as an (N, H, W, 3) uint8 array
+        palette: Palette as a (K, 3) uint8 array
+        bits: Bits per channel of the lookup table's RGB cube
+
+    Returns:
+        Indexed frames as an (N, H, W) uint8 array
+    """
+    lut = color_lut(palette, bits)
+    indices = np.empty(frames.shape[:3], dtype=np.uint8)
+    for start in range(0, len(frames), QUANTIZE_BATCH_FRAMES):
+        batch = frames[start : start + QUANTIZE_BATCH_FRAMES]
+        lut.take(_cube_codes(batch, bits), out=indices[start : start + len(batch)])
+    return indices
+
+
+def _cube_codes(pixels: np.ndarray, bits: int) -> np.ndarray:
+    # Combining the shifted channels with a float32 dot product is faster than
+    # three integer shifts and ors, and exact for codes below 2**24.
+    weights = np.array([1 << (2 * bits), 1 << bits, 1], dtype=np.float32)
+    cells = (pixels >> (8 - bits)).astype(np.float32)
+    return (cells @ weights).astype(np.intp)
@@ -39,19 +39,23 @@ def validate_gif(
         with Image.open(gif_path) as img:
             width, height = img.size
 
-            # Count frames
+            # Count frames and add up their durations (frames can differ,
+            # e.g. when duplicates were merged into the frame before them)
             frame_count = 0
+            duration_ms = 0
+            frame_tiles = []
             try:
                 while True:
                     img.seek(frame_count)
+                    duration_ms += img.info.get("duration", 100)
+                    frame_tiles.extend(img.tile[:1])
                     frame_count += 1
             except EOFError:
                 pass
 
             # Get duration
             try:
-                duration_ms = img.info.get("duration", 100)
-                total_duration = (duration_ms * frame_count) / 1000
+                total_duration = duration_ms / 1000
                 fps = frame_count / total_duration if total_duration > 0 else 0
             except:
                 total_duration = None
@@ -60,6 +64,10 @@ def validate_gif(
     except Exception as e:
         return False, {"error": f"Failed to read GIF: {e}"}
 
+    delta_frames, size_saved_bytes = _delta_savings(
+        frame_tiles, width * height, size_bytes
+    )
+
     # Validate dimensions
     if is_emoji:
         optimal = width == height == 128
@@ -83,6 +91,8 @@ def validate_gif(
         "frame_count": frame_count,
         "duration_seconds": total_duration,
         "fps": fps,
+        "delta_frames": delta_frames,
+        "size_saved_kb": size_saved_bytes / 1024,
         "is_emoji": is_emoji,
         "optimal": optimal if is_emoji else None,
     }
@@ -106,6 +116,11 @@ def validate_gif(
             f"  Frames: {frame_count}"
             + (f" @ {fps:.1f} fps ({total_duration:.1f}s)" if fps else "")
         )
+        if delta_frames:
+            print(
+                f"  Delta frames: {delta_frames}/{frame_count}"
+                f" (~{size_saved_bytes / 1024:.1f} KB saved vs full frames)"
+            )
 
         if not dim_pass:
             print(
@@ -118,6 +133,30 @@ def validate_gif(
     return dim_pass, results
 
 
+def _delta_savings(frame_tiles: list, canvas_pixels: int, size_bytes: int) -> tuple:
+    """
+    Count frames stored as a cropped or transparent delta and estimate the
+    bytes this saved, taking the first frame (stored in full) as the size of
+    every frame without delta encoding.
+    """
+    if not frame_tiles:
+        return 0, 0.0
+
+    offsets = [offset for _, _, offset, _ in frame_tiles] + [size_bytes]
+    delta_frames = 0
+    for _, box, _, args in frame_tiles:
+        area = (box[2] - box[0]) * (box[3] - box[1])
+        transparency = args[2] if args and len(args) > 2 else -1
+        if area < canvas_pixels or transparency >= 0:
+            delta_frames += 1
+
+    _, box, _, _ = frame_tiles[0]
+    first_area = max(1, (box[2] - box[0]) * (box[3] - box[1]))
+    full_frame_bytes = (offsets[1] - offsets[0]) * canvas_pixels / first_area
+    data_bytes = size_bytes - offsets[0]
+    return delta_frames, max(0.0, full_frame_bytes * len(frame_tiles) - data_bytes)
+
+
 def is_slack_ready(
     gif_path: str | Path, is_emoji: bool = True, verbose: bool = True
 ) -> bool:
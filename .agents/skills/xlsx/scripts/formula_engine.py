@@ -0,0 +1,1027 @@
+"""
+Native Python formula engine for common spreadsheet models.
+
+Evaluates arithmetic, comparisons, concatenation, cell and range references
+and SUM/AVERAGE/MIN/MAX/COUNT/IF/IFERROR/VLOOKUP/INDEX/MATCH without
+launching LibreOffice. Formulas are parsed into a dependency DAG, ranges are
+evaluated as NumPy slices, and set_value() + recalculate() recomputes only
+the cells downstream of the changed inputs.
+
+Workbooks that use anything else (other functions, defined names, whole
+column references, array formulas, circular references) fall back to
+recalc.py, run on a temporary copy with the --set updates written into it so
+the input file is left untouched.
+
+Usage:
+    python formula_engine.py model.xlsx [--set Sheet1!B2=0.05] [--show Sheet1!C10]
+"""
+
+import argparse
+import json
+import re
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from openpyxl import load_workbook
+from openpyxl.utils.datetime import to_excel
+
+EXCEL_ERRORS = [
+    "#VALUE!",
+    "#DIV/0!",
+    "#REF!",
+    "#NAME?",
+    "#NULL!",
+    "#NUM!",
+    "#N/A",
+]
+MAX_ERROR_LOCATIONS = 20
+
+
+class ExcelError:
+
+    __slots__ = ("code",)
+
+    def __init__(self, code):
+        self.code = code
+
+    def __eq__(self, other):
+        return isinstance(other, ExcelError) and other.code == self.code
+
+    def __hash__(self):
+        return hash(self.code)
+
+    def __repr__(self):
+        return self.code
+
+
+class UnsupportedFormula(Exception):
+    pass
+
+
+class _FormulaError(Exception):
+
+    def __init__(self, code):
+        super().__init__(code)
+        self.error = ExcelError(code)
+
+
+_TOKEN_PATTERN = re.compile(
+    r"""
+    (?P<ws>\s+)
+  | (?P<string>"(?:[^"]|"")*")
+  | (?P<error>\#(?:NULL!|DIV/0!|VALUE!|REF!|NAME\?|NUM!|N/A))
+  | (?P<func>[A-Za-z_][A-Za-z0-9_.]*(?=\())
+  | (?P<ref>
+        (?:(?:'(?:[^']|'')+'|[A-Za-z_][A-Za-z0-9_.]*)!)?
+        \$?[A-Za-z]{1,3}\$?[0-9]+
+        (?::\$?[A-Za-z]{1,3}\$?[0-9]+)?
+        (?![A-Za-z0-9_(])
+    )
+  | (?P<bool>(?:TRUE|FALSE)(?![A-Za-z0-9_(]))
+  | (?P<number>(?:[0-9]+(?:\.[0-9]*)?|\.[0-9]+)(?:[eE][+-]?[0-9]+)?)
+  | (?P<op><>|<=|>=|[-+*/^&=<>%(),:!])
+  | (?P<name>[A-Za-z_'][^\s()+\-*/^&=<>,%]*)
+    """,
+    re.VERBOSE,
+)
+
+_CELL_PATTERN = re.compile(r"\$?([A-Za-z]{1,3})\$?([0-9]+)")
+
+_COMPARISONS = {
+    "=": lambda a, b: a == b,
+    "<>": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    ">": lambda a, b: a > b,
+    "<=": lambda a, b: a <= b,
+    ">=": lambda a, b: a >= b,
+}
+
+
+def parse_formula(formula, sheet):
+    tokens = _tokenize(formula.lstrip("="))
+    parser = _Parser(tokens, sheet)
+    node = parser.parse_expression()
+    if parser.peek() is not None:
+        raise UnsupportedFormula(f"Unexpected token {parser.peek()[1]!r}")
+    return node
+
+
+def _tokenize(text):
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        match = _TOKEN_PATTERN.match(text, pos)
+        if match is None:
+            raise UnsupportedFormula(f"Cannot parse {text[pos:]!r}")
+        kind = match.lastgroup
+        if kind == "name":
+            raise UnsupportedFormula(f"Defined names are not supported: {match.group()}")
+        if kind != "ws":
+            tokens.append((kind, match.group()))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+
+    def __init__(self, tokens, sheet):
+        self.tokens = tokens
+        self.pos = 0
+        self.sheet = sheet
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self, value=None):
+        token = self.peek()
+        if token is None or (value is not None and token[1] != value):
+            raise UnsupportedFormula(f"Expected {value or 'a value'}")
+        self.pos += 1
+        return token
+
+    def accept(self, *values):
+        token = self.peek()
+        if token is not None and token[0] == "op" and token[1] in values:
+            self.pos += 1
+            return token[1]
+        return None
+
+    def parse_expression(self):
+        node = self.parse_concat()
+        while (op := self.accept(*_COMPARISONS)) is not None:
+            node = ("compare", op, node, self.parse_concat())
+        return node
+
+    def parse_concat(self):
+        node = self.parse_additive()
+        while self.accept("&"):
+            node = ("concat", node, self.parse_additive())
+        return node
+
+    def parse_additive(self):
+        node = self.parse_multiplicative()
+        while (op := self.accept("+", "-")) is not None:
+            node = ("arith", op, node, self.parse_multiplicative())
+        return node
+
+    def parse_multiplicative(self):
+        node = self.parse_power()
+        while (op := self.accept("*", "/")) is not None:
+            node = ("arith", op, node, self.parse_power())
+        return node
+
+    def parse_power(self):
+        node = self.parse_percent()
+        while self.accept("^"):
+            node = ("arith", "^", node, self.parse_percent())
+        return node
+
+    def parse_percent(self):
+        node = self.parse_unary()
+        while self.accept("%"):
+            node = ("arith", "/", node, ("const", 100.0))
+        return node
+
+    def parse_unary(self):
+        op = self.accept("-", "+")
+        if op == "-":
+            return ("neg", self.parse_unary())
+        if op == "+":
+            return self.parse_unary()
+        return self.parse_primary()
+
+    def parse_primary(self):
+        kind, text = self.take()
+        if kind == "number":
+            return ("const", float(text))
+        if kind == "string":
+            return ("const", text[1:-1].replace('""', '"'))
+        if kind == "bool":
+            return ("const", text == "TRUE")
+        if kind == "error":
+            return ("const", ExcelError(text))
+        if kind == "ref":
+            return _parse_reference(text, self.sheet)
+        if kind == "func":
+            return self.parse_call(text.upper())
+        if kind == "op" and text == "(":
+            node = self.parse_expression()
+            self.take(")")
+            return node
+        raise UnsupportedFormula(f"Unexpected token {text!r}")
+
+    def parse_call(self, name):
+        if name not in FUNCTIONS:
+            raise UnsupportedFormula(f"Unsupported function {name}")
+        self.take("(")
+        args = []
+        if not self.accept(")"):
+            while True:
+                token = self.peek()
+                if token is not None and token[1] in (",", ")"):
+                    args.append(("const", None))
+                else:
+                    args.append(self.parse_expression())
+                if self.accept(")"):
+                    break
+                self.take(",")
+        return ("call", name, args)
+
+
+def _parse_reference(text, sheet):
+    if "!" in text:
+        sheet, _, text = text.rpartition("!")
+        if sheet.startswith("'"):
+            sheet = sheet[1:-1].replace("''", "'")
+
+    first, _, last = text.partition(":")
+    row1, col1 = _cell_position(first)
+    if not last:
+        return ("ref", sheet, row1, col1)
+
+    row2, col2 = _cell_position(last)
+    return (
+        "range",
+        sheet,
+        min(row1, row2),
+        min(col1, col2),
+        max(row1, row2),
+        max(col1, col2),
+    )
+
+
+def _cell_position(reference):
+    match = _CELL_PATTERN.fullmatch(reference)
+    if match is None:
+        raise UnsupportedFormula(f"Unsupported reference {reference}")
+    column = 0
+    for char in match.group(1).upper():
+        column = column * 26 + ord(char) - ord("A") + 1
+    return int(match.group(2)), column
+
+
+def _column_letter(index):
+    letters = ""
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+def _references(node):
+    kind = node[0]
+    if kind in ("ref", "range"):
+        yield node
+    elif kind == "call":
+        for arg in node[2]:
+            yield from _references(arg)
+    elif kind in ("arith", "compare"):
+        yield from _references(node[2])
+        yield from _references(node[3])
+    elif kind == "concat":
+        yield from _references(node[1])
+        yield from _references(node[2])
+    elif kind == "neg":
+        yield from _references(node[1])
+
+
+class _Sheet:
+
+    def __init__(self, name, rows, cols, declared=True):
+        self.name = name
+        self.declared = declared
+        self.values = np.full((rows, cols), None, dtype=object)
+        self.numbers = np.full((rows, cols), np.nan)
+        self.errors = np.zeros((rows, cols), dtype=bool)
+        self.pending = np.zeros((rows, cols), dtype=bool)
+
+    def get(self, row, col):
+        if row > self.values.shape[0] or col > self.values.shape[1]:
+            return None
+        return self.values[row - 1, col - 1]
+
+    def set(self, row, col, value):
+        self._ensure_size(row, col)
+        self.values[row - 1, col - 1] = value
+        is_number = isinstance(value, (int, float)) and not isinstance(value, bool)
+        self.numbers[row - 1, col - 1] = value if is_number else np.nan
+        self.errors[row - 1, col - 1] = isinstance(value, ExcelError)
+
+    def block(self, row1, col1, row2, col2):
+        self._ensure_size(row2, col2)
+        window = (slice(row1 - 1, row2), slice(col1 - 1, col2))
+        return self.values[window], self.numbers[window], self.errors[window]
+
+    def pending_cells(self, row1, col1, row2, col2):
+        self._ensure_size(row2, col2)
+        window = self.pending[row1 - 1 : row2, col1 - 1 : col2]
+        return [
+            (self.name, int(row) + row1, int(col) + col1)
+            for row, col in np.argwhere(window)
+        ]
+
+    def is_pending(self, row, col):
+        if row > self.pending.shape[0] or col > self.pending.shape[1]:
+            return False
+        return bool(self.pending[row - 1, col - 1])
+
+    def set_pending(self, row, col, pending):
+        self._ensure_size(row, col)
+        self.pending[row - 1, col - 1] = pending
+
+    def _ensure_size(self, row, col):
+        rows, cols = self.values.shape
+        if row <= rows and col <= cols:
+            return
+        new_rows, new_cols = max(rows, row), max(cols, col)
+        for attr, fill in (
+            ("values", None),
+            ("numbers", np.nan),
+            ("errors", False),
+            ("pending", False),
+        ):
+            old = getattr(self, attr)
+            grown = np.full((new_rows, new_cols), fill, dtype=old.dtype)
+            grown[:rows, :cols] = old
+            setattr(self, attr, grown)
+
+
+class _Range:
+
+    def __init__(self, values, numbers, errors):
+        self.values = values
+        self.numbers = numbers
+        self.errors = errors
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def first_error(self):
+        if self.errors.any():
+            return self.values[self.errors][0]
+        return None
+
+
+class FormulaEngine:
+
+    def __init__(self):
+        self.sheets = {}
+        self.formulas = {}
+        self.unsupported = {}
+        self._dependents = {}
+        self._range_dependents = {}
+        self._range_index = {}
+        self._dirty = set()
+
+    @classmethod
+    def from_workbook(cls, filename):
+        engine = cls()
+        wb = load_workbook(filename, data_only=False)
+        try:
+            for ws in wb.worksheets:
+                engine.add_sheet(ws.title, ws.max_row, ws.max_column)
+            for ws in wb.worksheets:
+                sheet = engine.sheets[ws.title.lower()]
+                for row in ws.iter_rows():
+                    for cell in row:
+                        value = cell.value
+                        if value is None:
+                            continue
+                        if cell.data_type == "f":
+                            if isinstance(value, str):
+                                engine.set_formula(ws.title, cell.coordinate, value)
+                            else:
+                                engine.unsupported[(ws.title, cell.coordinate)] = (
+                                    "Array and data table formulas are not supported"
+                                )
+                        elif cell.data_type == "e":
+                            sheet.set(cell.row, cell.column, ExcelError(str(value)))
+                        elif cell.is_date:
+                            sheet.set(cell.row, cell.column, float(to_excel(value)))
+                        elif isinstance(value, int) and not isinstance(value, bool):
+                            sheet.set(cell.row, cell.column, float(value))
+                        else:
+                            sheet.set(cell.row, cell.column, value)
+        finally:
+            wb.close()
+        return engine
+
+    def add_sheet(self, name, rows=1, cols=1):
+        sheet = _Sheet(name, max(rows, 1), max(cols, 1))
+        self.sheets[name.lower()] = sheet
+        return sheet
+
+    def set_formula(self, sheet_name, coordinate, formula):
+        row, col = _cell_position(coordinate)
+        key = (self._sheet(sheet_name).name, row, col)
+        self._unlink(key)
+        self.formulas.pop(key, None)
+        try:
+            node = parse_formula(formula, key[0])
+        except UnsupportedFormula as e:
+            self.unsupported[(key[0], coordinate)] = str(e)
+            return
+
+        self.unsupported.pop((key[0], coordinate), None)
+        self.formulas[key] = node
+        for ref in _references(node):
+            sheet = self._sheet(ref[1]).name
+            if ref[0] == "ref":
+                self._dependents.setdefault((sheet, ref[2], ref[3]), set()).add(key)
+            else:
+                self._range_dependents.setdefault(sheet, []).append((ref[2:], key))
+                self._range_index.pop(sheet, None)
+        self._dirty.add(key)
+
+    def set_value(self, sheet_name, coordinate, value):
+        row, col = _cell_position(coordinate)
+        sheet = self._sheet(sheet_name)
+        key = (sheet.name, row, col)
+        if key in self.formulas:
+            self._unlink(key)
+            del self.formulas[key]
+        if isinstance(value, int) and not isinstance(value, bool):
+            value = float(value)
+        sheet.set(row, col, value)
+        self._dirty.update(self._dependents_of([key]))
+
+    def value(self, sheet_name, coordinate):
+        row, col = _cell_position(coordinate)
+        return self._sheet(sheet_name).get(row, col)
+
+    def recalculate(self, full=False):
+        if full:
+            affected = set(self.formulas)
+        else:
+            affected = self._downstream(self._dirty)
+        self._dirty.clear()
+
+        for key in affected:
+            self.sheets[key[0].lower()].set_pending(key[1], key[2], True)
+        for key in affected:
+            self._compute(key)
+        return len(affected)
+
+    def _downstream(self, keys):
+        affected = set()
+        frontier = [key for key in keys if key in self.formulas]
+        while frontier:
+            affected.update(frontier)
+            frontier = [
+                key
+                for key in self._dependents_of(frontier)
+                if key not in affected and key in self.formulas
+            ]
+        return affected
+
+    def _dependents_of(self, keys):
+        dependents = set()
+        by_sheet = {}
+        for key in keys:
+            dependents.update(self._dependents.get(key, ()))
+            by_sheet.setdefault(key[0], []).append(key[1:])
+
+        for sheet, cells in by_sheet.items():
+            index = self._range_bounds(sheet)
+            if index is None:
+                continue
+            bounds, owners = index
+            cells = np.array(cells)
+            for start in range(0, len(cells), 256):
+                chunk = cells[start : start + 256]
+                rows, cols = chunk[:, 0], chunk[:, 1]
+                inside = (
+                    (bounds[:, 0:1] <= rows)
+                    & (bounds[:, 2:3] >= rows)
+                    & (bounds[:, 1:2] <= cols)
+                    & (bounds[:, 3:4] >= cols)
+                ).any(axis=1)
+                dependents.update(owners[i] for i in np.flatnonzero(inside))
+        return dependents
+
+    def _range_bounds(self, sheet):
+        if sheet not in self._range_index:
+            entries = self._range_dependents.get(sheet)
+            if entries:
+                self._range_index[sheet] = (
+                    np.array([bounds for bounds, _ in entries]),
+                    [owner for _, owner in entries],
+                )
+            else:
+                self._range_index[sheet] = None
+        return self._range_index[sheet]
+
+    def _compute(self, key):
+        stack = [key]
+        visiting = set()
+        while stack:
+            current = stack[-1]
+            sheet = self.sheets[current[0].lower()]
+            if not sheet.is_pending(current[1], current[2]):
+                stack.pop()
+                continue
+
+            precedents = self._pending_precedents(current)
+            if any(p in visiting or p == current for p in precedents):
+                self.unsupported[
+                    (current[0], f"{_column_letter(current[2])}{current[1]}")
+                ] = "Circular reference"
+                precedents = []
+                value = ExcelError("#REF!")
+            elif precedents and current not in visiting:
+                visiting.add(current)
+                stack.extend(precedents)
+                continue
+            else:
+                value = self._evaluate_cell(current)
+
+            sheet.set(current[1], current[2], value)
+            sheet.set_pending(current[1], current[2], False)
+            visiting.discard(current)
+            stack.pop()
+
+    def _pending_precedents(self, key):
+        precedents = []
+        for ref in _references(self.formulas[key]):
+            sheet = self._sheet(ref[1])
+            if ref[0] == "ref":
+                if sheet.is_pending(ref[2], ref[3]):
+                    precedents.append((sheet.name, ref[2], ref[3]))
+            else:
+                precedents.extend(sheet.pending_cells(*ref[2:]))
+        return precedents
+
+    def _unlink(self, key):
+        node = self.formulas.get(key)
+        if node is None:
+            return
+        for ref in _references(node):
+            sheet = self._sheet(ref[1]).name
+            if ref[0] == "ref":
+                self._dependents.get((sheet, ref[2], ref[3]), set()).discard(key)
+            else:
+                self._range_dependents[sheet] = [
+                    entry
+                    for entry in self._range_dependents.get(sheet, [])
+                    if entry[1] != key
+                ]
+                self._range_index.pop(sheet, None)
+
+    def _sheet(self, name):
+        sheet = self.sheets.get(name.lower())
+        if sheet is None:
+            sheet = _Sheet(name, 1, 1, declared=False)
+            self.sheets[name.lower()] = sheet
+        return sheet
+
+    def _evaluate_cell(self, key):
+        try:
+            value = self._evaluate(self.formulas[key])
+        except _FormulaError as e:
+            return e.error
+        if isinstance(value, _Range):
+            return ExcelError("#VALUE!")
+        if value is None:
+            return 0.0
+        return value
+
+    def _evaluate(self, node):
+        kind = node[0]
+        if kind == "const":
+            return node[1]
+        if kind in ("ref", "range"):
+            sheet = self._sheet(node[1])
+            if not sheet.declared:
+                raise _FormulaError("#REF!")
+            if kind == "ref":
+                return sheet.get(node[2], node[3])
+            return _Range(*sheet.block(*node[2:]))
+        if kind == "neg":
+            return -_to_number(self._scalar(node[1]))
+        if kind == "arith":
+            return _arithmetic(
+                node[1], _to_number(self._scalar(node[2])), _to_number(self._scalar(node[3]))
+            )
+        if kind == "concat":
+            return _to_text(self._scalar(node[1])) + _to_text(self._scalar(node[2]))
+        if kind == "compare":
+            return _compare(node[1], self._scalar(node[2]), self._scalar(node[3]))
+        if kind == "call":
+            return FUNCTIONS[node[1]](self, node[2])
+        raise UnsupportedFormula(f"Unknown node {kind}")
+
+    def _scalar(self, node):
+        value = self._evaluate(node)
+        if isinstance(value, _Range):
+            if value.shape != (1, 1):
+                raise _FormulaError("#VALUE!")
+            value = value.values[0, 0]
+        if isinstance(value, ExcelError):
+            raise _FormulaError(value.code)
+        return value
+
+    def _range(self, node):
+        value = self._evaluate(node)
+        if isinstance(value, _Range):
+            return value
+        if isinstance(value, ExcelError):
+            raise _FormulaError(value.code)
+        values = np.array([[value]], dtype=object)
+        is_number = isinstance(value, float) and not isinstance(value, bool)
+        numbers = np.array([[value if is_number else np.nan]])
+        return _Range(values, numbers, np.zeros((1, 1), dtype=bool))
+
+
+def _to_number(value):
+    if value is None:
+        return 0.0
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.strip())
+        except ValueError:
+            raise _FormulaError("#VALUE!")
+    raise _FormulaError("#VALUE!")
+
+
+def _to_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else f"{value:.15g}"
+    return str(value)
+
+
+def _to_bool(value):
+    if value is None:
+        return False
+    if isinstance(value, str):
+        if value.upper() in ("TRUE", "FALSE"):
+            return value.upper() == "TRUE"
+        raise _FormulaError("#VALUE!")
+    return bool(_to_number(value))
+
+
+def _arithmetic(op, a, b):
+    if op == "+":
+        return a + b
+    if op == "-":
+        return a - b
+    if op == "*":
+        return a * b
+    if op == "/":
+        if b == 0:
+            raise _FormulaError("#DIV/0!")
+        return a / b
+    try:
+        result = a**b
+    except (OverflowError, ZeroDivisionError):
+        raise _FormulaError("#NUM!")
+    if isinstance(result, complex):
+        raise _FormulaError("#NUM!")
+    return float(result)
+
+
+def _sort_key(value):
+    if value is None:
+        return (0, 0.0)
+    if isinstance(value, bool):
+        return (3, value)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    return (2, str(value).lower())
+
+
+def _compare(op, a, b):
+    if a is None:
+        a = "" if isinstance(b, str) else 0.0
+    if b is None:
+        b = "" if isinstance(a, str) else 0.0
+    return _COMPARISONS[op](_sort_key(a), _sort_key(b))
+
+
+def _numeric_args(engine, args):
+    blocks = []
+    for arg in args:
+        if arg[0] in ("ref", "range"):
+            block = engine._range(arg)
+            error = block.first_error()
+            if error is not None:
+                raise _FormulaError(error.code)
+            numbers = block.numbers[~np.isnan(block.numbers)]
+        else:
+            numbers = np.array([_to_number(engine._scalar(arg))])
+        blocks.append(numbers)
+    return np.concatenate(blocks) if blocks else np.array([])
+
+
+def _sum(engine, args):
+    return float(_numeric_args(engine, args).sum())
+
+
+def _average(engine, args):
+    numbers = _numeric_args(engine, args)
+    if not numbers.size:
+        raise _FormulaError("#DIV/0!")
+    return float(numbers.mean())
+
+
+def _min(engine, args):
+    numbers = _numeric_args(engine, args)
+    return float(numbers.min()) if numbers.size else 0.0
+
+
+def _max(engine, args):
+    numbers = _numeric_args(engine, args)
+    return float(numbers.max()) if numbers.size else 0.0
+
+
+def _count(engine, args):
+    count = 0
+    for arg in args:
+        if arg[0] in ("ref", "range"):
+            count += int(np.count_nonzero(~np.isnan(engine._range(arg).numbers)))
+        else:
+            try:
+                _to_number(engine._scalar(arg))
+                count += 1
+            except _FormulaError:
+                pass
+    return float(count)
+
+
+def _if(engine, args):
+    if not 1 < len(args) <= 3:
+        raise _FormulaError("#VALUE!")
+    if _to_bool(engine._scalar(args[0])):
+        return engine._evaluate(args[1])
+    return engine._evaluate(args[2]) if len(args) == 3 else False
+
+
+def _iferror(engine, args):
+    if len(args) != 2:
+        raise _FormulaError("#VALUE!")
+    try:
+        value = engine._evaluate(args[0])
+        if isinstance(value, ExcelError):
+            raise _FormulaError(value.code)
+        return value
+    except _FormulaError:
+        return engine._evaluate(args[1])
+
+
+def _lookup_position(lookup, values, numbers, match_type):
+    if isinstance(lookup, bool) or not isinstance(lookup, (int, float)):
+        keys = [_sort_key(v) for v in values]
+        target = _sort_key(lookup)
+        if match_type == 0:
+            for i, key in enumerate(keys):
+                if key == target:
+                    return i
+            return None
+        candidates = [
+            i
+            for i, key in enumerate(keys)
+            if key[0] == target[0]
+            and (key <= target if match_type > 0 else key >= target)
+        ]
+        return candidates[-1] if candidates else None
+
+    if match_type == 0:
+        hits = np.flatnonzero(numbers == lookup)
+    elif match_type > 0:
+        hits = np.flatnonzero(numbers <= lookup)
+    else:
+        hits = np.flatnonzero(numbers >= lookup)
+    return int(hits[0] if match_type == 0 else hits[-1]) if hits.size else None
+
+
+def _vlookup(engine, args):
+    if not 3 <= len(args) <= 4:
+        raise _FormulaError("#VALUE!")
+    lookup = engine._scalar(args[0])
+    table = engine._range(args[1])
+    column = int(_to_number(engine._scalar(args[2])))
+    approximate = _to_bool(engine._scalar(args[3])) if len(args) == 4 else True
+    if column < 1:
+        raise _FormulaError("#VALUE!")
+    if column > table.shape[1]:
+        raise _FormulaError("#REF!")
+
+    position = _lookup_position(
+        lookup, table.values[:, 0], table.numbers[:, 0], 1 if approximate else 0
+    )
+    if position is None:
+        raise _FormulaError("#N/A")
+    return table.values[position, column - 1]
+
+
+def _match(engine, args):
+    if not 2 <= len(args) <= 3:
+        raise _FormulaError("#VALUE!")
+    lookup = engine._scalar(args[0])
+    block = engine._range(args[1])
+    match_type = int(_to_number(engine._scalar(args[2]))) if len(args) == 3 else 1
+    if 1 not in block.shape:
+        raise _FormulaError("#N/A")
+
+    position = _lookup_position(
+        lookup, block.values.ravel(), block.numbers.ravel(), match_type
+    )
+    if position is None:
+        raise _FormulaError("#N/A")
+    return float(position + 1)
+
+
+def _index(engine, args):
+    if not 2 <= len(args) <= 3:
+        raise _FormulaError("#VALUE!")
+    block = engine._range(args[0])
+    row = int(_to_number(engine._scalar(args[1])))
+    col = int(_to_number(engine._scalar(args[2]))) if len(args) == 3 else 1
+    if len(args) == 2 and block.shape[0] == 1:
+        row, col = 1, row
+    if row < 1 or col < 1 or row > block.shape[0] or col > block.shape[1]:
+        raise _FormulaError("#REF!")
+    return block.values[row - 1, col - 1]
+
+
+FUNCTIONS = {
+    "SUM": _sum,
+    "AVERAGE": _average,
+    "MIN": _min,
+    "MAX": _max,
+    "COUNT": _count,
+    "IF": _if,
+    "IFERROR": _iferror,
+    "VLOOKUP": _vlookup,
+    "MATCH": _match,
+    "INDEX": _index,
+}
+
+
+def evaluate_workbook(filename, updates=(), fallback=True, show=()):
+    engine = FormulaEngine.from_workbook(filename)
+    engine.recalculate(full=True)
+    for sheet_name, coordinate, value in updates:
+        engine.set_value(sheet_name, coordinate, value)
+    engine.recalculate()
+
+    if engine.unsupported and fallback:
+        result = _recalc_copy(filename, updates, show)
+        result["engine"] = "libreoffice"
+        result["unsupported"] = _unsupported_summary(engine)
+        return engine, result
+
+    result = _summarize(engine)
+    if show:
+        result["values"] = {}
+        for reference in show:
+            sheet_name, _, coordinate = reference.rpartition("!")
+            value = engine.value(sheet_name.strip("'"), coordinate)
+            result["values"][reference] = (
+                value.code if isinstance(value, ExcelError) else value
+            )
+    return engine, result
+
+
+def _recalc_copy(filename, updates, show):
+    # LibreOffice recalculates a file in place, so work on a copy that also
+    # carries the updates; the caller's workbook is never modified.
+    from recalc import recalc
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        copy = Path(temp_dir) / Path(filename).name
+        try:
+            if updates:
+                wb = load_workbook(filename, keep_vba=copy.suffix == ".xlsm")
+                for sheet_name, coordinate, value in updates:
+                    _worksheet(wb, sheet_name)[coordinate] = value
+                wb.save(copy)
+            else:
+                shutil.copyfile(filename, copy)
+            result = recalc(str(copy))
+        except Exception as e:
+            return {"error": f"LibreOffice fallback failed: {e}"}
+
+        if show and "error" not in result:
+            wb = load_workbook(copy, data_only=True)
+            result["values"] = {}
+            for reference in show:
+                sheet_name, _, coordinate = reference.rpartition("!")
+                ws = _worksheet(wb, sheet_name.strip("'"))
+                result["values"][reference] = ws[coordinate].value
+        return result
+
+
+def _worksheet(wb, sheet_name):
+    for ws in wb.worksheets:
+        if ws.title.lower() == sheet_name.lower():
+            return ws
+    raise KeyError(f"Unknown sheet {sheet_name!r}")
+
+
+def _summarize(engine):
+    error_details = {err: [] for err in EXCEL_ERRORS}
+    error_counts = {err: 0 for err in EXCEL_ERRORS}
+    for sheet in engine.sheets.values():
+        rows, cols = np.nonzero(sheet.errors)
+        for row, col in zip(rows, cols):
+            code = sheet.values[row, col].code
+            if code in error_counts:
+                error_counts[code] += 1
+                if len(error_details[code]) < MAX_ERROR_LOCATIONS:
+                    error_details[code].append(
+                        f"{sheet.name}!{_column_letter(col + 1)}{row + 1}"
+                    )
+
+    total_errors = sum(error_counts.values())
+    result = {
+        "status": "success" if total_errors == 0 else "errors_found",
+        "total_errors": total_errors,
+        "error_summary": {
+            err: {"count": error_counts[err], "locations": locations}
+            for err, locations in error_details.items()
+            if locations
+        },
+        "total_formulas": _formula_count(engine),
+        "engine": "python",
+    }
+    if engine.unsupported:
+        result["unsupported"] = _unsupported_summary(engine)
+    return result
+
+
+def _formula_count(engine):
+    # Cells in a circular reference are both formulas and unsupported.
+    cells = {
+        (sheet, f"{_column_letter(col)}{row}") for sheet, row, col in engine.formulas
+    }
+    return len(cells | engine.unsupported.keys())
+
+
+def _unsupported_summary(engine):
+    return {
+        f"{sheet}!{coordinate}": reason
+        for (sheet, coordinate), reason in list(engine.unsupported.items())[
+            :MAX_ERROR_LOCATIONS
+        ]
+    }
+
+
+def _parse_update(text):
+    reference, _, raw = text.partition("=")
+    sheet_name, _, coordinate = reference.rpartition("!")
+    if not sheet_name or not coordinate:
+        raise argparse.ArgumentTypeError(f"Expected Sheet!A1=value, got {text!r}")
+    try:
+        value = float(raw)
+    except ValueError:
+        value = raw
+    return sheet_name.strip("'"), coordinate, value
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Evaluate workbook formulas in Python, falling back to LibreOffice"
+    )
+    parser.add_argument("excel_file", help="Excel file to evaluate")
+    parser.add_argument(
+        "--set",
+        dest="updates",
+        action="append",
+        default=[],
+        type=_parse_update,
+        metavar="SHEET!A1=VALUE",
+        help="Change an input cell and recompute only its dependents",
+    )
+    parser.add_argument(
+        "--show",
+        action="append",
+        default=[],
+        metavar="SHEET!A1",
+        help="Include the computed value of a cell in the output",
+    )
+    parser.add_argument(
+        "--no-fallback",
+        action="store_true",
+        help="Report unsupported formulas instead of falling back to LibreOffice",
+    )
+    args = parser.parse_args()
+
+    _, result = evaluate_workbook(
+        args.excel_file, args.updates, fallback=not args.no_fallback, show=args.show
+    )
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
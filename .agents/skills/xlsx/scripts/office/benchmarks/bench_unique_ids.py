@@ -0,0 +1,52 @@
+"""
+Time the unique-ID check on a slide with 10k shapes.
+
+Usage:
+    python bench_unique_ids.py [--shapes 10000] [--repeat 3]
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from synthetic import write_pptx_slide
+from validators import PPTXSchemaValidator
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the unique-ID check")
+    parser.add_argument("--shapes", type=int, default=10000, help="Shapes (default: 10000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs (default: 3)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        unpacked_dir = write_pptx_slide(temp_dir, args.shapes)
+        best = None
+        for _ in range(args.repeat):
+            # A fresh validator each time, so the part walk is not cached;
+            # parsing is left out of the timing.
+            validator = PPTXSchemaValidator(unpacked_dir)
+            for xml_file in validator.xml_files:
+                validator._parse_xml(xml_file)
+            output = io.StringIO()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(output):
+                passed = validator.validate_unique_ids()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+    print(f"Shapes: {args.shapes}")
+    print(f"  validate_unique_ids: {best * 1000:.1f} ms")
+    if not passed:
+        print(output.getvalue())
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
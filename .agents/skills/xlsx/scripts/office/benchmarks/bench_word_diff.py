@@ -0,0 +1,89 @@
+"""
+Regression check for word_diff on heavily rewritten documents.
+
+Builds a document of about 1M characters in 6000+ paragraphs and diffs it
+against rewritten versions of itself: every other paragraph replaced, the
+paragraphs shuffled, the words of every paragraph shuffled, and every
+paragraph replaced. Fails if any diff takes longer than --max-seconds.
+
+Usage:
+    python bench_word_diff.py [--chars 1000000] [--max-seconds 2]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from validators.word_diff import word_diff
+
+
+def rewrites(chars: int, rng: random.Random) -> tuple[list[str], dict]:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    vocabulary = [
+        "".join(rng.choices(letters, k=rng.randint(2, 9))) for _ in range(5000)
+    ]
+
+    def paragraph():
+        return " ".join(rng.choices(vocabulary, k=rng.randint(10, 25))) + "."
+
+    original = []
+    total = 0
+    while total < chars:
+        original.append(paragraph())
+        total += len(original[-1]) + 1
+
+    shuffled = list(original)
+    rng.shuffle(shuffled)
+    words_shuffled = []
+    for text in original:
+        words = text.split(" ")
+        rng.shuffle(words)
+        words_shuffled.append(" ".join(words))
+
+    return original, {
+        "every other paragraph replaced": [
+            paragraph() if i % 2 else text for i, text in enumerate(original)
+        ],
+        "paragraphs shuffled": shuffled,
+        "words shuffled": words_shuffled,
+        "every paragraph replaced": [paragraph() for _ in original],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time word_diff on rewritten documents"
+    )
+    parser.add_argument(
+        "--chars", type=int, default=1_000_000, help="Document size (default: 1000000)"
+    )
+    parser.add_argument(
+        "--max-seconds", type=float, default=2.0, help="Limit per diff (default: 2)"
+    )
+    args = parser.parse_args()
+
+    original, modified = rewrites(args.chars, random.Random(0))
+    original_text = "\n".join(original)
+    print(f"Document: {len(original_text)} characters, {len(original)} paragraphs")
+
+    slow = []
+    for name, paragraphs in modified.items():
+        start = time.perf_counter()
+        word_diff(original_text, "\n".join(paragraphs))
+        elapsed = time.perf_counter() - start
+        print(f"  {name}: {elapsed:.2f}s")
+        if elapsed > args.max_seconds:
+            slow.append(name)
+
+    if slow:
+        print(f"FAILED - Over {args.max_seconds}s: {', '.join(slow)}")
+        sys.exit(1)
+    print(f"PASSED - Every diff under {args.max_seconds}s")
+
+
+if __name__ == "__main__":
+    main()
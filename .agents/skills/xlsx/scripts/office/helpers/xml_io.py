@@ -0,0 +1,389 @@
+"""Secure lxml-backed XML reading and writing for Office parts.
+
+Parses with lxml (no DTDs, no entity expansion, no network access) and
+serializes with the same rules as xml.dom.minidom's toxml()/toprettyxml(),
+so output is byte-for-byte what the minidom-based scripts used to produce:
+- Text and attribute values escape &, <, > and "
+- Pretty-printing puts every node on its own line, except an element whose
+  only child is a text node, which stays inline
+- Condensing drops whitespace-only text and comments, except inside
+  prefixed :t elements
+
+Namespace declarations are written before an element's other attributes.
+lxml merges CDATA sections into the surrounding text, so parts that contain
+any are scanned once more with expat to record where they were; a section is
+written back as CDATA for as long as the text it belongs to is unchanged.
+"""
+
+from io import BytesIO
+from pathlib import Path
+from xml.parsers import expat
+
+import lxml.etree
+
+XML_NAMESPACE = "http://www.w3.org/XML/1998/namespace"
+
+
+class XMLDocument:
+
+    def __init__(self, tree, ns_declarations, cdata_runs=None):
+        self.tree = tree
+        self.root = tree.getroot()
+        self._ns_declarations = ns_declarations
+        self._cdata_runs = cdata_runs or {}
+
+    def to_xml(self, encoding: str = "UTF-8", condense: bool = False) -> bytes:
+        return self._serialize(encoding, "", "", condense)
+
+    def to_pretty_xml(self, indent: str = "  ", encoding: str = "utf-8") -> bytes:
+        return self._serialize(encoding, indent, "\n", False)
+
+    def indent(self, indent: str = "  ") -> None:
+        """
+        Lay the tree out in place the way to_pretty_xml() writes it, so the
+        tree is what parsing to_pretty_xml()'s output again would give.
+        """
+        cdata_runs = {}
+        for node in self.root.itersiblings(preceding=True):
+            _reparse_misc(node)
+        self._indent_element(self.root, "", indent, cdata_runs)
+        for node in self.root.itersiblings():
+            _reparse_misc(node)
+        self._cdata_runs = cdata_runs
+
+    def _indent_element(self, elem, indent, addindent, cdata_runs):
+        # Mirrors _write_element with newl="\n": every text node becomes
+        # indent + text + newline, merged with the whitespace around the
+        # nodes next to it, and the parser's line-end and attribute-value
+        # normalization is applied to what would be written raw.
+        for key, value in elem.attrib.items():
+            reparsed = _reparse_text(value).translate(_ATTRIBUTE_WHITESPACE)
+            if reparsed != value:
+                elem.set(key, reparsed)
+
+        nodes = self._child_nodes(elem)
+        if not nodes:
+            elem.text = None
+            return
+        if len(nodes) == 1 and isinstance(nodes[0], str):
+            _set_run(cdata_runs, elem, False, [_reparse_node(nodes[0])])
+            return
+
+        child_indent = indent + addindent
+        owner, is_tail = elem, False
+        segments = ["\n"]
+        for node in nodes:
+            if isinstance(node, _CData):
+                segments.append(_reparse_node(node))
+            elif isinstance(node, str):
+                _add_segment(segments, f"{child_indent}{_reparse_text(node)}\n")
+            else:
+                _add_segment(segments, child_indent)
+                _set_run(cdata_runs, owner, is_tail, segments)
+                if is_element(node):
+                    self._indent_element(node, child_indent, addindent, cdata_runs)
+                else:
+                    _reparse_misc(node)
+                owner, is_tail = node, True
+                segments = ["\n"]
+        _add_segment(segments, indent)
+        _set_run(cdata_runs, owner, is_tail, segments)
+
+    def _serialize(self, encoding, addindent, newl, condense) -> bytes:
+        out = [f'<?xml version="1.0" encoding="{encoding}"?>{newl}']
+
+        prolog = list(self.root.itersiblings(preceding=True))
+        for node in reversed(prolog):
+            _write_misc(out, node, "", newl)
+        self._write_element(
+            out, self.root, {XML_NAMESPACE: "xml"}, "", addindent, newl, condense
+        )
+        for node in self.root.itersiblings():
+            _write_misc(out, node, "", newl)
+
+        return "".join(out).encode(encoding, "xmlcharrefreplace")
+
+    def _write_element(self, out, elem, prefixes, indent, addindent, newl, condense):
+        declarations = self._ns_declarations.get(elem)
+        if declarations:
+            prefixes = dict(prefixes)
+            for prefix, uri in declarations:
+                prefixes[uri] = prefix
+
+        tag = _qualified_name(elem)
+        out.append(f"{indent}<{tag}")
+
+        if declarations:
+            for prefix, uri in declarations:
+                name = f"xmlns:{prefix}" if prefix else "xmlns"
+                out.append(f' {name}="{_escape(uri)}"')
+
+        for key, value in elem.attrib.items():
+            if key[0] == "{":
+                uri, local = key[1:].split("}", 1)
+                prefix = prefixes.get(uri) or _lookup_prefix(elem, uri)
+                key = f"{prefix}:{local}"
+            out.append(f' {key}="{_escape(value)}"')
+
+        nodes = self._child_nodes(elem)
+        if condense and not tag.endswith(":t"):
+            nodes = [
+                node
+                for node in nodes
+                if not (_is_text(node) and node and node.strip() == "")
+                and not _is_comment(node)
+            ]
+
+        if not nodes:
+            out.append(f"/>{newl}")
+            return
+
+        out.append(">")
+        if len(nodes) == 1 and isinstance(nodes[0], str):
+            out.append(_write_text(nodes[0], "", ""))
+        else:
+            out.append(newl)
+            child_indent = indent + addindent
+            for node in nodes:
+                if isinstance(node, str):
+                    out.append(_write_text(node, child_indent, newl))
+                elif is_element(node):
+                    self._write_element(
+                        out, node, prefixes, child_indent, addindent, newl, condense
+                    )
+                else:
+                    _write_misc(out, node, child_indent, newl)
+            out.append(indent)
+        out.append(f"</{tag}>{newl}")
+
+    def _child_nodes(self, elem):
+        if not self._cdata_runs:
+            return child_nodes(elem)
+        nodes = []
+        self._add_text(nodes, elem, False, elem.text)
+        for child in elem:
+            nodes.append(child)
+            self._add_text(nodes, child, True, child.tail)
+        return nodes
+
+    def _add_text(self, nodes, owner, is_tail, text):
+        segments = self._cdata_runs.get((owner, is_tail))
+        if segments and "".join(data for _, data in segments) == (text or ""):
+            nodes.extend(
+                _CData(data) if is_cdata else data
+                for is_cdata, data in segments
+                if data
+            )
+        elif text is not None:
+            nodes.append(text)
+
+
+def parse_xml(source) -> XMLDocument:
+    if isinstance(source, (str, Path)):
+        source = Path(source).read_bytes()
+
+    ns_declarations = {}
+    pending = []
+    context = lxml.etree.iterparse(
+        BytesIO(source),
+        events=("start-ns", "start"),
+        resolve_entities=False,
+        no_network=True,
+        load_dtd=False,
+        huge_tree=True,
+        remove_blank_text=False,
+        remove_comments=False,
+        remove_pis=False,
+    )
+    for event, item in context:
+        if event == "start-ns":
+            pending.append(item)
+        elif pending:
+            ns_declarations[item] = pending
+            pending = []
+
+    tree = context.root.getroottree()
+    if tree.docinfo.doctype:
+        raise ValueError("DTDs are not allowed in Office XML parts")
+
+    cdata_runs = None
+    if b"<![CDATA[" in source:
+        cdata_runs = _cdata_runs(source, tree.getroot())
+    return XMLDocument(tree, ns_declarations, cdata_runs)
+
+
+class _CData(str):
+    pass
+
+
+_ATTRIBUTE_WHITESPACE = str.maketrans("\t\n", "  ")
+
+
+def _reparse_text(data: str) -> str:
+    return data.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _reparse_node(node):
+    text = _reparse_text(node)
+    return _CData(text) if isinstance(node, _CData) else text
+
+
+def _reparse_misc(node) -> None:
+    if node.text:
+        node.text = _reparse_text(node.text)
+
+
+def _add_segment(segments, text) -> None:
+    if segments and not isinstance(segments[-1], _CData):
+        segments[-1] += text
+    else:
+        segments.append(text)
+
+
+def _set_run(cdata_runs, owner, is_tail, segments) -> None:
+    text = "".join(segments) or None
+    if is_tail:
+        owner.tail = text
+    else:
+        owner.text = text
+    if any(isinstance(segment, _CData) for segment in segments):
+        cdata_runs[(owner, is_tail)] = [
+            (isinstance(segment, _CData), segment) for segment in segments
+        ]
+
+
+def _cdata_runs(source, root) -> dict:
+    # Maps (node, is_tail) to the (is_cdata, data) segments of that node's
+    # text or tail, for the runs that contain a CDATA section. Nodes are
+    # matched to expat events by document order, which is the order
+    # root.iter() yields elements, comments and processing instructions in.
+    nodes = root.iter()
+    stack = []
+    last = None
+    in_cdata = False
+    runs = {}
+
+    def current_run():
+        key = (last, True) if last is not None else (stack[-1], False)
+        return runs.setdefault(key, [])
+
+    def start_element(name, attributes):
+        nonlocal last
+        stack.append(next(nodes))
+        last = None
+
+    def end_element(name):
+        nonlocal last
+        last = stack.pop()
+
+    def other_node(*args):
+        nonlocal last
+        if stack:
+            last = next(nodes)
+
+    def character_data(data):
+        if not stack:
+            return
+        run = current_run()
+        if run and run[-1][0] == in_cdata:
+            run[-1][1] += data
+        else:
+            run.append([in_cdata, data])
+
+    def start_cdata():
+        nonlocal in_cdata
+        in_cdata = True
+        if stack:
+            current_run().append([True, ""])
+
+    def end_cdata():
+        nonlocal in_cdata
+        in_cdata = False
+
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+    parser.CommentHandler = other_node
+    parser.ProcessingInstructionHandler = other_node
+    parser.CharacterDataHandler = character_data
+    parser.StartCdataSectionHandler = start_cdata
+    parser.EndCdataSectionHandler = end_cdata
+    parser.Parse(source, True)
+
+    return {
+        key: [(is_cdata, data) for is_cdata, data in segments]
+        for key, segments in runs.items()
+        if any(is_cdata for is_cdata, _ in segments)
+    }
+
+
+def local_name(node) -> str:
+    return node.tag.rpartition("}")[2]
+
+
+def is_element(node) -> bool:
+    return isinstance(node.tag, str)
+
+
+def child_nodes(elem) -> list:
+    nodes = []
+    if elem.text is not None:
+        nodes.append(elem.text)
+    for child in elem:
+        nodes.append(child)
+        if child.tail is not None:
+            nodes.append(child.tail)
+    return nodes
+
+
+def remove_element(elem) -> None:
+    parent = elem.getparent()
+    if elem.tail:
+        previous = elem.getprevious()
+        if previous is not None:
+            previous.tail = (previous.tail or "") + elem.tail
+        else:
+            parent.text = (parent.text or "") + elem.tail
+    parent.remove(elem)
+
+
+def _qualified_name(elem) -> str:
+    local = local_name(elem)
+    return f"{elem.prefix}:{local}" if elem.prefix else local
+
+
+def _lookup_prefix(elem, uri) -> str:
+    for prefix, candidate in elem.nsmap.items():
+        if candidate == uri and prefix:
+            return prefix
+    raise ValueError(f"No prefix declared for namespace {uri}")
+
+
+def _is_comment(node) -> bool:
+    return not isinstance(node, str) and node.tag is lxml.etree.Comment
+
+
+def _write_misc(out, node, indent, newl) -> None:
+    if node.tag is lxml.etree.Comment:
+        out.append(f"{indent}<!--{node.text or ''}-->{newl}")
+    elif node.tag is lxml.etree.ProcessingInstruction:
+        out.append(f"{indent}<?{node.target} {node.text or ''}?>{newl}")
+
+
+def _is_text(node) -> bool:
+    return isinstance(node, str) and not isinstance(node, _CData)
+
+
+def _write_text(node, indent, newl) -> str:
+    if isinstance(node, _CData):
+        return f"<![CDATA[{node}]]>"
+    return _escape(f"{indent}{node}{newl}")
+
+
+def _escape(data: str) -> str:
+    return (
+        data.replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace('"', "&quot;")
+        .replace(">", "&gt;")
+    )
@@ -1,25 +1,26 @@
 """Pack a directory into a DOCX, PPTX, or XLSX file.
 
 Validates with auto-repair, condenses XML formatting, and creates the Office file.
+Members are streamed straight from the input directory into the archive; XML
+parts are condensed in memory and everything else is copied as-is.
 
 Usage:
-    python pack.py <input_directory> <output_file> [--original <file>] [--validate true|false]
+    python pack.py <input_directory> <output_file> [--original <file>] [--validate true|false] [--jobs N] [--full]
 
 Examples:
     python pack.py unpacked/ output.docx --original input.docx
     python pack.py unpacked/ output.pptx --validate false
+    python pack.py unpacked/ output.pptx --original input.pptx --jobs 4
 """
 
 import argparse
 import sys
-import shutil
-import tempfile
 import zipfile
 from pathlib import Path
 
-import defusedxml.minidom
-
+from helpers.xml_io import parse_xml
 from validators import DOCXSchemaValidator, PPTXSchemaValidator, RedliningValidator
+from validators.manifest import MANIFEST_NAME
 
 def pack(
     input_directory: str,
@@ -27,6 +28,8 @@ def pack(
     original_file: str | None = None,
     validate: bool = True,
     infer_author_func=None,
+    jobs: int = 1,
+    full: bool = False,
 ) -> tuple[None, str]:
     input_dir = Path(input_directory)
     output_path = Path(output_file)
@@ -42,26 +45,33 @@ def pack(
         original_path = Path(original_file)
         if original_path.exists():
             success, output = _run_validation(
-                input_dir, original_path, suffix, infer_author_func
+                input_dir, original_path, suffix, infer_author_func, jobs, full
             )
             if output:
                 print(output)
             if not success:
                 return None, f"Error: Validation failed for {input_dir}"
 
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_content_dir = Path(temp_dir) / "content"
-        shutil.copytree(input_dir, temp_content_dir)
-
-        for pattern in ["*.xml", "*.rels"]:
-            for xml_file in temp_content_dir.rglob(pattern):
-                _condense_xml(xml_file)
-
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_resolved = output_path.resolve()
+    try:
         with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as zf:
-            for f in temp_content_dir.rglob("*"):
-                if f.is_file():
-                    zf.write(f, f.relative_to(temp_content_dir))
+            for f in input_dir.rglob("*"):
+                if not f.is_file() or f.resolve() == output_resolved:
+                    continue
+                if f.name == MANIFEST_NAME:
+                    continue
+
+                arcname = f.relative_to(input_dir)
+                if f.name.endswith((".xml", ".rels")):
+                    zinfo = zipfile.ZipInfo.from_file(f, arcname)
+                    zinfo.compress_type = zipfile.ZIP_DEFLATED
+                    zf.writestr(zinfo, _condense_xml(f))
+                else:
+                    zf.write(f, arcname)
+    except Exception:
+        output_path.unlink(missing_ok=True)
+        raise
 
     return None, f"Successfully packed {input_dir} to {output_file}"
 
@@ -71,6 +81,8 @@ def _run_validation(
     original_file: Path,
     suffix: str,
     infer_author_func=None,
+    jobs: int = 1,
+    full: bool = False,
 ) -> tuple[bool, str | None]:
     output_lines = []
     validators = []
@@ -84,11 +96,13 @@ def _run_validation(
                 print(f"Warning: {e} Using default author 'Claude'.", file=sys.stderr)
 
         validators = [
-            DOCXSchemaValidator(unpacked_dir, original_file),
+            DOCXSchemaValidator(unpacked_dir, original_file, jobs=jobs, full=full),
             RedliningValidator(unpacked_dir, original_file, author=author),
         ]
     elif suffix == ".pptx":
-        validators = [PPTXSchemaValidator(unpacked_dir, original_file)]
+        validators = [
+            PPTXSchemaValidator(unpacked_dir, original_file, jobs=jobs, full=full)
+        ]
 
     if not validators:
         return True, None
@@ -105,24 +119,9 @@ def _run_validation(
     return success, "\n".join(output_lines) if output_lines else None
 
 
-def _condense_xml(xml_file: Path) -> None:
+def _condense_xml(xml_file: Path) -> bytes:
     try:
-        with open(xml_file, encoding="utf-8") as f:
-            dom = defusedxml.minidom.parse(f)
-
-        for element in dom.getElementsByTagName("*"):
-            if element.tagName.endswith(":t"):
-                continue
-
-            for child in list(element.childNodes):
-                if (
-                    child.nodeType == child.TEXT_NODE
-                    and child.nodeValue
-                    and child.nodeValue.strip() == ""
-                ) or child.nodeType == child.COMMENT_NODE:
-                    element.removeChild(child)
-
-        xml_file.write_bytes(dom.toxml(encoding="UTF-8"))
+        return parse_xml(xml_file).to_xml(encoding="UTF-8", condense=True)
     except Exception as e:
         print(f"ERROR: Failed to parse {xml_file.name}: {e}", file=sys.stderr)
         raise
@@ -145,6 +144,18 @@ if __name__ == "__main__":
         metavar="true|false",
         help="Run validation with auto-repair (default: true)",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Worker processes for per-part schema validation (default: 1)",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Re-validate every part instead of only parts changed since the last run",
+    )
     args = parser.parse_args()
 
     _, message = pack(
@@ -152,6 +163,8 @@ if __name__ == "__main__":
         args.output_file,
         original_file=args.original,
         validate=args.validate,
+        jobs=args.jobs,
+        full=args.full,
     )
     print(message)
 
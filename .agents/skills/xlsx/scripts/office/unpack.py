@@ -4,6 +4,10 @@ Extracts the ZIP archive, pretty-prints XML files, and optionally:
 - Merges adjacent runs with identical formatting (DOCX only)
 - Simplifies adjacent tracked changes from same author (DOCX only)
 
+Each part is read from the archive, parsed, transformed and written exactly
+once, so pretty-printing and the DOCX stages share one parse.
+Parts can be spread over several worker processes with --jobs.
+
 Usage:
     python unpack.py <office_file> <output_dir> [options]
 
@@ -11,17 +15,18 @@ Examples:
     python unpack.py document.docx unpacked/
     python unpack.py presentation.pptx unpacked/
     python unpack.py document.docx unpacked/ --merge-runs false
+    python unpack.py presentation.pptx unpacked/ --jobs 4
 """
 
 import argparse
 import sys
 import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-import defusedxml.minidom
-
-from helpers.merge_runs import merge_runs as do_merge_runs
-from helpers.simplify_redlines import simplify_redlines as do_simplify_redlines
+from helpers.merge_runs import is_story_part, merge_runs_in_part
+from helpers.simplify_redlines import simplify_redlines_in_part
+from helpers.xml_io import parse_xml
 
 SMART_QUOTE_REPLACEMENTS = {
     "\u201c": "&#x201C;",  
@@ -31,11 +36,18 @@ SMART_QUOTE_REPLACEMENTS = {
 }
 
 
+DOCUMENT_PART = "word/document.xml"
+
+_worker_archive = None
+_worker_options = None
+
+
 def unpack(
     input_file: str,
     output_directory: str,
     merge_runs: bool = True,
     simplify_redlines: bool = True,
+    jobs: int = 1,
 ) -> tuple[None, str]:
     input_path = Path(input_file)
     output_path = Path(output_directory)
@@ -51,26 +63,27 @@ def unpack(
         output_path.mkdir(parents=True, exist_ok=True)
 
         with zipfile.ZipFile(input_path, "r") as zf:
-            zf.extractall(output_path)
+            members = [info.filename for info in zf.infolist()]
 
-        xml_files = list(output_path.rglob("*.xml")) + list(output_path.rglob("*.rels"))
-        for xml_file in xml_files:
-            _pretty_print_xml(xml_file)
+        options = (
+            output_path,
+            suffix == ".docx" and simplify_redlines,
+            suffix == ".docx" and merge_runs,
+        )
+        results = _unpack_members(input_path, members, options, jobs)
 
-        message = f"Unpacked {input_file} ({len(xml_files)} XML files)"
+        xml_count = sum(1 for is_xml, _, _ in results if is_xml)
+        message = f"Unpacked {input_file} ({xml_count} XML files)"
 
         if suffix == ".docx":
             if simplify_redlines:
-                simplify_count, _ = do_simplify_redlines(str(output_path))
+                simplify_count = sum(count for _, count, _ in results)
                 message += f", simplified {simplify_count} tracked changes"
 
             if merge_runs:
-                merge_count, _ = do_merge_runs(str(output_path))
+                merge_count = sum(count for _, _, count in results)
                 message += f", merged {merge_count} runs"
 
-        for xml_file in xml_files:
-            _escape_smart_quotes(xml_file)
-
         return None, message
 
     except zipfile.BadZipFile:
@@ -79,23 +92,101 @@ def unpack(
         return None, f"Error unpacking: {e}"
 
 
-def _pretty_print_xml(xml_file: Path) -> None:
+def _unpack_members(input_path, members, options, jobs):
+    if jobs <= 1 or len(members) < 2:
+        _init_unpack_worker(input_path, options)
+        try:
+            return [_unpack_member(member) for member in members]
+        finally:
+            _close_unpack_worker()
+
+    chunksize = max(1, len(members) // (jobs * 4))
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=_init_unpack_worker,
+        initargs=(input_path, options),
+    ) as executor:
+        return list(executor.map(_unpack_member, members, chunksize=chunksize))
+
+
+def _init_unpack_worker(input_path, options):
+    global _worker_archive, _worker_options
+    _worker_archive = zipfile.ZipFile(input_path, "r")
+    _worker_options = options
+
+
+def _close_unpack_worker():
+    global _worker_archive
+    _worker_archive.close()
+    _worker_archive = None
+
+
+def _unpack_member(member: str) -> tuple[bool, int, int]:
+    output_path, simplify_redlines, merge_runs = _worker_options
+    target = _member_path(output_path, member)
+
+    if member.endswith("/"):
+        target.mkdir(parents=True, exist_ok=True)
+        return False, 0, 0
+
+    data = _worker_archive.read(member)
+    target.parent.mkdir(parents=True, exist_ok=True)
+
+    if not member.endswith((".xml", ".rels")):
+        target.write_bytes(data)
+        return False, 0, 0
+
+    simplify = simplify_redlines and member == DOCUMENT_PART
+    merge = merge_runs and is_story_part(member)
+    if simplify or merge:
+        data, simplify_count, merge_count = _transform_xml(data, simplify, merge)
+    else:
+        data, simplify_count, merge_count = _pretty_print_xml(data), 0, 0
+
+    target.write_bytes(_escape_smart_quotes(data))
+    return True, simplify_count, merge_count
+
+
+def _member_path(output_path: Path, member: str) -> Path:
+    parts = [
+        part
+        for part in member.replace("\\", "/").split("/")
+        if part not in ("", ".", "..")
+    ]
+    return output_path.joinpath(*parts)
+
+
+def _pretty_print_xml(data: bytes) -> bytes:
     try:
-        content = xml_file.read_text(encoding="utf-8")
-        dom = defusedxml.minidom.parseString(content)
-        xml_file.write_bytes(dom.toprettyxml(indent="  ", encoding="utf-8"))
+        doc = parse_xml(data)
+        return doc.to_pretty_xml(indent="  ", encoding="utf-8")
     except Exception:
-        pass  
+        return data
 
 
-def _escape_smart_quotes(xml_file: Path) -> None:
+def _transform_xml(data: bytes, simplify: bool, merge: bool) -> tuple[bytes, int, int]:
+    # The part is parsed once and laid out as the pretty-printed output
+    # would parse back, so the stages see the same tree they would after a
+    # pretty-print round trip. If a stage fails, the part is only
+    # pretty-printed.
     try:
-        content = xml_file.read_text(encoding="utf-8")
-        for char, entity in SMART_QUOTE_REPLACEMENTS.items():
-            content = content.replace(char, entity)
-        xml_file.write_text(content, encoding="utf-8")
+        doc = parse_xml(data)
+        doc.indent("  ")
+        simplify_count = simplify_redlines_in_part(doc) if simplify else 0
+        merge_count = merge_runs_in_part(doc) if merge else 0
+        return doc.to_xml(encoding="UTF-8"), simplify_count, merge_count
     except Exception:
-        pass
+        return _pretty_print_xml(data), 0, 0
+
+
+def _escape_smart_quotes(data: bytes) -> bytes:
+    try:
+        content = data.decode("utf-8")
+    except UnicodeDecodeError:
+        return data
+    for char, entity in SMART_QUOTE_REPLACEMENTS.items():
+        content = content.replace(char, entity)
+    return content.encode("utf-8")
 
 
 if __name__ == "__main__":
@@ -118,6 +209,13 @@ if __name__ == "__main__":
         metavar="true|false",
         help="Merge adjacent tracked changes from same author (DOCX only, default: true)",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Worker processes for per-part extraction (default: 1)",
+    )
     args = parser.parse_args()
 
     _, message = unpack(
@@ -125,6 +223,7 @@ if __name__ == "__main__":
         args.output_directory,
         merge_runs=args.merge_runs,
         simplify_redlines=args.simplify_redlines,
+        jobs=args.jobs,
     )
     print(message)
 
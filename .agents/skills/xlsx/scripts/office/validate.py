@@ -2,12 +2,16 @@
 Command line tool to validate Office document XML files against XSD schemas and tracked changes.
 
 Usage:
-    python validate.py <path> [--original <original_file>] [--auto-repair] [--author NAME]
+    python validate.py <path> [--original <original_file>] [--auto-repair] [--author NAME] [--jobs N] [--full]
 
 The first argument can be either:
 - An unpacked directory containing the Office document XML files
 - A packed Office file (.docx/.pptx/.xlsx) which will be unpacked to a temp directory
 
+Schema verdicts are recorded per part in the unpacked directory, so later runs
+only re-check parts that changed (and parts whose relationships point at them).
+Use --full to re-check every part.
+
 Auto-repair fixes:
 - paraId/durableId values that exceed OOXML limits
 - Missing xml:space="preserve" on w:t elements with whitespace
@@ -50,6 +54,18 @@ def main():
         default="Claude",
         help="Author name for redlining validation (default: Claude)",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Worker processes for per-part schema validation (default: 1)",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Re-check every part instead of only parts changed since the last run",
+    )
     args = parser.parse_args()
 
     path = Path(args.path)
@@ -80,7 +96,13 @@ def main():
     match file_extension:
         case ".docx":
             validators = [
-                DOCXSchemaValidator(unpacked_dir, original_file, verbose=args.verbose),
+                DOCXSchemaValidator(
+                    unpacked_dir,
+                    original_file,
+                    verbose=args.verbose,
+                    jobs=args.jobs,
+                    full=args.full,
+                ),
             ]
             if original_file:
                 validators.append(
@@ -88,7 +110,13 @@ def main():
                 )
         case ".pptx":
             validators = [
-                PPTXSchemaValidator(unpacked_dir, original_file, verbose=args.verbose),
+                PPTXSchemaValidator(
+                    unpacked_dir,
+                    original_file,
+                    verbose=args.verbose,
+                    jobs=args.jobs,
+                    full=args.full,
+                ),
             ]
         case _:
             print(f"Error: Validation not supported for file type {file_extension}")
@@ -101,6 +129,11 @@ def main():
 
     success = all(v.validate() for v in validators)
 
+    if args.verbose:
+        for v in validators:
+            if hasattr(v, "parse_cache_summary"):
+                print(v.parse_cache_summary())
+
     if success:
         print("All validations PASSED!")
 
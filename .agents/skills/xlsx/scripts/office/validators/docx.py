@@ -3,14 +3,13 @@ Validator for Word document XML files against XSD schemas.
 """
 
 import random
-import re
-import tempfile
-import zipfile
+from pathlib import Path
 
 import defusedxml.minidom
-import lxml.etree
 
 from .base import BaseSchemaValidator
+from .original import load_original_package
+from .rules import Rule, walk_part
 
 
 class DOCXSchemaValidator(BaseSchemaValidator):
@@ -64,40 +63,7 @@ class DOCXSchemaValidator(BaseSchemaValidator):
         return all_valid
 
     def validate_whitespace_preservation(self):
-        errors = []
-
-        for xml_file in self.xml_files:
-            if xml_file.name != "document.xml":
-                continue
-
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-
-                for elem in root.iter(f"{{{self.WORD_2006_NAMESPACE}}}t"):
-                    if elem.text:
-                        text = elem.text
-                        if re.search(r"^[ \t\n\r]", text) or re.search(
-                            r"[ \t\n\r]$", text
-                        ):
-                            xml_space_attr = f"{{{self.XML_NAMESPACE}}}space"
-                            if (
-                                xml_space_attr not in elem.attrib
-                                or elem.attrib[xml_space_attr] != "preserve"
-                            ):
-                                text_preview = (
-                                    repr(text)[:50] + "..."
-                                    if len(repr(text)) > 50
-                                    else repr(text)
-                                )
-                                errors.append(
-                                    f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                                    f"Line {elem.sourceline}: w:t element with whitespace missing xml:space='preserve': {text_preview}"
-                                )
-
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: Error: {e}"
-                )
+        errors = self._walk_part_rules()["whitespace"].errors
 
         if errors:
             print(f"FAILED - Found {len(errors)} whitespace preservation violations:")
@@ -110,45 +76,7 @@ class DOCXSchemaValidator(BaseSchemaValidator):
             return True
 
     def validate_deletions(self):
-        errors = []
-
-        for xml_file in self.xml_files:
-            if xml_file.name != "document.xml":
-                continue
-
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-                namespaces = {"w": self.WORD_2006_NAMESPACE}
-
-                for t_elem in root.xpath(".//w:del//w:t", namespaces=namespaces):
-                    if t_elem.text:
-                        text_preview = (
-                            repr(t_elem.text)[:50] + "..."
-                            if len(repr(t_elem.text)) > 50
-                            else repr(t_elem.text)
-                        )
-                        errors.append(
-                            f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                            f"Line {t_elem.sourceline}: <w:t> found within <w:del>: {text_preview}"
-                        )
-
-                for instr_elem in root.xpath(
-                    ".//w:del//w:instrText", namespaces=namespaces
-                ):
-                    text_preview = (
-                        repr(instr_elem.text or "")[:50] + "..."
-                        if len(repr(instr_elem.text or "")) > 50
-                        else repr(instr_elem.text or "")
-                    )
-                    errors.append(
-                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                        f"Line {instr_elem.sourceline}: <w:instrText> found within <w:del> (use <w:delInstrText>): {text_preview}"
-                    )
-
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: Error: {e}"
-                )
+        errors = self._walk_part_rules()["deletions"].errors
 
         if errors:
             print(f"FAILED - Found {len(errors)} deletion validation violations:")
@@ -161,74 +89,33 @@ class DOCXSchemaValidator(BaseSchemaValidator):
             return True
 
     def count_paragraphs_in_unpacked(self):
-        count = 0
-
-        for xml_file in self.xml_files:
-            if xml_file.name != "document.xml":
-                continue
-
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-                paragraphs = root.findall(f".//{{{self.WORD_2006_NAMESPACE}}}p")
-                count = len(paragraphs)
-            except Exception as e:
-                print(f"Error counting paragraphs in unpacked document: {e}")
-
-        return count
+        rule = self._walk_part_rules()["paragraphs"]
+        for error in rule.errors:
+            print(f"Error counting paragraphs in unpacked document: {error}")
+        return rule.count
 
     def count_paragraphs_in_original(self):
         original = self.original_file
         if original is None:
             return 0
 
-        count = 0
-
+        rule = _ParagraphCountRule(self.WORD_2006_NAMESPACE)
         try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                with zipfile.ZipFile(original, "r") as zip_ref:
-                    zip_ref.extractall(temp_dir)
-
-                doc_xml_path = temp_dir + "/word/document.xml"
-                root = lxml.etree.parse(doc_xml_path).getroot()
-
-                paragraphs = root.findall(f".//{{{self.WORD_2006_NAMESPACE}}}p")
-                count = len(paragraphs)
-
+            original_package = load_original_package(original)
+            walk_part(
+                original_package.read("word/document.xml"),
+                Path("word/document.xml"),
+                [rule],
+            )
         except Exception as e:
-            print(f"Error counting paragraphs in original document: {e}")
+            rule.errors.append(e)
 
-        return count
+        for error in rule.errors:
+            print(f"Error counting paragraphs in original document: {error}")
+        return rule.count
 
     def validate_insertions(self):
-        errors = []
-
-        for xml_file in self.xml_files:
-            if xml_file.name != "document.xml":
-                continue
-
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-                namespaces = {"w": self.WORD_2006_NAMESPACE}
-
-                invalid_elements = root.xpath(
-                    ".//w:ins//w:delText[not(ancestor::w:del)]", namespaces=namespaces
-                )
-
-                for elem in invalid_elements:
-                    text_preview = (
-                        repr(elem.text or "")[:50] + "..."
-                        if len(repr(elem.text or "")) > 50
-                        else repr(elem.text or "")
-                    )
-                    errors.append(
-                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                        f"Line {elem.sourceline}: <w:delText> within <w:ins>: {text_preview}"
-                    )
-
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: Error: {e}"
-                )
+        errors = self._walk_part_rules()["insertions"].errors
 
         if errors:
             print(f"FAILED - Found {len(errors)} insertion validation violations:")
@@ -252,40 +139,7 @@ class DOCXSchemaValidator(BaseSchemaValidator):
         return int(val, base)
 
     def validate_id_constraints(self):
-        errors = []
-        para_id_attr = f"{{{self.W14_NAMESPACE}}}paraId"
-        durable_id_attr = f"{{{self.W16CID_NAMESPACE}}}durableId"
-
-        for xml_file in self.xml_files:
-            try:
-                for elem in lxml.etree.parse(str(xml_file)).iter():
-                    if val := elem.get(para_id_attr):
-                        if self._parse_id_value(val, base=16) >= 0x80000000:
-                            errors.append(
-                                f"  {xml_file.name}:{elem.sourceline}: paraId={val} >= 0x80000000"
-                            )
-
-                    if val := elem.get(durable_id_attr):
-                        if xml_file.name == "numbering.xml":
-                            try:
-                                if self._parse_id_value(val, base=10) >= 0x7FFFFFFF:
-                                    errors.append(
-                                        f"  {xml_file.name}:{elem.sourceline}: "
-                                        f"durableId={val} >= 0x7FFFFFFF"
-                                    )
-                            except ValueError:
-                                errors.append(
-                                    f"  {xml_file.name}:{elem.sourceline}: "
-                                    f"durableId={val} must be decimal in numbering.xml"
-                                )
-                        else:
-                            if self._parse_id_value(val, base=16) >= 0x7FFFFFFF:
-                                errors.append(
-                                    f"  {xml_file.name}:{elem.sourceline}: "
-                                    f"durableId={val} >= 0x7FFFFFFF"
-                                )
-            except Exception:
-                pass
+        errors = self._walk_part_rules()["id_constraints"].errors
 
         if errors:
             print(f"FAILED - {len(errors)} ID constraint violations:")
@@ -296,83 +150,14 @@ class DOCXSchemaValidator(BaseSchemaValidator):
         return not errors
 
     def validate_comment_markers(self):
-        errors = []
-
-        document_xml = None
-        comments_xml = None
-        for xml_file in self.xml_files:
-            if xml_file.name == "document.xml" and "word" in str(xml_file):
-                document_xml = xml_file
-            elif xml_file.name == "comments.xml":
-                comments_xml = xml_file
+        rule = self._walk_part_rules()["comment_markers"]
 
-        if not document_xml:
+        if not rule.found_document:
             if self.verbose:
                 print("PASSED - No document.xml found (skipping comment validation)")
             return True
 
-        try:
-            doc_root = lxml.etree.parse(str(document_xml)).getroot()
-            namespaces = {"w": self.WORD_2006_NAMESPACE}
-
-            range_starts = {
-                elem.get(f"{{{self.WORD_2006_NAMESPACE}}}id")
-                for elem in doc_root.xpath(
-                    ".//w:commentRangeStart", namespaces=namespaces
-                )
-            }
-            range_ends = {
-                elem.get(f"{{{self.WORD_2006_NAMESPACE}}}id")
-                for elem in doc_root.xpath(
-                    ".//w:commentRangeEnd", namespaces=namespaces
-                )
-            }
-            references = {
-                elem.get(f"{{{self.WORD_2006_NAMESPACE}}}id")
-                for elem in doc_root.xpath(
-                    ".//w:commentReference", namespaces=namespaces
-                )
-            }
-
-            orphaned_ends = range_ends - range_starts
-            for comment_id in sorted(
-                orphaned_ends, key=lambda x: int(x) if x and x.isdigit() else 0
-            ):
-                errors.append(
-                    f'  document.xml: commentRangeEnd id="{comment_id}" has no matching commentRangeStart'
-                )
-
-            orphaned_starts = range_starts - range_ends
-            for comment_id in sorted(
-                orphaned_starts, key=lambda x: int(x) if x and x.isdigit() else 0
-            ):
-                errors.append(
-                    f'  document.xml: commentRangeStart id="{comment_id}" has no matching commentRangeEnd'
-                )
-
-            comment_ids = set()
-            if comments_xml and comments_xml.exists():
-                comments_root = lxml.etree.parse(str(comments_xml)).getroot()
-                comment_ids = {
-                    elem.get(f"{{{self.WORD_2006_NAMESPACE}}}id")
-                    for elem in comments_root.xpath(
-                        ".//w:comment", namespaces=namespaces
-                    )
-                }
-
-                marker_ids = range_starts | range_ends | references
-                invalid_refs = marker_ids - comment_ids
-                for comment_id in sorted(
-                    invalid_refs, key=lambda x: int(x) if x and x.isdigit() else 0
-                ):
-                    if comment_id:  
-                        errors.append(
-                            f'  document.xml: marker id="{comment_id}" references non-existent comment'
-                        )
-
-        except (lxml.etree.XMLSyntaxError, Exception) as e:
-            errors.append(f"  Error parsing XML: {e}")
-
+        errors = rule.report()
         if errors:
             print(f"FAILED - {len(errors)} comment marker violations:")
             for error in errors:
@@ -383,6 +168,21 @@ class DOCXSchemaValidator(BaseSchemaValidator):
                 print("PASSED - All comment markers properly paired")
             return True
 
+    def _part_rules(self):
+        w = self.WORD_2006_NAMESPACE
+        rules = super()._part_rules()
+        rules.update(
+            whitespace=_WhitespaceRule(w, self.XML_NAMESPACE),
+            deletions=_DeletionRule(w),
+            insertions=_InsertionRule(w),
+            id_constraints=_IdConstraintRule(
+                self.W14_NAMESPACE, self.W16CID_NAMESPACE, self._parse_id_value
+            ),
+            comment_markers=_CommentMarkerRule(w),
+            paragraphs=_ParagraphCountRule(w),
+        )
+        return rules
+
     def repair(self) -> int:
         repairs = super().repair()
         repairs += self.repair_durableId()
@@ -435,6 +235,7 @@ class DOCXSchemaValidator(BaseSchemaValidator):
 
                 if modified:
                     xml_file.write_bytes(dom.toxml(encoding="UTF-8"))
+                    self._invalidate_xml(xml_file)
 
             except Exception:
                 pass
@@ -442,5 +243,224 @@ class DOCXSchemaValidator(BaseSchemaValidator):
         return repairs
 
 
+def _preview(text):
+    return repr(text)[:50] + "..." if len(repr(text)) > 50 else repr(text)
+
+
+def _is_document_part(part):
+    return part.name == "document.xml"
+
+
+class _WhitespaceRule(Rule):
+
+    def __init__(self, w, xml_namespace):
+        self.tags = (f"{{{w}}}t",)
+        self.space_attr = f"{{{xml_namespace}}}space"
+        self.errors = []
+
+    def applies_to(self, part):
+        return _is_document_part(part)
+
+    def end(self, elem, walk):
+        text = elem.text
+        if not text:
+            return
+        if text[0] in " \t\n\r" or text[-1] in " \t\n\r":
+            if elem.get(self.space_attr) != "preserve":
+                self.errors.append(
+                    f"  {walk.label}: "
+                    f"Line {elem.sourceline}: w:t element with whitespace missing xml:space='preserve': {_preview(text)}"
+                )
+
+    def failed(self, walk, error):
+        self.errors.append(f"  {walk.label}: Error: {error}")
+
+
+class _DeletionRule(Rule):
+
+    def __init__(self, w):
+        self.t_tag = f"{{{w}}}t"
+        self.tags = (self.t_tag, f"{{{w}}}instrText")
+        self.del_tag = f"{{{w}}}del"
+        self.ancestors = (self.del_tag,)
+        self.errors = []
+        self._instr_errors = []
+
+    def applies_to(self, part):
+        return _is_document_part(part)
+
+    def end(self, elem, walk):
+        if not walk.inside(self.del_tag):
+            return
+        if elem.tag == self.t_tag:
+            if elem.text:
+                self.errors.append(
+                    f"  {walk.label}: "
+                    f"Line {elem.sourceline}: <w:t> found within <w:del>: {_preview(elem.text)}"
+                )
+        else:
+            self._instr_errors.append(
+                f"  {walk.label}: "
+                f"Line {elem.sourceline}: <w:instrText> found within <w:del> (use <w:delInstrText>): {_preview(elem.text or '')}"
+            )
+
+    def finish(self, walk):
+        self.errors.extend(self._instr_errors)
+        self._instr_errors = []
+
+    def failed(self, walk, error):
+        self.finish(walk)
+        self.errors.append(f"  {walk.label}: Error: {error}")
+
+
+class _InsertionRule(Rule):
+
+    def __init__(self, w):
+        self.tags = (f"{{{w}}}delText",)
+        self.ins_tag = f"{{{w}}}ins"
+        self.del_tag = f"{{{w}}}del"
+        self.ancestors = (self.ins_tag, self.del_tag)
+        self.errors = []
+
+    def applies_to(self, part):
+        return _is_document_part(part)
+
+    def end(self, elem, walk):
+        if walk.inside(self.ins_tag) and not walk.inside(self.del_tag):
+            self.errors.append(
+                f"  {walk.label}: "
+                f"Line {elem.sourceline}: <w:delText> within <w:ins>: {_preview(elem.text or '')}"
+            )
+
+    def failed(self, walk, error):
+        self.errors.append(f"  {walk.label}: Error: {error}")
+
+
+class _IdConstraintRule(Rule):
+
+    def __init__(self, w14, w16cid, parse_id_value):
+        self.para_id_attr = f"{{{w14}}}paraId"
+        self.durable_id_attr = f"{{{w16cid}}}durableId"
+        self.parse_id_value = parse_id_value
+        self.errors = []
+
+    def start(self, elem, walk):
+        if val := elem.get(self.para_id_attr):
+            if self.parse_id_value(val, base=16) >= 0x80000000:
+                self.errors.append(
+                    f"  {walk.part.name}:{elem.sourceline}: paraId={val} >= 0x80000000"
+                )
+
+        if val := elem.get(self.durable_id_attr):
+            name = walk.part.name
+            if name == "numbering.xml":
+                try:
+                    if self.parse_id_value(val, base=10) >= 0x7FFFFFFF:
+                        self.errors.append(
+                            f"  {name}:{elem.sourceline}: "
+                            f"durableId={val} >= 0x7FFFFFFF"
+                        )
+                except ValueError:
+                    self.errors.append(
+                        f"  {name}:{elem.sourceline}: "
+                        f"durableId={val} must be decimal in numbering.xml"
+                    )
+            else:
+                if self.parse_id_value(val, base=16) >= 0x7FFFFFFF:
+                    self.errors.append(
+                        f"  {name}:{elem.sourceline}: "
+                        f"durableId={val} >= 0x7FFFFFFF"
+                    )
+
+
+class _CommentMarkerRule(Rule):
+
+    def __init__(self, w):
+        self.id_attr = f"{{{w}}}id"
+        self.range_start_tag = f"{{{w}}}commentRangeStart"
+        self.range_end_tag = f"{{{w}}}commentRangeEnd"
+        self.reference_tag = f"{{{w}}}commentReference"
+        self.comment_tag = f"{{{w}}}comment"
+        self.tags = (
+            self.range_start_tag,
+            self.range_end_tag,
+            self.reference_tag,
+            self.comment_tag,
+        )
+        self.found_document = False
+        self.found_comments = False
+        self.markers = {tag: set() for tag in self.tags}
+        self.errors = []
+
+    def applies_to(self, part):
+        if part.name == "document.xml" and "word" in str(part):
+            self.found_document = True
+            return True
+        if part.name == "comments.xml":
+            self.found_comments = True
+            return True
+        return False
+
+    def start(self, elem, walk):
+        tag = elem.tag
+        if (tag == self.comment_tag) == (walk.part.name == "comments.xml"):
+            self.markers[tag].add(elem.get(self.id_attr))
+
+    def failed(self, walk, error):
+        self.errors.append(f"  Error parsing XML: {error}")
+
+    def report(self):
+        def by_number(x):
+            return int(x) if x and x.isdigit() else 0
+
+        range_starts = self.markers[self.range_start_tag]
+        range_ends = self.markers[self.range_end_tag]
+        references = self.markers[self.reference_tag]
+
+        errors = []
+        for comment_id in sorted(range_ends - range_starts, key=by_number):
+            errors.append(
+                f'  document.xml: commentRangeEnd id="{comment_id}" has no matching commentRangeStart'
+            )
+
+        for comment_id in sorted(range_starts - range_ends, key=by_number):
+            errors.append(
+                f'  document.xml: commentRangeStart id="{comment_id}" has no matching commentRangeEnd'
+            )
+
+        if self.found_comments:
+            marker_ids = range_starts | range_ends | references
+            invalid_refs = marker_ids - self.markers[self.comment_tag]
+            for comment_id in sorted(invalid_refs, key=by_number):
+                if comment_id:
+                    errors.append(
+                        f'  document.xml: marker id="{comment_id}" references non-existent comment'
+                    )
+
+        return errors + self.errors
+
+
+class _ParagraphCountRule(Rule):
+
+    def __init__(self, w):
+        self.tags = (f"{{{w}}}p",)
+        self.count = 0
+        self._counted = 0
+        self.errors = []
+
+    def applies_to(self, part):
+        return _is_document_part(part)
+
+    def start(self, elem, walk):
+        self._counted += 1
+
+    def finish(self, walk):
+        self.count, self._counted = self._counted, 0
+
+    def failed(self, walk, error):
+        self._counted = 0
+        self.errors.append(error)
+
+
 if __name__ == "__main__":
     raise RuntimeError("This module should not be run directly.")
@@ -3,8 +3,10 @@ Validator for PowerPoint presentation XML files against XSD schemas.
 """
 
 import re
+from pathlib import Path
 
 from .base import BaseSchemaValidator
+from .package_graph import rels_part_name
 
 
 class PPTXSchemaValidator(BaseSchemaValidator):
@@ -69,7 +71,7 @@ class PPTXSchemaValidator(BaseSchemaValidator):
 
         for xml_file in self.xml_files:
             try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
+                root = self._parse_xml(xml_file).getroot()
 
                 for elem in root.iter():
                     for attr, value in elem.attrib.items():
@@ -115,26 +117,24 @@ class PPTXSchemaValidator(BaseSchemaValidator):
 
         for slide_master in slide_masters:
             try:
-                root = lxml.etree.parse(str(slide_master)).getroot()
+                root = self._parse_xml(slide_master).getroot()
 
-                rels_file = slide_master.parent / "_rels" / f"{slide_master.name}.rels"
+                rels_part = rels_part_name(
+                    slide_master.relative_to(self.unpacked_dir).as_posix()
+                )
 
-                if not rels_file.exists():
+                if rels_part not in self.package.parts:
                     errors.append(
                         f"  {slide_master.relative_to(self.unpacked_dir)}: "
-                        f"Missing relationships file: {rels_file.relative_to(self.unpacked_dir)}"
+                        f"Missing relationships file: {Path(rels_part)}"
                     )
                     continue
 
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
-
-                valid_layout_rids = set()
-                for rel in rels_root.findall(
-                    f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
-                ):
-                    rel_type = rel.get("Type", "")
-                    if "slideLayout" in rel_type:
-                        valid_layout_rids.add(rel.get("Id"))
+                valid_layout_rids = {
+                    rel.id
+                    for rel in self.package.relationships(rels_part)
+                    if "slideLayout" in rel.type
+                }
 
                 for sld_layout_id in root.findall(
                     f".//{{{self.PRESENTATIONML_NAMESPACE}}}sldLayoutId"
@@ -173,29 +173,23 @@ class PPTXSchemaValidator(BaseSchemaValidator):
         import lxml.etree
 
         errors = []
-        slide_rels_files = list(self.unpacked_dir.glob("ppt/slides/_rels/*.xml.rels"))
+        slide_rels_parts = self.package.glob("ppt/slides/_rels/*.xml.rels")
 
-        for rels_file in slide_rels_files:
+        for rels_part in slide_rels_parts:
             try:
-                root = lxml.etree.parse(str(rels_file)).getroot()
-
                 layout_rels = [
                     rel
-                    for rel in root.findall(
-                        f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
-                    )
-                    if "slideLayout" in rel.get("Type", "")
+                    for rel in self.package.relationships(rels_part)
+                    if "slideLayout" in rel.type
                 ]
 
                 if len(layout_rels) > 1:
                     errors.append(
-                        f"  {rels_file.relative_to(self.unpacked_dir)}: has {len(layout_rels)} slideLayout references"
+                        f"  {Path(rels_part)}: has {len(layout_rels)} slideLayout references"
                     )
 
             except Exception as e:
-                errors.append(
-                    f"  {rels_file.relative_to(self.unpacked_dir)}: Error: {e}"
-                )
+                errors.append(f"  {Path(rels_part)}: Error: {e}")
 
         if errors:
             print("FAILED - Found slides with duplicate slideLayout references:")
@@ -213,23 +207,19 @@ class PPTXSchemaValidator(BaseSchemaValidator):
         errors = []
         notes_slide_references = {}  
 
-        slide_rels_files = list(self.unpacked_dir.glob("ppt/slides/_rels/*.xml.rels"))
+        slide_rels_parts = self.package.glob("ppt/slides/_rels/*.xml.rels")
 
-        if not slide_rels_files:
+        if not slide_rels_parts:
             if self.verbose:
                 print("PASSED - No slide relationship files found")
             return True
 
-        for rels_file in slide_rels_files:
+        for rels_part in slide_rels_parts:
+            rels_file = Path(rels_part)
             try:
-                root = lxml.etree.parse(str(rels_file)).getroot()
-
-                for rel in root.findall(
-                    f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
-                ):
-                    rel_type = rel.get("Type", "")
-                    if "notesSlide" in rel_type:
-                        target = rel.get("Target", "")
+                for rel in self.package.relationships(rels_part):
+                    if "notesSlide" in rel.type:
+                        target = rel.target
                         if target:
                             normalized_target = target.replace("../", "")
 
@@ -244,9 +234,7 @@ class PPTXSchemaValidator(BaseSchemaValidator):
                             )
 
             except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {rels_file.relative_to(self.unpacked_dir)}: Error: {e}"
-                )
+                errors.append(f"  {rels_file}: Error: {e}")
 
         for target, references in notes_slide_references.items():
             if len(references) > 1:
@@ -255,7 +243,7 @@ class PPTXSchemaValidator(BaseSchemaValidator):
                     f"  Notes slide '{target}' is referenced by multiple slides: {', '.join(slide_names)}"
                 )
                 for slide_name, rels_file in references:
-                    errors.append(f"    - {rels_file.relative_to(self.unpacked_dir)}")
+                    errors.append(f"    - {rels_file}")
 
         if errors:
             print(
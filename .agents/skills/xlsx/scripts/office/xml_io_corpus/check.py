@@ -0,0 +1,98 @@
+"""
+Check helpers.xml_io against the minidom output it replaces.
+
+samples/ holds small XML parts covering xml:space and <w:t> whitespace,
+smart quotes and escaping, CDATA sections and namespace declarations.
+expected/ holds what the old minidom-based code produced for each of them:
+toprettyxml(indent="  ") as <name>.pretty.xml, and the condensed toxml()
+(whitespace-only text and comments dropped outside :t elements) as
+<name>.condensed.xml. The check fails unless xml_io's output is
+byte-identical to both.
+
+Usage:
+    python check.py            # compare against expected/
+    python check.py --update   # regenerate expected/ with minidom
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from helpers.xml_io import parse_xml
+
+CORPUS_DIR = Path(__file__).resolve().parent
+SAMPLES_DIR = CORPUS_DIR / "samples"
+EXPECTED_DIR = CORPUS_DIR / "expected"
+
+
+def minidom_pretty(data: bytes) -> bytes:
+    import defusedxml.minidom
+
+    dom = defusedxml.minidom.parseString(data.decode("utf-8"))
+    return dom.toprettyxml(indent="  ", encoding="utf-8")
+
+
+def minidom_condensed(data: bytes) -> bytes:
+    import defusedxml.minidom
+
+    dom = defusedxml.minidom.parseString(data.decode("utf-8"))
+    for element in dom.getElementsByTagName("*"):
+        if element.tagName.endswith(":t"):
+            continue
+        for child in list(element.childNodes):
+            if (
+                child.nodeType == child.TEXT_NODE
+                and child.nodeValue
+                and child.nodeValue.strip() == ""
+            ) or child.nodeType == child.COMMENT_NODE:
+                element.removeChild(child)
+    return dom.toxml(encoding="UTF-8")
+
+
+OUTPUTS = {
+    "pretty": (
+        minidom_pretty,
+        lambda data: parse_xml(data).to_pretty_xml(indent="  ", encoding="utf-8"),
+    ),
+    "condensed": (
+        minidom_condensed,
+        lambda data: parse_xml(data).to_xml(encoding="UTF-8", condense=True),
+    ),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check xml_io against minidom output")
+    parser.add_argument(
+        "--update", action="store_true", help="Regenerate expected/ with minidom"
+    )
+    args = parser.parse_args()
+
+    samples = sorted(SAMPLES_DIR.glob("*.xml"))
+    failures = []
+    for sample in samples:
+        data = sample.read_bytes()
+        for label, (reference, serialize) in OUTPUTS.items():
+            expected_path = EXPECTED_DIR / f"{sample.stem}.{label}.xml"
+            if args.update:
+                EXPECTED_DIR.mkdir(exist_ok=True)
+                expected_path.write_bytes(reference(data))
+                continue
+            if serialize(data) != expected_path.read_bytes():
+                failures.append(f"{sample.name} ({label})")
+
+    if args.update:
+        print(f"Regenerated expected output for {len(samples)} samples")
+    elif failures:
+        print(f"FAILED - {len(failures)} outputs differ from minidom:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    else:
+        print(f"PASSED - {len(samples)} samples byte-identical to minidom")
+
+
+if __name__ == "__main__":
+    main()
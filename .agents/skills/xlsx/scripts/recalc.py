@@ -3,21 +3,42 @@ Excel Formula Recalculation Script
 Recalculates all formulas in an Excel file using LibreOffice
 """
 
+import argparse
 import json
 import os
 import platform
+import posixpath
 import subprocess
 import sys
+import zipfile
 from pathlib import Path
 
-from office.soffice import get_soffice_env
+import defusedxml.ElementTree as ET
 
-from openpyxl import load_workbook
+from office.soffice import (
+    SofficeError,
+    SofficePool,
+    SofficeTimeout,
+    get_pool,
+    get_soffice_env,
+    uno_available,
+)
 
 MACRO_DIR_MACOS = "~/Library/Application Support/LibreOffice/4/user/basic/Standard"
 MACRO_DIR_LINUX = "~/.config/libreoffice/4/user/basic/Standard"
 MACRO_FILENAME = "Module1.xba"
 
+EXCEL_ERRORS = [
+    "#VALUE!",
+    "#DIV/0!",
+    "#REF!",
+    "#NAME?",
+    "#NULL!",
+    "#NUM!",
+    "#N/A",
+]
+MAX_ERROR_LOCATIONS = 20
+
 RECALCULATE_MACRO = """<?xml version="1.0" encoding="UTF-8"?>
 <!DOCTYPE script:module PUBLIC "-//OpenOffice.org//DTD OfficeDocument 1.0//EN" "module.dtd">
 <script:module xmlns:script="http://openoffice.org/2000/script" script:name="Module1" script:language="StarBasic">
@@ -73,59 +94,84 @@ def recalc(filename, timeout=30):
 
     abs_path = str(Path(filename).absolute())
 
-    if not setup_libreoffice_macro():
-        return {"error": "Failed to setup LibreOffice macro"}
-
-    cmd = [
-        "soffice",
-        "--headless",
-        "--norestore",
-        "vnd.sun.star.script:Standard.Module1.RecalculateAndSave?language=Basic&location=application",
-        abs_path,
-    ]
-
-    if platform.system() == "Linux":
-        cmd = ["timeout", str(timeout)] + cmd
-    elif platform.system() == "Darwin" and has_gtimeout():
-        cmd = ["gtimeout", str(timeout)] + cmd
-
-    result = subprocess.run(cmd, capture_output=True, text=True, env=get_soffice_env())
-
-    if result.returncode != 0 and result.returncode != 124:  
-        error_msg = result.stderr or "Unknown error during recalculation"
-        if "Module1" in error_msg or "RecalculateAndSave" not in error_msg:
-            return {"error": "LibreOffice macro not configured properly"}
-        return {"error": error_msg}
+    if uno_available():
+        error = _recalc_with_pool(abs_path, timeout)
+    else:
+        error = _recalc_with_macro(abs_path, timeout)
+    if error:
+        return {"error": error}
+
+    return _check_workbook(filename)
+
+
+def recalc_batch(filenames, timeout=30, jobs=1):
+    # Every input gets a result line. A path listed more than once (also as
+    # a.xlsx and ./a.xlsx) is recalculated once, for its first entry.
+    abs_paths = {}
+    for filename in filenames:
+        abs_path = os.path.abspath(filename)
+        if abs_path in abs_paths:
+            yield filename, {
+                "error": f"Duplicate of {abs_paths[abs_path]}, recalculated once"
+            }
+        elif not os.path.exists(abs_path):
+            yield filename, {"error": f"File {filename} does not exist"}
+        else:
+            abs_paths[abs_path] = filename
+    pending = list(abs_paths)
+
+    if uno_available():
+        with SofficePool(jobs) as pool:
+            for abs_path, _, exc in pool.map(
+                _recalculate_and_store, pending, timeout=timeout
+            ):
+                filename = abs_paths[abs_path]
+                if isinstance(exc, SofficeTimeout):
+                    yield filename, {
+                        "error": f"Recalculation timed out after {timeout}s"
+                    }
+                elif exc is not None:
+                    yield filename, {"error": f"LibreOffice failed to recalculate: {exc}"}
+                else:
+                    yield filename, _check_workbook(filename)
+        return
 
     try:
-        wb = load_workbook(filename, data_only=True)
-
-        excel_errors = [
-            "#VALUE!",
-            "#DIV/0!",
-            "#REF!",
-            "#NAME?",
-            "#NULL!",
-            "#NUM!",
-            "#N/A",
-        ]
-        error_details = {err: [] for err in excel_errors}
-        total_errors = 0
-
-        for sheet_name in wb.sheetnames:
-            ws = wb[sheet_name]
-            for row in ws.iter_rows():
-                for cell in row:
-                    if cell.value is not None and isinstance(cell.value, str):
-                        for err in excel_errors:
-                            if err in cell.value:
-                                location = f"{sheet_name}!{cell.coordinate}"
-                                error_details[err].append(location)
-                                total_errors += 1
-                                break
-
-        wb.close()
+        macro_ready = not pending or setup_libreoffice_macro()
+    except OSError:
+        macro_ready = False
+    if not macro_ready:
+        for abs_path in pending:
+            yield abs_paths[abs_path], {"error": "Failed to setup LibreOffice macro"}
+        return
+
+    for abs_path in pending:
+        filename = abs_paths[abs_path]
+        try:
+            error = _recalc_with_macro(abs_path, timeout, setup=False)
+        except Exception as e:
+            error = f"LibreOffice failed to recalculate: {e}"
+        yield filename, {"error": error} if error else _check_workbook(filename)
+
+
+def _check_workbook(filename):
+    try:
+        error_details = {err: [] for err in EXCEL_ERRORS}
+        error_counts = {err: 0 for err in EXCEL_ERRORS}
+        formula_count = 0
 
+        with zipfile.ZipFile(filename, "r") as zf:
+            for sheet_name, part_name in _worksheet_parts(zf):
+                with zf.open(part_name) as sheet_xml:
+                    for coordinate, has_formula, error in _scan_cells(sheet_xml):
+                        formula_count += has_formula
+                        if error in error_counts:
+                            error_counts[error] += 1
+                            locations = error_details[error]
+                            if len(locations) < MAX_ERROR_LOCATIONS:
+                                locations.append(f"{sheet_name}!{coordinate}")
+
+        total_errors = sum(error_counts.values())
         result = {
             "status": "success" if total_errors == 0 else "errors_found",
             "total_errors": total_errors,
@@ -135,24 +181,10 @@ def recalc(filename, timeout=30):
         for err_type, locations in error_details.items():
             if locations:
                 result["error_summary"][err_type] = {
-                    "count": len(locations),
-                    "locations": locations[:20],  
+                    "count": error_counts[err_type],
+                    "locations": locations,
                 }
 
-        wb_formulas = load_workbook(filename, data_only=False)
-        formula_count = 0
-        for sheet_name in wb_formulas.sheetnames:
-            ws = wb_formulas[sheet_name]
-            for row in ws.iter_rows():
-                for cell in row:
-                    if (
-                        cell.value
-                        and isinstance(cell.value, str)
-                        and cell.value.startswith("=")
-                    ):
-                        formula_count += 1
-        wb_formulas.close()
-
         result["total_formulas"] = formula_count
 
         return result
@@ -161,22 +193,200 @@ def recalc(filename, timeout=30):
         return {"error": str(e)}
 
 
+def _worksheet_parts(zf):
+    workbook = ET.fromstring(zf.read("xl/workbook.xml"))
+    rels = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+
+    targets = {}
+    for rel in rels:
+        if _local_name(rel.tag) != "Relationship":
+            continue
+        target = rel.get("Target", "")
+        if rel.get("TargetMode") == "External":
+            continue
+        if target.startswith("/"):
+            part_name = target.lstrip("/")
+        else:
+            part_name = posixpath.normpath(posixpath.join("xl", target))
+        targets[rel.get("Id")] = (rel.get("Type", ""), part_name)
+
+    members = set(zf.namelist())
+    for elem in workbook.iter():
+        if _local_name(elem.tag) != "sheet":
+            continue
+        rel_id = next(
+            (v for k, v in elem.attrib.items() if _local_name(k) == "id"), None
+        )
+        rel_type, part_name = targets.get(rel_id, ("", None))
+        if rel_type.endswith("/worksheet") and part_name in members:
+            yield elem.get("name"), part_name
+
+
+def _scan_cells(sheet_xml):
+    sheet_data = None
+    row_number = 0
+    column = 0
+
+    for event, elem in ET.iterparse(sheet_xml, events=("start", "end")):
+        name = _local_name(elem.tag)
+
+        if event == "start":
+            if name == "sheetData":
+                sheet_data = elem
+            elif name == "row":
+                row_number = int(elem.get("r", row_number + 1))
+                column = 0
+            continue
+
+        if name == "c":
+            reference = elem.get("r")
+            if reference:
+                column = _column_index(reference)
+            else:
+                column += 1
+                reference = f"{_column_letter(column)}{row_number}"
+
+            has_formula = False
+            value = None
+            for child in elem:
+                child_name = _local_name(child.tag)
+                if child_name == "f":
+                    has_formula = True
+                elif child_name == "v":
+                    value = child.text
+
+            yield reference, has_formula, value if elem.get("t") == "e" else None
+            elem.clear()
+        elif name == "row" and sheet_data is not None:
+            sheet_data.clear()
+
+
+def _local_name(tag):
+    return tag.rpartition("}")[2]
+
+
+def _column_index(reference):
+    index = 0
+    for char in reference:
+        if not char.isalpha():
+            break
+        index = index * 26 + ord(char.upper()) - ord("A") + 1
+    return index
+
+
+def _column_letter(index):
+    letters = ""
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+def _recalc_with_pool(abs_path, timeout):
+    try:
+        get_pool().run(_recalculate_and_store, abs_path, timeout=timeout)
+    except SofficeTimeout:
+        return f"Recalculation timed out after {timeout}s"
+    except SofficeError as e:
+        return str(e)
+    except Exception as e:
+        return f"LibreOffice failed to recalculate: {e}"
+    return None
+
+
+def _recalculate_and_store(session, abs_path):
+    document = session.load_document(abs_path)
+    try:
+        document.calculateAll()
+        document.store()
+    finally:
+        document.close(True)
+
+
+def _recalc_with_macro(abs_path, timeout, setup=True):
+    if setup and not setup_libreoffice_macro():
+        return "Failed to setup LibreOffice macro"
+
+    cmd = [
+        "soffice",
+        "--headless",
+        "--norestore",
+        "vnd.sun.star.script:Standard.Module1.RecalculateAndSave?language=Basic&location=application",
+        abs_path,
+    ]
+
+    if platform.system() == "Linux":
+        cmd = ["timeout", str(timeout)] + cmd
+    elif platform.system() == "Darwin" and has_gtimeout():
+        cmd = ["gtimeout", str(timeout)] + cmd
+
+    result = subprocess.run(cmd, capture_output=True, text=True, env=get_soffice_env())
+
+    if result.returncode != 0 and result.returncode != 124:  
+        error_msg = result.stderr or "Unknown error during recalculation"
+        if "Module1" in error_msg or "RecalculateAndSave" not in error_msg:
+            return "LibreOffice macro not configured properly"
+        return error_msg
+
+    return None
+
+
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python recalc.py <excel_file> [timeout_seconds]")
-        print("\nRecalculates all formulas in an Excel file using LibreOffice")
-        print("\nReturns JSON with error details:")
-        print("  - status: 'success' or 'errors_found'")
-        print("  - total_errors: Total number of Excel errors found")
-        print("  - total_formulas: Number of formulas in the file")
-        print("  - error_summary: Breakdown by error type with locations")
-        print("    - #VALUE!, #DIV/0!, #REF!, #NAME?, #NULL!, #NUM!, #N/A")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description="Recalculates all formulas in an Excel file using LibreOffice",
+        epilog=(
+            "Returns JSON with error details: status ('success' or "
+            "'errors_found'), total_errors, total_formulas and error_summary "
+            "(#VALUE!, #DIV/0!, #REF!, #NAME?, #NULL!, #NUM!, #N/A with locations). "
+            "In --batch mode one JSON object per file is printed per line as "
+            "each file completes."
+        ),
+    )
+    parser.add_argument("excel_file", nargs="?", help="Excel file to recalculate")
+    parser.add_argument(
+        "timeout_seconds",
+        nargs="?",
+        type=int,
+        help="Timeout in seconds per file (default: 30)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=int,
+        metavar="SECONDS",
+        help="Same as timeout_seconds; convenient with --batch",
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="FILES_TXT",
+        help="Text file listing one workbook path per line",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Warm LibreOffice instances to use in --batch mode (default: 1)",
+    )
+    args = parser.parse_args()
+    timeout = args.timeout or args.timeout_seconds or 30
+
+    if args.batch:
+        if args.excel_file is not None:
+            parser.error("pass either an excel_file or --batch, not both")
+        filenames = [
+            line.strip()
+            for line in Path(args.batch).read_text().splitlines()
+            if line.strip()
+        ]
+        for filename, result in recalc_batch(filenames, timeout, args.jobs):
+            print(json.dumps({"file": filename, **result}), flush=True)
+        return
 
-    filename = sys.argv[1]
-    timeout = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    if args.excel_file is None:
+        parser.print_help()
+        sys.exit(1)
 
-    result = recalc(filename, timeout)
+    result = recalc(args.excel_file, timeout)
     print(json.dumps(result, indent=2))
 
 